@@ -0,0 +1,195 @@
+"""
+Backfill Stored Sample Features
+
+Recomputes the stored feature columns and peak fingerprints of validated
+samples whose feature set fingerprint differs from the current one
+(ingest.FEATURE_SET_FINGERPRINT), e.g. after python/features.py,
+FEATURE_SET_CONFIG or FINGERPRINT_CONFIG changed, or for rows that
+predate the fingerprint.
+
+Samples are streamed in id order, a chunk at a time: features are computed
+across a process pool while the next chunk is read, and written back with
+one batched UPDATE per chunk. After each committed chunk the last id is
+saved to a checkpoint file, so an interrupted run resumes where it stopped.
+Validation status and contributor counters are left unchanged; a sample
+whose features can no longer be computed keeps its old values and is
+reported as failed.
+
+Usage:
+    python -m api.commands.backfill_features [--batch-size 200] [--workers 4]
+        [--checkpoint ./data/backfill-features.json] [--restart] [--all]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from pathlib import Path
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import func, or_, select, update
+
+from api.core.database import async_session_maker, close_db, engine, init_db, legacy_guid_columns
+from api.core.executors import CPUPool
+from api.models.contributor import Contributor  # noqa: F401
+from api.models.fingerprint import SampleFingerprint  # noqa: F401
+from api.models.sample import Sample
+from api.services.fingerprints import replace_fingerprints
+from api.services.ingest import FEATURE_SET_FINGERPRINT, compute_feature_columns, compute_fingerprints
+
+
+def _compute_batch(signals: list[tuple[UUID, np.ndarray, float]]) -> list[tuple[UUID, dict | None, list]]:
+    """Feature columns and peak fingerprints per sample id; None columns where they cannot be computed."""
+    results = []
+    for sample_id, vibration, sample_rate_hz in signals:
+        try:
+            columns = compute_feature_columns(vibration, sample_rate_hz)
+            peaks = compute_fingerprints(vibration, sample_rate_hz)
+        except Exception:
+            results.append((sample_id, None, []))
+            continue
+        results.append((sample_id, columns, peaks))
+    return results
+
+
+def _load_checkpoint(path: Path) -> dict | None:
+    try:
+        checkpoint = json.loads(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+    if checkpoint.get("fingerprint") != FEATURE_SET_FINGERPRINT:
+        return None  # Written for another feature set
+    return checkpoint
+
+
+def _save_checkpoint(path: Path, checkpoint: dict) -> None:
+    """Write atomically, so an interrupted write never loses the previous checkpoint."""
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(checkpoint))
+    os.replace(tmp, path)
+
+
+def _stale_filters(recompute_all: bool) -> list:
+    filters = [Sample.status == "processed", Sample.validated.is_(True)]
+    if not recompute_all:
+        filters.append(or_(
+            Sample.feature_set_fingerprint.is_(None),
+            Sample.feature_set_fingerprint != FEATURE_SET_FINGERPRINT,
+        ))
+    return filters
+
+
+async def _read_chunk(filters: list, after: UUID | None, batch_size: int) -> list:
+    async with async_session_maker() as session:
+        query = (
+            select(Sample.id, Sample.vibration, Sample.sample_rate_hz)
+            .where(*filters)
+            .order_by(Sample.id)
+            .limit(batch_size)
+        )
+        if after is not None:
+            query = query.where(Sample.id > after)
+        return [tuple(row) for row in (await session.execute(query)).all()]
+
+
+async def _compute_chunk(pool: CPUPool, rows: list) -> list[tuple[UUID, dict | None, list]]:
+    """Spread one chunk over the pool, a few tasks per worker."""
+    per_task = max(1, math.ceil(len(rows) / (pool.max_workers * 2)))
+    tasks = [pool.run(_compute_batch, rows[i:i + per_task]) for i in range(0, len(rows), per_task)]
+    return [result for batch in await asyncio.gather(*tasks) for result in batch]
+
+
+async def backfill(batch_size: int, workers: int, checkpoint_path: Path, restart: bool, recompute_all: bool) -> None:
+    await init_db()
+    async with engine.connect() as conn:
+        legacy_guids = await conn.run_sync(legacy_guid_columns)
+    if legacy_guids:
+        # Updates by id would match nothing until the ids are converted
+        print("❌ Sample ids are still CHAR(32); run `python -m api.commands.migrate_guids` first")
+        await close_db()
+        raise SystemExit(1)
+
+    checkpoint = None if restart else _load_checkpoint(checkpoint_path)
+    if checkpoint is None:
+        checkpoint = {"fingerprint": FEATURE_SET_FINGERPRINT, "last_id": None, "scanned": 0, "updated": 0, "failed": 0}
+    else:
+        print(f"⏩ Resuming after sample {checkpoint['last_id']} ({checkpoint['scanned']} already done)")
+    checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+
+    filters = _stale_filters(recompute_all)
+    last_id = UUID(checkpoint["last_id"]) if checkpoint["last_id"] else None
+    async with async_session_maker() as session:
+        remaining_query = select(func.count(Sample.id)).where(*filters)
+        if last_id is not None:
+            remaining_query = remaining_query.where(Sample.id > last_id)
+        remaining = await session.scalar(remaining_query) or 0
+    print(f"🔎 {remaining} samples to backfill with feature set {FEATURE_SET_FINGERPRINT}")
+
+    pool = CPUPool("backfill", "process", workers)
+    started = time.perf_counter()
+    done = 0
+    try:
+        rows = await _read_chunk(filters, last_id, batch_size)
+        while rows:
+            # Read the next chunk while this one is being computed
+            computing = asyncio.ensure_future(_compute_chunk(pool, rows))
+            next_rows = await _read_chunk(filters, rows[-1][0], batch_size)
+            results = await computing
+
+            updates = [{"id": sample_id, **columns} for sample_id, columns, _ in results if columns is not None]
+            if updates:
+                async with async_session_maker() as session:
+                    await session.execute(update(Sample), updates)
+                    await replace_fingerprints(
+                        session,
+                        {sample_id: peaks for sample_id, columns, peaks in results if columns is not None},
+                    )
+                    await session.commit()
+
+            done += len(rows)
+            checkpoint["last_id"] = rows[-1][0].hex
+            checkpoint["scanned"] += len(rows)
+            checkpoint["updated"] += len(updates)
+            checkpoint["failed"] += len(rows) - len(updates)
+            _save_checkpoint(checkpoint_path, checkpoint)
+
+            elapsed = time.perf_counter() - started
+            rate = done / elapsed
+            eta = (remaining - done) / rate if rate > 0 else 0.0
+            print(
+                f"🔄 {done}/{remaining} backfilled ({done / max(remaining, 1):.0%}), "
+                f"{rate:.0f} samples/s, ETA {eta:.0f}s"
+            )
+            rows = next_rows
+    finally:
+        pool.shutdown()
+        await close_db()
+
+    print(
+        f"✅ Done: {checkpoint['updated']} updated, {checkpoint['failed']} failed "
+        f"of {checkpoint['scanned']} samples"
+    )
+    checkpoint_path.unlink(missing_ok=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=200, help="Samples per chunk and UPDATE")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Feature processes")
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        default=Path("./data/backfill-features.json"),
+        help="Progress file used to resume an interrupted run",
+    )
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    parser.add_argument("--all", action="store_true", help="Recompute samples that are already current")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.batch_size, args.workers, args.checkpoint, args.restart, args.all))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Migrate GUID Columns to Native UUID Storage
+
+Converts the id and foreign-key columns that earlier releases stored as
+CHAR(32) hex text to the compact storage GUID now uses: PostgreSQL's
+native uuid type, and 16 raw bytes on SQLite.
+
+On PostgreSQL the column types are changed in one transaction, dropping
+the foreign keys between them first and re-creating them afterwards;
+indexes are rebuilt by the type change.
+
+On SQLite the values are rewritten in place, in batches and newest rows
+first (the column types declared by the old schema remain, which SQLite
+does not enforce), and PRAGMA user_version records that the run
+finished. Safe to interrupt and re-run: converted values are skipped.
+Pass --vacuum to reclaim the freed space and repack the indexes.
+
+Stop the API while migrating: it reads and writes only the new format,
+and refuses to start until the migration has finished.
+
+Usage:
+    python -m api.commands.migrate_guids [--batch-size 5000] [--vacuum]
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import inspect, text
+from sqlalchemy.types import Uuid
+
+from api.core.database import GUID, SQLITE_GUIDS_MIGRATED_VERSION, Base, close_db, engine, init_db
+from api.models.contributor import Contributor  # noqa: F401
+from api.models.fingerprint import SampleFingerprint  # noqa: F401
+from api.models.sample import Sample  # noqa: F401
+
+
+def _guid_columns() -> dict[str, list[str]]:
+    """GUID column names by table."""
+    columns = {}
+    for table in Base.metadata.sorted_tables:
+        names = [column.name for column in table.columns if isinstance(column.type, GUID)]
+        if names:
+            columns[table.name] = names
+    return columns
+
+
+def _migrate_postgresql(sync_conn) -> int:
+    """Change every text GUID column to uuid; returns columns converted."""
+    inspector = inspect(sync_conn)
+    pending = {
+        (table, column["name"])
+        for table, names in _guid_columns().items()
+        for column in inspector.get_columns(table)
+        if column["name"] in names and not isinstance(column["type"], Uuid)
+    }
+    if not pending:
+        return 0
+
+    # Both ends of a foreign key must have the same type at all times
+    foreign_keys = []
+    for table in _guid_columns():
+        for fk in inspector.get_foreign_keys(table):
+            ends = {(table, c) for c in fk["constrained_columns"]} | {
+                (fk["referred_table"], c) for c in fk["referred_columns"]
+            }
+            if ends & pending:
+                foreign_keys.append((table, fk))
+                sync_conn.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT "{fk["name"]}"'))
+
+    for table, column in sorted(pending):
+        sync_conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE uuid USING {column}::uuid"))
+        print(f"🔄 Converted {table}.{column} to uuid")
+
+    for table, fk in foreign_keys:
+        ondelete = fk.get("options", {}).get("ondelete")
+        sync_conn.execute(text(
+            f'ALTER TABLE {table} ADD CONSTRAINT "{fk["name"]}" '
+            f'FOREIGN KEY ({", ".join(fk["constrained_columns"])}) '
+            f'REFERENCES {fk["referred_table"]} ({", ".join(fk["referred_columns"])})'
+            + (f" ON DELETE {ondelete}" if ondelete else "")
+        ))
+    return len(pending)
+
+
+async def _migrate_sqlite_table(table: str, columns: list[str], batch_size: int) -> int:
+    """Rewrite a table's hex GUIDs as 16-byte blobs; returns rows converted."""
+    select_sql = text(
+        f"SELECT rowid, {', '.join(columns)} FROM {table} "
+        f"WHERE rowid < :before ORDER BY rowid DESC LIMIT :limit"
+    )
+    update_sql = text(
+        f"UPDATE {table} SET {', '.join(f'{c} = :{c}' for c in columns)} WHERE rowid = :rowid"
+    )
+    before = (1 << 63) - 1
+    scanned = converted = 0
+    started = time.perf_counter()
+
+    while True:
+        async with engine.begin() as conn:
+            rows = (await conn.execute(select_sql, {"before": before, "limit": batch_size})).all()
+            if not rows:
+                break
+            before = rows[-1][0]
+            updates = []
+            for rowid, *values in rows:
+                if not any(isinstance(value, str) for value in values):
+                    continue
+                update = {"rowid": rowid}
+                for column, value in zip(columns, values):
+                    update[column] = bytes.fromhex(value.replace("-", "")) if isinstance(value, str) else value
+                updates.append(update)
+            if updates:
+                await conn.execute(update_sql, updates)
+
+        scanned += len(rows)
+        converted += len(updates)
+        elapsed = time.perf_counter() - started
+        print(f"🔄 {table}: {scanned} scanned, {converted} converted ({scanned / elapsed:.0f} rows/s)")
+    return converted
+
+
+async def migrate(batch_size: int, vacuum: bool) -> None:
+    await init_db()
+
+    if engine.dialect.name == "postgresql":
+        async with engine.begin() as conn:
+            converted = await conn.run_sync(_migrate_postgresql)
+        print(f"✅ Done: {converted} columns converted to uuid")
+    elif engine.dialect.name == "sqlite":
+        converted = 0
+        for table, columns in _guid_columns().items():
+            converted += await _migrate_sqlite_table(table, columns, batch_size)
+        # Only now is every row binary; an interrupted run leaves the marker unset
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql(f"PRAGMA user_version = {SQLITE_GUIDS_MIGRATED_VERSION}")
+        print(f"✅ Done: {converted} rows converted to binary GUIDs")
+        if vacuum:
+            # VACUUM can't run in a transaction, so bypass the engine's BEGIN
+            async with engine.connect() as conn:
+                raw = await conn.get_raw_connection()
+                await raw.driver_connection.execute("VACUUM")
+            print("🧹 Vacuumed database")
+    else:
+        print(f"⚠️  Nothing to do for {engine.dialect.name}")
+
+    await close_db()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per transaction (SQLite)")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM afterwards to reclaim space (SQLite)")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.batch_size, args.vacuum))
+
+
+if __name__ == "__main__":
+    main()
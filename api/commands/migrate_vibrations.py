@@ -0,0 +1,112 @@
+"""
+Migrate Stored Vibrations to Binary Storage
+
+Re-encodes samples whose vibration is still legacy JSON text with the
+configured storage codec (VIBRATION_CODEC), and fills in the persisted
+vibration_length / duration_seconds columns for rows that predate them.
+Safe to interrupt and re-run: rows already migrated are skipped.
+
+On PostgreSQL the column type is first changed from json to bytea, which
+rewrites the table under an exclusive lock, so stop the API meanwhile (it
+refuses to start until this is done); the rows are then shrunk in batches.
+
+Rows are matched by their id exactly as stored, so this runs the same
+before or after `migrate_guids` converts the ids.
+
+Usage:
+    python -m api.commands.migrate_vibrations [--batch-size 500]
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import LargeBinary, bindparam, select, text, type_coerce, update
+from sqlalchemy.types import NullType
+
+from api.core.database import async_session_maker, close_db, engine, init_db, legacy_vibration_columns
+from api.core.vibration_codec import decode_vibration, is_encoded
+from api.models.contributor import Contributor  # noqa: F401
+from api.models.sample import Sample
+
+
+def _convert_columns(sync_conn) -> None:
+    """Change PostgreSQL json vibration columns to bytea, keeping the JSON text as bytes."""
+    for qualified in legacy_vibration_columns(sync_conn):
+        table, column = qualified.split(".")
+        sync_conn.execute(text(
+            f"ALTER TABLE {table} ALTER COLUMN {column} TYPE bytea "
+            f"USING convert_to({column}::text, 'UTF8')"
+        ))
+        print(f"🔄 Converted {qualified} to binary storage")
+
+
+async def migrate(batch_size: int) -> None:
+    await init_db()
+    async with engine.begin() as conn:
+        await conn.run_sync(_convert_columns)
+
+    # Read the stored value as-is so legacy rows can be told apart
+    raw_vibration = type_coerce(Sample.vibration, LargeBinary)
+    # Ids too: legacy CHAR(32) hex or 16-byte binary, whichever is stored
+    raw_id = type_coerce(Sample.id, NullType())
+    update_row = (
+        update(Sample.__table__)
+        .where(raw_id == bindparam("raw_id", type_=NullType()))
+        .values(
+            vibration=bindparam("new_vibration"),
+            vibration_length=bindparam("new_vibration_length"),
+            duration_seconds=bindparam("new_duration_seconds"),
+        )
+    )
+    last_id = None
+    scanned = converted = 0
+    started = time.perf_counter()
+
+    while True:
+        async with async_session_maker() as session:
+            query = (
+                select(raw_id, raw_vibration, Sample.sample_rate_hz, Sample.vibration_length)
+                .order_by(raw_id)
+                .limit(batch_size)
+            )
+            if last_id is not None:
+                query = query.where(raw_id > bindparam("last_id", last_id, type_=NullType()))
+            rows = (await session.execute(query)).all()
+            if not rows:
+                break
+
+            last_id = rows[-1][0]
+            updates = []
+            for sample_id, value, sample_rate_hz, vibration_length in rows:
+                if is_encoded(value) and vibration_length is not None:
+                    continue
+                vibration = decode_vibration(value)
+                updates.append({
+                    "raw_id": sample_id,
+                    "new_vibration": vibration,
+                    "new_vibration_length": len(vibration),
+                    "new_duration_seconds": len(vibration) / sample_rate_hz if sample_rate_hz > 0 else 0.0,
+                })
+            if updates:
+                await session.execute(update_row, updates)
+                await session.commit()
+
+        scanned += len(rows)
+        converted += len(updates)
+        elapsed = time.perf_counter() - started
+        print(f"🔄 {scanned} scanned, {converted} converted ({scanned / elapsed:.0f} rows/s)")
+
+    print(f"✅ Done: {converted} of {scanned} samples migrated")
+    await close_db()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per transaction")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
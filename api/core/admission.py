@@ -0,0 +1,166 @@
+"""
+Admission Control for ResonanceDB API
+
+Bounds concurrent CPU-heavy requests (feature extraction, prediction).
+Requests beyond the concurrency limit wait in a bounded queue for up to
+a configured time; anything beyond that is shed immediately with a 503
+and a Retry-After estimated from how fast the queue is draining.
+
+The hourly slowapi limits protect against single abusive clients; this
+protects the worker as a whole against bursts. Handlers take a slot with
+`cpu_slot()` right around their CPU-bound work, once the caller is
+authenticated and the body is read, so unauthenticated or slow uploads
+never hold one.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import HTTPException, status
+
+from .config import settings
+
+
+class AdmissionController:
+    """Concurrency limiter with a bounded wait queue and load shedding."""
+
+    # Completions older than this are ignored when estimating drain rate
+    DRAIN_WINDOW_SECONDS = 30.0
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, max_wait_seconds: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self._semaphore: asyncio.Semaphore | None = None
+        self._active = 0
+        self._waiting = 0
+        self._admitted = 0
+        self._queued = 0
+        self._shed = 0
+        self._completions: deque[float] = deque()
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    def drain_rate(self) -> float:
+        """Completed requests per second over the recent window."""
+        cutoff = time.monotonic() - self.DRAIN_WINDOW_SECONDS
+        while self._completions and self._completions[0] < cutoff:
+            self._completions.popleft()
+        return len(self._completions) / self.DRAIN_WINDOW_SECONDS
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue is expected to have drained."""
+        rate = self.drain_rate()
+        if rate <= 0:
+            return max(1, math.ceil(self.max_wait_seconds))
+        return min(60, max(1, math.ceil((self._waiting + 1) / rate)))
+
+    def _reject(self) -> HTTPException:
+        self._shed += 1
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is at capacity, please retry later",
+            headers={"Retry-After": str(self.retry_after())},
+        )
+
+    async def acquire(self) -> None:
+        """
+        Wait for a slot.
+
+        Raises:
+            HTTPException 503: If the queue is full or the wait timed out
+        """
+        semaphore = self.semaphore
+        if semaphore.locked():
+            if self._waiting >= self.max_queue:
+                raise self._reject()
+
+            self._queued += 1
+            self._waiting += 1
+            try:
+                acquired = await self._wait_for(semaphore)
+            finally:
+                self._waiting -= 1
+            if not acquired:
+                raise self._reject()
+        else:
+            await semaphore.acquire()
+
+        self._admitted += 1
+        self._active += 1
+
+    async def _wait_for(self, semaphore: asyncio.Semaphore) -> bool:
+        """
+        Wait up to max_wait_seconds for a permit; True if one was taken.
+
+        Not asyncio.wait_for: on Python 3.11 it can time out just after the
+        permit was granted, losing it for good.
+        """
+        waiter = asyncio.ensure_future(semaphore.acquire())
+        try:
+            await asyncio.wait({waiter}, timeout=self.max_wait_seconds)
+        except asyncio.CancelledError:
+            self._abandon(waiter, semaphore)
+            raise
+        if not waiter.done():
+            self._abandon(waiter, semaphore)
+            return False
+        return True
+
+    @staticmethod
+    def _abandon(waiter: asyncio.Future, semaphore: asyncio.Semaphore) -> None:
+        """Stop waiting, giving back a permit granted meanwhile (or not yet delivered)."""
+        waiter.cancel()
+        waiter.add_done_callback(lambda w: w.cancelled() or w.exception() is not None or semaphore.release())
+
+    def release(self) -> None:
+        """Free a slot taken by `acquire()`."""
+        self._active -= 1
+        self._completions.append(time.monotonic())
+        self.semaphore.release()
+
+    def stats(self) -> dict:
+        """Counters for the metrics endpoint."""
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self._active,
+            "waiting": self._waiting,
+            "admitted": self._admitted,
+            "queued": self._queued,
+            "shed": self._shed,
+            "drain_rate_per_s": round(self.drain_rate(), 3),
+        }
+
+
+cpu_admission = AdmissionController(
+    "cpu",
+    max_concurrent=settings.ADMISSION_MAX_CONCURRENT,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    max_wait_seconds=settings.ADMISSION_MAX_WAIT_SECONDS,
+)
+
+
+@asynccontextmanager
+async def cpu_slot() -> AsyncIterator[None]:
+    """
+    Hold a CPU admission slot for the enclosed work.
+
+    Usage:
+        async with cpu_slot():
+            features = await extract_features(...)
+    """
+    await cpu_admission.acquire()
+    try:
+        yield
+    finally:
+        cpu_admission.release()
@@ -0,0 +1,56 @@
+"""
+In-Process Caching for ResonanceDB API
+
+A small TTL cache for values that are expensive to compute and may be
+slightly stale, such as filtered row counts.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class TTLCache:
+    """
+    Bounded mapping whose entries expire after a fixed time.
+
+    Least recently set entries are evicted first when the cache is full.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a live entry, or default if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the oldest entry if the cache is full."""
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def replace(self, key: Hashable, value: Any) -> bool:
+        """Update a live entry's value, keeping its expiry; False if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return False
+        self._entries[key] = (entry[0], value)
+        return True
+
+    def invalidate(self, key: Hashable | None = None) -> None:
+        """Drop one entry, or everything when no key is given."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
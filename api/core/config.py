@@ -24,6 +24,66 @@ class Settings(BaseSettings):
         default="sqlite+aiosqlite:///./resonancedb.db",
         description="Async database connection string"
     )
+    DATABASE_READ_URL: str | None = Field(
+        default=None,
+        description="Comma-separated read replica connection strings for GET requests (default: primary only)",
+    )
+    REPLICA_MAX_LAG_SECONDS: float = Field(
+        default=5.0,
+        description="Replicas further behind the primary than this are skipped",
+    )
+    REPLICA_CHECK_SECONDS: float = Field(
+        default=5.0,
+        description="How often each replica's health and lag are rechecked",
+    )
+    
+    # Connection pools (per worker and engine; the primary and each replica have one)
+    DB_POOL_SIZE: int = Field(
+        default=10,
+        description="Connections kept open to PostgreSQL",
+    )
+    DB_MAX_OVERFLOW: int = Field(
+        default=20,
+        description="Extra PostgreSQL connections opened under load and closed when returned",
+    )
+    DB_POOL_TIMEOUT: float = Field(
+        default=30.0,
+        description="Seconds to wait for a free connection before the request fails",
+    )
+    DB_POOL_RECYCLE: int = Field(
+        default=1800,
+        description="Reconnect connections older than this many seconds (-1: never)",
+    )
+    DB_STATEMENT_CACHE_SIZE: int = Field(
+        default=100,
+        description="Prepared statements cached per asyncpg connection (0 behind PgBouncer in transaction mode)",
+    )
+    
+    # SQLite (applied to every connection when DATABASE_URL is SQLite)
+    SQLITE_JOURNAL_MODE: str = Field(
+        default="WAL",
+        description="Journal mode; WAL lets readers run alongside the writer",
+    )
+    SQLITE_SYNCHRONOUS: str = Field(
+        default="NORMAL",
+        description="fsync policy; NORMAL is durable against crashes of the process in WAL mode",
+    )
+    SQLITE_BUSY_TIMEOUT_MS: int = Field(
+        default=5000,
+        description="How long a connection waits for another process's lock before failing",
+    )
+    SQLITE_MMAP_SIZE_MB: int = Field(
+        default=256,
+        description="Bytes of the database file read through mmap, in MB (0 disables)",
+    )
+    SQLITE_CACHE_SIZE_MB: int = Field(
+        default=64,
+        description="Page cache per connection, in MB",
+    )
+    SQLITE_READ_POOL_SIZE: int = Field(
+        default=4,
+        description="Read-only connections per worker; writes share a single connection",
+    )
     
     # Security
     API_KEY_SECRET: str = Field(
@@ -44,16 +104,166 @@ class Settings(BaseSettings):
     AWS_ACCESS_KEY_ID: str | None = None
     AWS_SECRET_ACCESS_KEY: str | None = None
     
+    # Vibration storage (see api/core/vibration_codec.py)
+    VIBRATION_CODEC: str = Field(
+        default="float32",
+        description="Codec for stored vibrations: 'float64' (lossless), 'float32' or 'int16-delta'",
+    )
+    VIBRATION_COMPRESSION_LEVEL: int = Field(
+        default=6,
+        description="zlib level for stored vibrations (0 disables compression)",
+    )
+    
+    # Sample submission
+    SAMPLES_BULK_MAX_ITEMS: int = Field(
+        default=2000,
+        description="Most samples accepted by one POST /samples/bulk request",
+    )
+    INGEST_MODE: str = Field(
+        default="direct",
+        description="'direct' commits each sample in its request; 'buffered' journals it and commits in groups",
+    )
+    INGEST_JOURNAL_DIR: str = Field(
+        default="./data/ingest-journal",
+        description="Local directory for the buffered-ingest journal (must be on persistent storage)",
+    )
+    INGEST_FLUSH_ROWS: int = Field(
+        default=200,
+        description="Buffered ingest commits once this many samples are queued...",
+    )
+    INGEST_FLUSH_MS: float = Field(
+        default=50.0,
+        description="...or this many milliseconds after the first one was, whichever is sooner",
+    )
+    INGEST_MAX_PENDING: int = Field(
+        default=10_000,
+        description="Samples allowed to wait for a commit before new ones get a 503",
+    )
+    
+    # Feature extraction at ingest
+    FEATURE_EXTRACTION_MODE: str = Field(
+        default="inline",
+        description="'inline' computes features before responding; 'background' stores samples as pending for the job queue",
+    )
+    JOB_WORKERS: int = Field(
+        default=2,
+        description="Feature-extraction job consumers per worker process",
+    )
+    JOB_MAX_ATTEMPTS: int = Field(
+        default=3,
+        description="Attempts before a job is dead-lettered and its sample marked failed",
+    )
+    JOB_RETRY_BASE_SECONDS: float = Field(
+        default=1.0,
+        description="Delay before the first retry; doubles on each further attempt",
+    )
+    
+    # Sample listing
+    SAMPLE_COUNT_CACHE_SECONDS: float = Field(
+        default=30.0,
+        description="How long filtered sample counts are reused between pages",
+    )
+    
+    # Public statistics (/api/v1/stats)
+    STATS_CACHE_SECONDS: float = Field(
+        default=5.0,
+        description="How long a worker reuses its snapshot of the stats counters",
+    )
+    STATS_RECONCILE_SECONDS: float = Field(
+        default=300.0,
+        description="Interval between reconciling the counters against COUNT queries",
+    )
+    
+    # Contributor leaderboard
+    LEADERBOARD_CACHE_SECONDS: float = Field(
+        default=10.0,
+        description="Longest the cached top-N leaderboard is served before it is reloaded",
+    )
+    LEADERBOARD_REFRESH_SECONDS: float = Field(
+        default=60.0,
+        description="Interval between rebuilding rank scores from the database",
+    )
+    
+    # Similarity search (POST /api/v1/samples/similar)
+    SIMILARITY_SNAPSHOT_PATH: str = Field(
+        default="./data/similarity-index.npz",
+        description="Where the in-memory similarity index is snapshotted for fast restarts",
+    )
+    SIMILARITY_SYNC_SECONDS: float = Field(
+        default=30.0,
+        description="Interval between indexing samples stored by other workers and saving the snapshot",
+    )
+    SIMILARITY_REBUILD_SECONDS: float = Field(
+        default=3600.0,
+        description="Longest interval between full rebuilds of the index from the database",
+    )
+    SIMILARITY_IVF_MIN_ROWS: int = Field(
+        default=20_000,
+        description="Index size from which queries use approximate IVF search instead of brute force",
+    )
+    SIMILARITY_IVF_NPROBE: int = Field(
+        default=8,
+        description="IVF cells scanned per query; higher is more accurate and slower",
+    )
+    
     # Models
     DEFAULT_MODEL_PATH: str = "models/material_model.pkl"
     
+    # CPU executors (feature extraction and inference run off the event loop)
+    CPU_THREAD_POOL_SIZE: int = Field(
+        default=4,
+        description="Threads for GIL-releasing work such as model inference",
+    )
+    CPU_PROCESS_POOL_SIZE: int = Field(
+        default=2,
+        description="Worker processes for feature extraction (0 disables the process pool)",
+    )
+    FEATURE_EXECUTOR: str = Field(
+        default="process",
+        description="Pool used for feature extraction: 'process' or 'thread'",
+    )
+    SHARED_MEMORY_RING_MB: int = Field(
+        default=64,
+        description="Shared-memory ring for handing signals to worker processes (0 pickles them instead)",
+    )
+    
+    # Authentication
+    IDENTITY_CACHE_SECONDS: float = Field(
+        default=60.0,
+        description="How long an API key's resolved identity is cached (shared via Redis if configured)",
+    )
+    
+    # Admission control for CPU-heavy endpoints (predict, sample submission)
+    ADMISSION_MAX_CONCURRENT: int = Field(
+        default=8,
+        description="CPU-heavy requests processed concurrently per worker",
+    )
+    ADMISSION_MAX_QUEUE: int = Field(
+        default=32,
+        description="Requests allowed to wait for a slot before new ones are shed",
+    )
+    ADMISSION_MAX_WAIT_SECONDS: float = Field(
+        default=5.0,
+        description="Longest a queued request waits before it is shed with a 503",
+    )
+    
+    # Streaming prediction (WebSocket)
+    STREAM_DEFAULT_WINDOW: int = Field(
+        default=2048,
+        description="Default samples per prediction window",
+    )
+    STREAM_MAX_PENDING_WINDOWS: int = Field(
+        default=4,
+        description="Windows queued per connection before the server stops reading frames",
+    )
+    
     # CORS
     CORS_ORIGINS: list[str] = ["http://localhost:3000", "http://localhost:3001", "http://localhost:8000"]
     
-    # Redis (for rate limiting in production)
+    # Redis (for rate limiting and shared counters in production)
     REDIS_URL: str | None = Field(
         default=None,
-        description="Redis URL for rate limiting (e.g., redis://localhost:6379). If not set, uses in-memory storage."
+        description="Redis URL for rate limiting and shared counters (e.g., redis://localhost:6379). If not set, uses in-memory storage."
     )
     
     class Config:
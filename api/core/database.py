@@ -2,42 +2,181 @@
 Async Database Configuration for ResonanceDB API
 
 Uses SQLAlchemy 2.0 async engine with asyncpg driver for PostgreSQL.
+
+Writes go to the primary (DATABASE_URL). Reads can be served by optional
+replicas (DATABASE_READ_URL) in read-only transactions; a replica that
+lags by more than REPLICA_MAX_LAG_SECONDS, or is unreachable, is skipped
+and reads fall back to the primary.
+
+On SQLite every connection is tuned on connect (WAL, synchronous,
+busy_timeout, mmap and cache size; see the SQLITE_* settings). Writes in
+a worker share one connection, so they queue in the pool instead of
+fighting over the database lock, and reads use a separate pool of
+query-only connections that WAL lets run alongside the writer.
+
+Every pool records how long checkouts wait, how many connections are in
+use and how often it overflows, reported by `database_stats()`.
 """
 
 import asyncio
+import itertools
+import time
+from collections import deque
 import uuid
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy.types import TypeDecorator, CHAR
-from typing import AsyncGenerator
+from contextlib import asynccontextmanager
+import numpy as np
+from sqlalchemy import event, inspect, make_url, text
+from sqlalchemy.exc import InterfaceError, OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.schema import CreateColumn, CreateIndex
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.types import TypeDecorator, BINARY, JSON, LargeBinary, String, Uuid
+from starlette.requests import HTTPConnection
+from typing import AsyncGenerator, AsyncIterator
 
 from .config import settings
+from .vibration_codec import decode_vibration, encode_vibration
 
 
 # Portable UUID type that works with both SQLite and PostgreSQL
 class GUID(TypeDecorator):
-    """Platform-independent GUID type using CHAR(32) for storage."""
-    impl = CHAR
+    """
+    Platform-independent GUID type: PostgreSQL's native uuid, 16 raw bytes elsewhere.
+    
+    Databases created before this stored CHAR(32) hex; convert them with
+    `python -m api.commands.migrate_guids`. Legacy hex values still load,
+    but lookups only match converted rows.
+    """
+    impl = BINARY
     cache_ok = True
 
     def load_dialect_impl(self, dialect):
-        return dialect.type_descriptor(CHAR(32))
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(PG_UUID(as_uuid=True))
+        return dialect.type_descriptor(BINARY(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return value
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        return value if dialect.name == "postgresql" else value.bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        if isinstance(value, str):
+            return uuid.UUID(value)  # Legacy CHAR(32), not migrated yet
+        return uuid.UUID(bytes=value)
+
+    def result_processor(self, dialect, coltype):
+        if dialect.name == "postgresql":
+            return super().result_processor(dialect, coltype)
+        # Runs once per loaded id: skip the BINARY impl's own processor
+        process_result_value = self.process_result_value
+        return lambda value: process_result_value(value, dialect)
+
+
+class VibrationData(TypeDecorator):
+    """
+    Vibration array stored as a compressed binary blob.
+    
+    Accepts any array-like on write and always loads as a float64 ndarray.
+    Rows still holding legacy JSON text are decoded transparently.
+    """
+    impl = LargeBinary
+    cache_ok = True
 
     def process_bind_param(self, value, dialect):
         if value is not None:
-            return str(value).replace('-', '')
+            return encode_vibration(
+                value,
+                codec=settings.VIBRATION_CODEC,
+                level=settings.VIBRATION_COMPRESSION_LEVEL,
+            )
         return value
 
     def process_result_value(self, value, dialect):
         if value is not None:
-            return uuid.UUID(value)
+            return decode_vibration(value)
         return value
 
+    def compare_values(self, x, y):
+        # ndarray == ndarray is elementwise; the ORM needs a single bool
+        if x is None or y is None:
+            return x is y
+        return np.array_equal(x, y)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records checkout behaviour for sizing it from data.
+    
+    Waits are timed around the whole checkout, so they include a
+    pre-ping and opening a new connection when one is needed.
+    """
+    
+    # Checkout waits kept for percentiles
+    WAIT_WINDOW = 1024
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._waits: deque[float] = deque(maxlen=self.WAIT_WINDOW)
+        self._counts = {"checkouts": 0, "overflow_hits": 0, "timeouts": 0}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+    
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self._counts["timeouts"] += 1
+            raise
+        wait = time.perf_counter() - start
+        self._waits.append(wait)
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+        self._counts["checkouts"] += 1
+        return connection
+    
+    def _inc_overflow(self) -> bool:
+        # Called before opening a connection; positive overflow means past pool_size
+        opened = super()._inc_overflow()
+        if opened and self._overflow > 0:
+            self._counts["overflow_hits"] += 1
+        return opened
+    
+    def recreate(self) -> "InstrumentedPool":
+        # Keep the history when the engine is disposed
+        pool = super().recreate()
+        pool._waits, pool._counts = self._waits, self._counts
+        pool._wait_total, pool._wait_max = self._wait_total, self._wait_max
+        return pool
+    
+    def stats(self) -> dict:
+        """Current usage and checkout history for the metrics endpoint."""
+        waits = sorted(self._waits)
+        checkouts = self._counts["checkouts"]
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "in_use": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": max(0, self.overflow()),
+            **self._counts,
+            "wait_ms_avg": round(self._wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+            "wait_ms_p99": round(waits[int(len(waits) * 0.99)] * 1000, 3) if waits else 0.0,
+            "wait_ms_max": round(self._wait_max * 1000, 3),
+        }
+
 
 # Determine engine options based on database type
 is_sqlite = settings.DATABASE_URL.startswith("sqlite")
 
-# SQLite doesn't support pool_size settings
+# SQLite pools are sized per engine below
 engine_kwargs = {
     "echo": settings.DEBUG,
 }
@@ -45,13 +184,74 @@ engine_kwargs = {
 if not is_sqlite:
     # PostgreSQL-specific options
     engine_kwargs.update({
+        "poolclass": InstrumentedPool,
         "pool_pre_ping": True,
-        "pool_size": 10,
-        "max_overflow": 20,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
     })
+    if make_url(settings.DATABASE_URL).get_driver_name() == "asyncpg":
+        engine_kwargs["connect_args"] = {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+
+
+def _configure_sqlite(sqlite_engine: AsyncEngine, writer: bool) -> None:
+    """Apply the SQLITE_* pragmas to every new connection of an engine."""
+    pragmas = [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE_MB * 1024 * 1024}",
+        f"PRAGMA cache_size={-settings.SQLITE_CACHE_SIZE_MB * 1024}",  # Negative: KiB
+    ]
+    if not writer:
+        pragmas.append("PRAGMA query_only=ON")
 
-# Create async engine
-engine = create_async_engine(settings.DATABASE_URL, **engine_kwargs)
+    @event.listens_for(sqlite_engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+        if writer:
+            # Transactions are begun explicitly by _begin_immediate
+            dbapi_connection.isolation_level = None
+
+    if writer:
+        @event.listens_for(sqlite_engine.sync_engine, "begin")
+        def _begin_immediate(conn):
+            # Take the write lock up front: a deferred transaction that reads
+            # first fails with "database is locked" when it later writes while
+            # another process holds the lock, without waiting for busy_timeout
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+# In-memory databases exist per connection, so they keep one shared engine
+is_sqlite_file = is_sqlite and make_url(settings.DATABASE_URL).database not in (None, "", ":memory:")
+
+if is_sqlite_file:
+    # One writer connection per worker; the pool queues concurrent writers
+    engine = create_async_engine(
+        settings.DATABASE_URL,
+        poolclass=InstrumentedPool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        **engine_kwargs,
+    )
+    read_engine = create_async_engine(
+        settings.DATABASE_URL,
+        poolclass=InstrumentedPool,
+        pool_size=settings.SQLITE_READ_POOL_SIZE,
+        max_overflow=0,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        **engine_kwargs,
+    )
+    _configure_sqlite(engine, writer=True)
+    _configure_sqlite(read_engine, writer=False)
+else:
+    engine = create_async_engine(settings.DATABASE_URL, **engine_kwargs)
+    read_engine = engine
 
 # Session factory
 async_session_maker = async_sessionmaker(
@@ -63,20 +263,132 @@ async_session_maker = async_sessionmaker(
 )
 
 
-class Base(DeclarativeBase):
-    """Base class for all database models."""
-    pass
+class ReadOnlySession(Session):
+    """Session whose transactions are opened READ ONLY (PostgreSQL)."""
+
+
+@event.listens_for(ReadOnlySession, "after_begin")
+def _set_read_only(session, transaction, connection):
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+
+
+# Read session factory, bound per session to a replica or the primary
+read_session_maker = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=ReadOnlySession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
+# How far behind the primary a PostgreSQL replica is; 0 when fully replayed
+_REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+class ReplicaSet:
     """
-    Dependency that provides an async database session.
+    Round-robin over read replicas, skipping unhealthy or lagging ones.
     
-    Usage in FastAPI:
-        @app.get("/items")
-        async def get_items(db: AsyncSession = Depends(get_db)):
-            ...
+    Health is checked lazily, at most every REPLICA_CHECK_SECONDS per
+    replica, by whichever request next picks it.
     """
+    
+    def __init__(self, engines: list[AsyncEngine], max_lag_seconds: float, check_seconds: float):
+        self.engines = engines
+        self.max_lag_seconds = max_lag_seconds
+        self.check_seconds = check_seconds
+        self._cycle = itertools.cycle(range(len(engines)))
+        self._healthy = [True] * len(engines)
+        self._lag: list[float | None] = [None] * len(engines)
+        self._checked_at = [0.0] * len(engines)
+        self._fallbacks = 0
+    
+    async def _check(self, index: int) -> None:
+        engine = self.engines[index]
+        self._checked_at[index] = time.monotonic()
+        try:
+            async with engine.connect() as conn:
+                if engine.dialect.name == "postgresql":
+                    self._lag[index] = float(await conn.scalar(_REPLICA_LAG_SQL))
+                else:
+                    await conn.execute(text("SELECT 1"))
+                    self._lag[index] = 0.0
+            self._healthy[index] = self._lag[index] <= self.max_lag_seconds
+        except Exception as e:
+            self._healthy[index] = False
+            self._lag[index] = None
+            print(f"⚠️  Read replica {index} unavailable: {e}")
+    
+    async def pick(self) -> AsyncEngine | None:
+        """Next healthy replica, or None to read from the primary."""
+        for _ in range(len(self.engines)):
+            index = next(self._cycle)
+            if time.monotonic() - self._checked_at[index] >= self.check_seconds:
+                await self._check(index)
+            if self._healthy[index]:
+                return self.engines[index]
+        if self.engines:
+            self._fallbacks += 1
+        return None
+    
+    def mark_unhealthy(self, engine: AsyncEngine) -> None:
+        """Take a replica out of rotation until its next health check."""
+        if engine in self.engines:
+            index = self.engines.index(engine)
+            self._healthy[index] = False
+            self._checked_at[index] = time.monotonic()
+    
+    def stats(self) -> dict:
+        return {
+            "replicas": [
+                {"healthy": healthy, "lag_seconds": lag}
+                for healthy, lag in zip(self._healthy, self._lag)
+            ],
+            "primary_fallbacks": self._fallbacks,
+        }
+    
+    async def dispose(self) -> None:
+        for engine in self.engines:
+            await engine.dispose()
+
+
+replicas = ReplicaSet(
+    [
+        create_async_engine(url.strip(), **engine_kwargs)
+        for url in (settings.DATABASE_READ_URL or "").split(",")
+        if url.strip()
+    ],
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    check_seconds=settings.REPLICA_CHECK_SECONDS,
+)
+
+
+def _pool_stats(pool_engine: AsyncEngine) -> dict | None:
+    pool = pool_engine.pool
+    return pool.stats() if isinstance(pool, InstrumentedPool) else None
+
+
+def database_stats() -> dict:
+    """Replica health and connection pool usage, for /metrics."""
+    pools = {"primary": _pool_stats(engine)}
+    if read_engine is not engine:
+        pools["read"] = _pool_stats(read_engine)
+    for index, replica in enumerate(replicas.engines):
+        pools[f"replica_{index}"] = _pool_stats(replica)
+    return {**replicas.stats(), "pools": pools}
+
+
+class Base(DeclarativeBase):
+    """Base class for all database models."""
+    pass
+
+
+@asynccontextmanager
+async def write_session() -> AsyncIterator[AsyncSession]:
+    """Session on the primary, committed on success and rolled back on error."""
     async with async_session_maker() as session:
         try:
             yield session
@@ -88,6 +400,185 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+@asynccontextmanager
+async def read_session() -> AsyncIterator[AsyncSession]:
+    """
+    Read-only session on a healthy replica, or the primary if there is none.
+    
+    Never commits; the transaction is simply rolled back on close.
+    """
+    bind = await replicas.pick() or read_engine
+    async with read_session_maker(bind=bind) as session:
+        try:
+            yield session
+        except (OperationalError, InterfaceError):
+            replicas.mark_unhealthy(bind)
+            raise
+
+
+@asynccontextmanager
+async def primary_read_session() -> AsyncIterator[AsyncSession]:
+    """
+    Read-only session on the primary, for reads that must see the latest writes.
+    
+    Unlike `write_session`, it never takes SQLite's single writer connection.
+    """
+    async with read_session_maker(bind=read_engine) as session:
+        yield session
+
+
+async def get_write_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency that provides a primary (read-write) session."""
+    async with write_session() as session:
+        yield session
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency that provides a read-only session (replica if available)."""
+    async with read_session() as session:
+        yield session
+
+
+async def get_primary_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency that provides a read-only session on the primary."""
+    async with primary_read_session() as session:
+        yield session
+
+
+async def get_db(connection: HTTPConnection) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency that provides an async database session.
+    
+    GET and HEAD requests get a read-only session (see `get_read_db`);
+    everything else gets a primary session that commits on success.
+    
+    Usage in FastAPI:
+        @app.get("/items")
+        async def get_items(db: AsyncSession = Depends(get_db)):
+            ...
+    """
+    is_read = connection.scope.get("method") in ("GET", "HEAD")
+    async with (read_session() if is_read else write_session()) as session:
+        yield session
+
+
+def _upgrade_schema(sync_conn) -> None:
+    """
+    Bring tables created by an earlier release up to date with the models.
+    
+    ``create_all`` only creates missing tables, so new nullable (or
+    server-defaulted) columns are added here, which is cheap. New indexes
+    are added here on SQLite; PostgreSQL builds them concurrently
+    afterwards (`_create_indexes_concurrently`). Changes that rewrite a
+    table are left to the `api.commands` migrations.
+    """
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        
+        existing_columns = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            if not column.nullable and column.server_default is None:
+                print(f"⚠️  Cannot add NOT NULL column {table.name}.{column.name} without a server default")
+                continue
+            column_ddl = CreateColumn(column).compile(dialect=sync_conn.dialect)
+            sync_conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}"))
+            print(f"➕ Added column {table.name}.{column.name}")
+    
+    if sync_conn.dialect.name != "postgresql":
+        for index in _missing_indexes(sync_conn):
+            index.create(sync_conn)
+            print(f"➕ Added index {index.name}")
+
+
+def _missing_indexes(sync_conn) -> list:
+    """Model indexes not yet in the database, on tables that exist."""
+    inspector = inspect(sync_conn)
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        missing.extend(index for index in table.indexes if index.name not in existing_indexes)
+    return missing
+
+
+def _create_indexes_concurrently(sync_conn) -> None:
+    """Build missing indexes on PostgreSQL without blocking writes; needs an autocommit connection."""
+    for index in _missing_indexes(sync_conn):
+        # IF NOT EXISTS: another worker starting at the same time may be building it
+        ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=sync_conn.dialect))
+        sync_conn.execute(text(ddl.replace(" INDEX ", " INDEX CONCURRENTLY ", 1)))
+        print(f"➕ Added index {index.name}")
+
+
+def legacy_vibration_columns(sync_conn) -> list[str]:
+    """
+    Vibration columns (as "table.column") still declared JSON on PostgreSQL.
+    
+    `python -m api.commands.migrate_vibrations` changes them to bytea; a
+    full table rewrite, so it is not done at startup. SQLite stores either
+    format in the same column.
+    """
+    if sync_conn.dialect.name != "postgresql":
+        return []
+    inspector = inspect(sync_conn)
+    legacy = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing_types = {c["name"]: c["type"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if isinstance(column.type, VibrationData) and isinstance(existing_types.get(column.name), JSON):
+                legacy.append(f"{table.name}.{column.name}")
+    return legacy
+
+
+# PRAGMA user_version set by migrate_guids once every row of a SQLite
+# database created with CHAR(32) GUIDs is converted; SQLite keeps the
+# declared column types, so they alone can't tell
+SQLITE_GUIDS_MIGRATED_VERSION = 1
+
+
+def legacy_guid_columns(sync_conn) -> list[str]:
+    """
+    GUID columns (as "table.column") still holding hex text from before native UUID storage.
+    
+    Decided from the declared column types and the migration marker, so
+    the check costs no table scan.
+    """
+    if (
+        sync_conn.dialect.name == "sqlite"
+        and sync_conn.exec_driver_sql("PRAGMA user_version").scalar() >= SQLITE_GUIDS_MIGRATED_VERSION
+    ):
+        return []
+    inspector = inspect(sync_conn)
+    legacy = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing_types = {c["name"]: c["type"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if isinstance(column.type, GUID) and column.name in existing_types and _stores_legacy_guids(
+                sync_conn, existing_types[column.name]
+            ):
+                legacy.append(f"{table.name}.{column.name}")
+    return legacy
+
+
+def _stores_legacy_guids(sync_conn, existing_type) -> bool:
+    """Whether a GUID column's declared type predates native UUID storage."""
+    if sync_conn.dialect.name == "postgresql":
+        return not isinstance(existing_type, Uuid)
+    if sync_conn.dialect.name == "sqlite":
+        # Declared CHAR(32) by earlier releases; BINARY(16) reflects as NUMERIC
+        return isinstance(existing_type, String)
+    return False
+
+
 async def init_db(max_retries: int = 5, retry_delay: float = 2.0) -> None:
     """
     Create all database tables. Call on application startup.
@@ -98,6 +589,12 @@ async def init_db(max_retries: int = 5, retry_delay: float = 2.0) -> None:
         try:
             async with engine.begin() as conn:
                 await conn.run_sync(Base.metadata.create_all)
+                await conn.run_sync(_upgrade_schema)
+            if engine.dialect.name == "postgresql":
+                # CONCURRENTLY can't run inside a transaction block
+                async with engine.connect() as conn:
+                    await conn.execution_options(isolation_level="AUTOCOMMIT")
+                    await conn.run_sync(_create_indexes_concurrently)
             print("✅ Database initialized successfully")
             return
         except Exception as e:
@@ -110,6 +607,9 @@ async def init_db(max_retries: int = 5, retry_delay: float = 2.0) -> None:
 
 
 async def close_db() -> None:
-    """Dispose of the engine. Call on application shutdown."""
+    """Dispose of the engines. Call on application shutdown."""
+    await replicas.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
     await engine.dispose()
 
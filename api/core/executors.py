@@ -0,0 +1,187 @@
+"""
+CPU Executors for ResonanceDB API
+
+Runs CPU-bound feature extraction and inference off the event loop so that
+auth, database and health traffic stay responsive under heavy load.
+
+Two pools are provided:
+- a thread pool for work that releases the GIL (NumPy kernels, model inference)
+- a process pool for pure-Python-heavy work such as the feature pipeline
+"""
+
+import asyncio
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+
+import numpy as np
+
+from .config import settings
+from .shared_memory import SignalRing, run_on_shared_signal
+
+
+class CPUPool:
+    """
+    Lazily created executor with queue-depth accounting.
+
+    Tasks are counted from submission until completion; anything beyond the
+    number of workers is waiting in the executor's queue. A process pool
+    whose worker died is replaced, so only the calls it was running fail.
+    """
+
+    def __init__(self, name: str, kind: str, max_workers: int):
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._restarts = 0
+
+    @property
+    def executor(self) -> Executor:
+        """Get the underlying executor, creating it on first use."""
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    # spawn avoids forking a process that is running an event loop
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=f"cpu-{self.name}",
+                    )
+            return self._executor
+
+    def _replace(self, broken: Executor) -> None:
+        """Discard a broken executor; the next use creates a fresh one."""
+        with self._lock:
+            if self._executor is not broken:
+                return  # Another caller already replaced it
+            self._executor = None
+            self._restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, func: Callable[..., Any], /, *args, **kwargs) -> Any:
+        """Run func(*args, **kwargs) in this pool and await its result."""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        self._in_flight += 1
+        try:
+            for attempt in range(2):
+                executor = self.executor
+                try:
+                    result = await loop.run_in_executor(executor, call)
+                    break
+                except BrokenProcessPool:
+                    self._replace(executor)
+                    # Retry once: the pool may have broken before this call
+                    # reached a worker, e.g. because another task crashed it
+                    if attempt:
+                        raise
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+        self._completed += 1
+        return result
+
+    def stats(self) -> dict:
+        """Current pool usage for the metrics endpoint."""
+        return {
+            "kind": self.kind,
+            "workers": self.max_workers,
+            "in_flight": self._in_flight,
+            "queue_depth": max(0, self._in_flight - self.max_workers),
+            "completed": self._completed,
+            "failed": self._failed,
+            "restarts": self._restarts,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the executor, waiting for running tasks to finish."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+
+thread_pool = CPUPool("thread", "thread", settings.CPU_THREAD_POOL_SIZE)
+process_pool = CPUPool("process", "process", settings.CPU_PROCESS_POOL_SIZE)
+
+
+def feature_pool() -> CPUPool:
+    """Get the pool feature extraction should run in."""
+    if settings.FEATURE_EXECUTOR == "process" and settings.CPU_PROCESS_POOL_SIZE > 0:
+        return process_pool
+    return thread_pool
+
+
+# Shared-memory ring used to hand signals to the process pool
+_signal_ring: SignalRing | None = None
+_ring_stats = {"shared": 0, "pickled": 0}
+
+
+def _get_signal_ring() -> SignalRing | None:
+    global _signal_ring
+    if _signal_ring is None and settings.SHARED_MEMORY_RING_MB > 0:
+        _signal_ring = SignalRing(settings.SHARED_MEMORY_RING_MB * 1024 * 1024)
+    return _signal_ring
+
+
+async def run_on_signal(
+    func: Callable[[np.ndarray, float], Any],
+    signal: np.ndarray,
+    sample_rate_hz: float,
+) -> Any:
+    """
+    Run func(signal, sample_rate_hz) in the feature pool.
+
+    When that is the process pool, the signal goes through the shared-memory
+    ring and only a descriptor is pickled. Falls back to regular submission
+    if the ring is disabled or full.
+    """
+    pool = feature_pool()
+    ring = _get_signal_ring() if pool.kind == "process" else None
+    descriptor = ring.write(signal, sample_rate_hz) if ring is not None else None
+
+    if descriptor is None:
+        _ring_stats["pickled"] += 1
+        return await pool.run(func, signal, sample_rate_hz)
+
+    _ring_stats["shared"] += 1
+    task = asyncio.ensure_future(pool.run(run_on_shared_signal, descriptor, func))
+    try:
+        # Shielded so a cancelled request can't free memory a worker still reads
+        return await asyncio.shield(task)
+    finally:
+        if task.done():
+            ring.release(descriptor)
+        else:
+            task.add_done_callback(lambda _: ring.release(descriptor))
+
+
+def executor_stats() -> dict:
+    """Usage of all CPU pools, keyed by pool name."""
+    stats = {pool.name: pool.stats() for pool in (thread_pool, process_pool)}
+    stats["signal_handoff"] = dict(_ring_stats)
+    return stats
+
+
+def shutdown_executors() -> None:
+    """Shut down all CPU pools. Call on application shutdown."""
+    global _signal_ring
+    thread_pool.shutdown()
+    process_pool.shutdown()
+    if _signal_ring is not None:
+        _signal_ring.close()
+        _signal_ring = None
@@ -0,0 +1,129 @@
+"""
+Binary Vibration Payloads for ResonanceDB API
+
+Decodes raw little-endian sample buffers straight into NumPy arrays, with
+no per-element Python objects.
+
+Used by the WebSocket stream and by the `application/octet-stream` form of
+the sample and prediction uploads.
+"""
+
+import json
+
+import numpy as np
+from pydantic import BaseModel
+
+# Wire dtype name -> little-endian NumPy dtype
+SAMPLE_DTYPES = {
+    "float32": np.dtype("<f4"),
+    "float64": np.dtype("<f8"),
+    "int16": np.dtype("<i2"),
+}
+
+
+def decode_samples(data: bytes | memoryview, dtype: str, scale: float | None = None) -> np.ndarray:
+    """
+    Decode a raw sample buffer to a float64 array.
+
+    Args:
+        data: Little-endian samples, back to back
+        dtype: One of SAMPLE_DTYPES
+        scale: Multiplier applied to the raw values (e.g. g per ADC count
+            for int16); defaults to 1
+
+    Raises:
+        ValueError: If the dtype is unknown or the buffer length is not a
+            whole number of samples
+    """
+    wire_dtype = SAMPLE_DTYPES.get(dtype) if isinstance(dtype, str) else None
+    if wire_dtype is None:
+        raise ValueError(f"dtype must be one of: {', '.join(SAMPLE_DTYPES)}")
+    if len(data) % wire_dtype.itemsize:
+        raise ValueError(f"payload length {len(data)} is not a multiple of {wire_dtype.itemsize} bytes")
+
+    samples = np.frombuffer(data, dtype=wire_dtype).astype(np.float64)
+    if scale is not None and scale != 1:
+        samples *= scale
+    return samples
+
+
+# Limits shared by JSON and binary uploads
+MIN_VIBRATION_SAMPLES = 10
+MAX_VIBRATION_SAMPLES = 100_000
+
+# Binary body layout: uint32 LE header length, JSON header, raw samples
+_HEADER_LENGTH_BYTES = 4
+_MAX_HEADER_BYTES = 64 * 1024
+
+
+def validate_vibration_array(vibration: np.ndarray) -> np.ndarray:
+    """Apply the same checks as the JSON `vibration` field to a decoded array."""
+    if len(vibration) < MIN_VIBRATION_SAMPLES:
+        raise ValueError(f"vibration must have at least {MIN_VIBRATION_SAMPLES} samples")
+    if len(vibration) > MAX_VIBRATION_SAMPLES:
+        raise ValueError("vibration array too large (max 100,000 samples)")
+    if not np.isfinite(vibration).all():
+        raise ValueError("vibration must contain only finite numbers")
+    return vibration
+
+
+def parse_binary_body(body: bytes) -> tuple[dict, np.ndarray]:
+    """
+    Split an `application/octet-stream` upload into metadata and samples.
+
+    Layout:
+        4 bytes   little-endian uint32 N, the header length
+        N bytes   UTF-8 JSON header: request metadata (e.g. sample_rate_hz,
+                  material) plus `dtype` (float32, float64, int16; default
+                  float32) and optional `scale`
+        rest      raw little-endian samples
+
+    Returns:
+        Tuple of (header fields without dtype/scale, float64 samples)
+
+    Raises:
+        ValueError: If the body is malformed
+    """
+    if len(body) < _HEADER_LENGTH_BYTES:
+        raise ValueError("body too short for header length")
+    header_length = int.from_bytes(body[:_HEADER_LENGTH_BYTES], "little")
+    if header_length > _MAX_HEADER_BYTES or _HEADER_LENGTH_BYTES + header_length > len(body):
+        raise ValueError("invalid header length")
+
+    header_end = _HEADER_LENGTH_BYTES + header_length
+    try:
+        header = json.loads(body[_HEADER_LENGTH_BYTES:header_end])
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"header is not valid JSON: {e}")
+    if not isinstance(header, dict):
+        raise ValueError("header must be a JSON object")
+
+    dtype = header.pop("dtype", "float32")
+    scale = header.pop("scale", None)
+    if scale is not None and (isinstance(scale, bool) or not isinstance(scale, (int, float))):
+        raise ValueError("scale must be a number")
+    samples = decode_samples(memoryview(body)[header_end:], dtype, scale)
+    return header, validate_vibration_array(samples)
+
+
+def openapi_request_body(model: type[BaseModel]) -> dict:
+    """OpenAPI `requestBody` accepting either the JSON model or a binary upload."""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": model.model_json_schema()},
+                "application/octet-stream": {
+                    "schema": {
+                        "type": "string",
+                        "format": "binary",
+                        "description": (
+                            "uint32 LE header length, JSON header with the non-vibration "
+                            "fields plus `dtype` (float32/float64/int16) and optional "
+                            "`scale`, then raw little-endian samples"
+                        ),
+                    },
+                },
+            },
+        }
+    }
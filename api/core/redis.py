@@ -0,0 +1,29 @@
+"""
+Shared Redis Client for ResonanceDB API
+
+Redis is optional. When REDIS_URL is set, subsystems that benefit from
+cross-worker state (counters, caches, queues) use this client; otherwise
+they fall back to in-process implementations.
+"""
+
+from .config import settings
+
+_client = None
+
+
+def get_redis():
+    """Get the shared async Redis client, or None if Redis is not configured."""
+    global _client
+    if _client is None and settings.REDIS_URL:
+        import redis.asyncio as redis
+
+        _client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _client
+
+
+async def close_redis() -> None:
+    """Close the shared client. Call on application shutdown."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
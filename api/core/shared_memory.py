@@ -0,0 +1,153 @@
+"""
+Shared-Memory Signal Handoff for ResonanceDB API
+
+Passing a 100k-sample float array to a worker process through a
+ProcessPoolExecutor pickles it, pushes it through a pipe and unpickles it
+again. Instead, the dispatcher copies each signal once into a
+`multiprocessing.shared_memory` ring buffer and sends the worker only a
+small descriptor; the worker computes on a view over that memory.
+"""
+
+import threading
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable
+
+import numpy as np
+
+# Offsets are aligned so every view starts on a cache line
+_ALIGNMENT = 64
+
+
+@dataclass(frozen=True)
+class SignalDescriptor:
+    """Location of one signal inside a shared-memory ring."""
+
+    shm_name: str
+    offset: int  # bytes from the start of the segment
+    length: int  # number of elements
+    dtype: str
+    sample_rate_hz: float
+
+
+@dataclass
+class _Allocation:
+    offset: int
+    end: int
+    released: bool = False
+
+
+class SignalRing:
+    """
+    Ring buffer of signals in a shared-memory segment.
+
+    Space is handed out in submission order and reclaimed once the oldest
+    outstanding signals have been released. `write()` returns None when the
+    ring is full so callers can fall back to regular (pickled) submission.
+    """
+
+    def __init__(self, size_bytes: int):
+        self.size = size_bytes
+        self._shm = SharedMemory(create=True, size=size_bytes)
+        self._allocations: deque[_Allocation] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def _reserve(self, nbytes: int) -> int | None:
+        if not self._allocations:
+            return 0 if nbytes <= self.size else None
+
+        tail = self._allocations[0].offset
+        last = self._allocations[-1]
+        head = -(-last.end // _ALIGNMENT) * _ALIGNMENT
+        wrapped = last.offset < tail
+
+        if wrapped:
+            return head if head + nbytes <= tail else None
+        if head + nbytes <= self.size:
+            return head
+        if nbytes <= tail:
+            return 0
+        return None
+
+    def write(self, signal: np.ndarray, sample_rate_hz: float) -> SignalDescriptor | None:
+        """Copy a signal into the ring, or return None if there is no room."""
+        signal = np.ascontiguousarray(signal)
+        with self._lock:
+            offset = self._reserve(signal.nbytes)
+            if offset is None:
+                return None
+            self._allocations.append(_Allocation(offset, offset + signal.nbytes))
+
+        view = np.ndarray(signal.shape, dtype=signal.dtype, buffer=self._shm.buf, offset=offset)
+        view[:] = signal
+        return SignalDescriptor(
+            shm_name=self.name,
+            offset=offset,
+            length=len(signal),
+            dtype=signal.dtype.str,
+            sample_rate_hz=sample_rate_hz,
+        )
+
+    def release(self, descriptor: SignalDescriptor) -> None:
+        """Mark a signal's space as reusable once its worker has finished."""
+        with self._lock:
+            for allocation in self._allocations:
+                if allocation.offset == descriptor.offset and not allocation.released:
+                    allocation.released = True
+                    break
+            while self._allocations and self._allocations[0].released:
+                self._allocations.popleft()
+
+    def close(self) -> None:
+        """Free the shared-memory segment."""
+        self._shm.close()
+        self._shm.unlink()
+
+
+# Segments attached by this (worker) process, by name
+_attached: dict[str, SharedMemory] = {}
+
+
+def _attach(name: str) -> SharedMemory:
+    shm = _attached.get(name)
+    if shm is None:
+        # The parent owns the segment, so attaching must not register it with
+        # the resource tracker (which would unlink it when a worker exits).
+        try:
+            shm = SharedMemory(name=name, track=False)  # Python 3.13+
+        except TypeError:
+            register = resource_tracker.register
+            resource_tracker.register = lambda *args, **kwargs: None
+            try:
+                shm = SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+        _attached[name] = shm
+    return shm
+
+
+def run_on_shared_signal(
+    descriptor: SignalDescriptor,
+    func: Callable[[np.ndarray, float], np.ndarray],
+) -> np.ndarray:
+    """
+    Worker entry point: call func(signal, sample_rate_hz) on a shared view.
+
+    The view is read-only; the preprocessing pipeline allocates its own
+    output arrays.
+    """
+    shm = _attach(descriptor.shm_name)
+    signal = np.ndarray(
+        (descriptor.length,),
+        dtype=np.dtype(descriptor.dtype),
+        buffer=shm.buf,
+        offset=descriptor.offset,
+    )
+    signal.flags.writeable = False
+    return func(signal, descriptor.sample_rate_hz)
@@ -4,26 +4,44 @@ FastAPI Dependencies
 Provides reusable dependencies for authentication, database sessions, and rate limiting.
 """
 
-from typing import Annotated
-from fastapi import Depends, HTTPException, Header, status
-from sqlalchemy import select
+from dataclasses import dataclass
+from typing import Annotated, Generic, TypeVar
+import numpy as np
+from fastapi import Depends, HTTPException, Header, Request, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from api.core.database import get_db
+from api.core.database import get_db, get_primary_read_db, get_read_db
+from api.core.payload import parse_binary_body
 from api.core.security import hash_api_key, is_valid_api_key_format
-from api.models.contributor import Contributor
+from api.schemas.predict import PredictMetadata, PredictRequest
+from api.schemas.sample import SampleCreate, SampleMetadata
+from api.services.identity import AuthIdentity, get_identity
+
+MetadataT = TypeVar("MetadataT", bound=BaseModel)
+
+
+async def authenticate_api_key(api_key: str) -> AuthIdentity | None:
+    """Resolve an API key to its (cached) identity, or None if the key is invalid."""
+    if not is_valid_api_key_format(api_key):
+        return None
+    
+    return await get_identity(hash_api_key(api_key))
 
 
 async def get_current_contributor(
     authorization: Annotated[str | None, Header()] = None,
-    db: AsyncSession = Depends(get_db),
-) -> Contributor:
+) -> AuthIdentity:
     """
     Dependency that validates the API key and returns the current contributor.
     
+    Returns a cached `AuthIdentity`, not an ORM row; handlers that modify
+    the contributor load the row themselves by `contributor.id`.
+    
     Usage:
         @app.get("/protected")
-        async def protected_route(contributor: Contributor = Depends(get_current_contributor)):
+        async def protected_route(contributor: AuthIdentity = Depends(get_current_contributor)):
             return {"email": contributor.email}
     
     Raises:
@@ -55,11 +73,7 @@ async def get_current_contributor(
         )
     
     # Hash and lookup
-    key_hash = hash_api_key(api_key)
-    result = await db.execute(
-        select(Contributor).where(Contributor.api_key_hash == key_hash)
-    )
-    contributor = result.scalar_one_or_none()
+    contributor = await authenticate_api_key(api_key)
     
     if contributor is None:
         raise HTTPException(
@@ -73,30 +87,65 @@ async def get_current_contributor(
 
 async def get_optional_contributor(
     authorization: Annotated[str | None, Header()] = None,
-    db: AsyncSession = Depends(get_db),
-) -> Contributor | None:
+) -> AuthIdentity | None:
     """
     Dependency that optionally validates API key.
     
-    Returns Contributor if valid key provided, None otherwise.
+    Returns the identity if a valid key provided, None otherwise.
     Does not raise errors for missing/invalid keys.
     """
     if not authorization or not authorization.startswith("Bearer "):
         return None
     
-    api_key = authorization[7:]
+    return await authenticate_api_key(authorization[7:])
+
+
+@dataclass
+class VibrationPayload(Generic[MetadataT]):
+    """An upload's metadata fields with its vibration decoded to float64."""
+    
+    meta: MetadataT
+    vibration: np.ndarray
+
+
+def vibration_body(json_model: type[BaseModel], meta_model: type[MetadataT]):
+    """
+    Build a dependency that accepts a vibration upload as JSON or binary.
     
-    if not is_valid_api_key_format(api_key):
-        return None
+    JSON bodies are validated against `json_model`. `application/octet-stream`
+    bodies (see `api.core.payload.parse_binary_body`) have their header
+    validated against `meta_model` and their samples decoded with
+    `np.frombuffer`, skipping per-element Python floats entirely.
+    """
+    async def dependency(request: Request) -> VibrationPayload[MetadataT]:
+        body = await request.body()
+        content_type = request.headers.get("content-type", "").split(";")[0].strip()
+        
+        try:
+            if content_type == "application/octet-stream":
+                header, vibration = parse_binary_body(body)
+                return VibrationPayload(meta=meta_model.model_validate(header), vibration=vibration)
+            
+            data = json_model.model_validate_json(body)
+            return VibrationPayload(meta=data, vibration=np.asarray(data.vibration, dtype=float))
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Invalid binary payload: {e}",
+            )
     
-    key_hash = hash_api_key(api_key)
-    result = await db.execute(
-        select(Contributor).where(Contributor.api_key_hash == key_hash)
-    )
-    return result.scalar_one_or_none()
+    return dependency
 
 
 # Type aliases for cleaner route signatures
-CurrentContributor = Annotated[Contributor, Depends(get_current_contributor)]
-OptionalContributor = Annotated[Contributor | None, Depends(get_optional_contributor)]
+CurrentContributor = Annotated[AuthIdentity, Depends(get_current_contributor)]
+OptionalContributor = Annotated[AuthIdentity | None, Depends(get_optional_contributor)]
 DBSession = Annotated[AsyncSession, Depends(get_db)]
+ReadDBSession = Annotated[AsyncSession, Depends(get_read_db)]
+PrimaryReadDBSession = Annotated[AsyncSession, Depends(get_primary_read_db)]
+SampleBody = Annotated[VibrationPayload[SampleMetadata], Depends(vibration_body(SampleCreate, SampleMetadata))]
+PredictBody = Annotated[VibrationPayload[PredictMetadata], Depends(vibration_body(PredictRequest, PredictMetadata))]
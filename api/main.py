@@ -11,13 +11,25 @@ from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
 from api.core.config import settings
-from api.core.database import init_db, close_db
+from api.core.admission import cpu_admission
+from api.core.database import (
+    engine,
+    init_db,
+    close_db,
+    database_stats,
+    legacy_guid_columns,
+    legacy_vibration_columns,
+)
+from api.core.executors import executor_stats, shutdown_executors
 from api.core.rate_limit import limiter, rate_limit_exceeded_handler
-from api.routers import auth, samples, predict, contributors
+from api.core.redis import close_redis
+from api.routers import auth, samples, predict, stream, contributors
+from api.services import counters, dedup, jobs, leaderboard, similarity, write_behind
 
 # Import models to register them with Base before init_db
 from api.models.contributor import Contributor  # noqa: F401
 from api.models.sample import Sample  # noqa: F401
+from api.models.fingerprint import SampleFingerprint  # noqa: F401
 
 
 @asynccontextmanager
@@ -25,8 +37,38 @@ async def lifespan(app: FastAPI):
     """Application lifespan manager - handles startup and shutdown."""
     # Startup
     await init_db()
+    async with engine.connect() as conn:
+        legacy_guids = await conn.run_sync(legacy_guid_columns)
+        legacy_vibrations = await conn.run_sync(legacy_vibration_columns)
+    if legacy_guids:
+        # Lookups by id would miss the hex rows and new rows would mix formats
+        print(
+            f"❌ {', '.join(legacy_guids)} still hold CHAR(32) GUIDs; "
+            "run `python -m api.commands.migrate_guids` first"
+        )
+    if legacy_vibrations:
+        # Binary vibrations can't be written to a json column
+        print(
+            f"❌ {', '.join(legacy_vibrations)} still declared JSON; "
+            "run `python -m api.commands.migrate_vibrations` first"
+        )
+    if legacy_guids or legacy_vibrations:
+        await close_db()
+        raise SystemExit(1)
+    await counters.start()
+    await leaderboard.start()
+    await write_behind.start()
+    await jobs.start()
+    await similarity.start()
     yield
     # Shutdown
+    await write_behind.stop()
+    await jobs.stop()
+    await similarity.stop()
+    await leaderboard.stop()
+    await counters.stop()
+    shutdown_executors()
+    await close_redis()
     await close_db()
 
 
@@ -82,6 +124,7 @@ app.add_middleware(
 app.include_router(auth.router, prefix="/api/v1/auth")
 app.include_router(samples.router, prefix="/api/v1/samples")
 app.include_router(predict.router, prefix="/api/v1/predict")
+app.include_router(stream.router, prefix="/api/v1/predict")
 app.include_router(contributors.router, prefix="/api/v1/contributors")
 
 
@@ -102,27 +145,33 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics", tags=["Health"])
+async def metrics():
+    """Runtime metrics for load balancers and capacity planning."""
+    return {
+        "executors": executor_stats(),
+        "admission": cpu_admission.stats(),
+        "database": database_stats(),
+        "ingest": write_behind.get_buffer().stats() if write_behind.get_buffer() else {"mode": "direct"},
+        "dedup": dedup.stats(),
+        "jobs": await jobs.stats(),
+        "similarity": similarity.stats(),
+        "counters": await counters.stats(),
+    }
+
+
 @app.get("/api/v1/stats", tags=["Health"])
 async def get_stats():
-    """Get public database statistics."""
-    from api.core.database import async_session_maker
-    from sqlalchemy import select, func
-    from api.models.sample import Sample
-    from api.models.contributor import Contributor
+    """
+    Get public database statistics.
     
-    async with async_session_maker() as session:
-        total_samples = await session.scalar(select(func.count(Sample.id)))
-        validated_samples = await session.scalar(
-            select(func.count(Sample.id)).where(Sample.validated == True)
-        )
-        total_contributors = await session.scalar(select(func.count(Contributor.id)))
-        
-        return {
-            "total_samples": total_samples or 0,
-            "validated_samples": validated_samples or 0,
-            "total_contributors": total_contributors or 0,
-            "status": "operational"
-        }
+    Served from incrementally maintained counters (see api/services/counters.py),
+    so this never scans the tables.
+    """
+    return {
+        **await counters.get_counters(),
+        "status": "operational",
+    }
 
 
 if __name__ == "__main__":
@@ -6,14 +6,41 @@ Represents users who contribute data to ResonanceDB and consume the API.
 
 import uuid
 from datetime import datetime
-from sqlalchemy import String, DateTime, Integer, Enum as SQLEnum
+from sqlalchemy import String, DateTime, Index, Integer, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from api.core.database import Base, GUID
 from .tier import ContributorTier
 
 
-class Contributor(Base):
+class TierProgressMixin:
+    """
+    Tier-derived properties shared by `Contributor` and cached identities.
+    
+    Requires `tier` and `validated_submissions` attributes.
+    """
+    
+    @property
+    def rate_limit(self) -> int:
+        """Get rate limit for this contributor's tier."""
+        return self.tier.get_rate_limit()
+    
+    @property
+    def progress_to_next_tier(self) -> dict | None:
+        """Get progress info toward next tier."""
+        next_tier = self.tier.next_tier()
+        if next_tier is None:
+            return None
+        
+        remaining = self.tier.samples_to_next_tier(self.validated_submissions)
+        return {
+            "current": self.validated_submissions,
+            "required": self.validated_submissions + remaining,
+            "next_tier": next_tier.value,
+        }
+
+
+class Contributor(TierProgressMixin, Base):
     """
     A contributor who can submit vibration samples and query the API.
     
@@ -22,6 +49,10 @@ class Contributor(Base):
     """
     
     __tablename__ = "contributors"
+    __table_args__ = (
+        # Leaderboard order (validated_submissions desc, id as tie-breaker)
+        Index("ix_contributors_validated_id", "validated_submissions", "id"),
+    )
     
     # Primary key
     id: Mapped[uuid.UUID] = mapped_column(
@@ -81,11 +112,11 @@ class Contributor(Base):
         nullable=True,
     )
     
-    # Relationships
+    # Relationships (never loaded implicitly; query samples by contributor_id)
     samples: Mapped[list["Sample"]] = relationship(
         "Sample",
         back_populates="contributor",
-        lazy="selectin",
+        lazy="raise",
     )
     
     def __repr__(self) -> str:
@@ -105,25 +136,6 @@ class Contributor(Base):
             self.tier = new_tier
             return True
         return False
-    
-    @property
-    def rate_limit(self) -> int:
-        """Get rate limit for this contributor's tier."""
-        return self.tier.get_rate_limit()
-    
-    @property
-    def progress_to_next_tier(self) -> dict | None:
-        """Get progress info toward next tier."""
-        next_tier = self.tier.next_tier()
-        if next_tier is None:
-            return None
-        
-        remaining = self.tier.samples_to_next_tier(self.validated_submissions)
-        return {
-            "current": self.validated_submissions,
-            "required": self.validated_submissions + remaining,
-            "next_tier": next_tier.value,
-        }
 
 
 # Import Sample here to avoid circular imports (for type hint)
@@ -0,0 +1,43 @@
+"""
+Sample Fingerprint Model
+
+Inverted index of spectral-peak fingerprints (see
+python/features.compute_peak_fingerprints): one row per hash occurrence
+in a sample, keyed by hash so a lookup is an index range scan.
+"""
+
+import uuid
+from sqlalchemy import ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from api.core.database import Base, GUID
+
+
+class SampleFingerprint(Base):
+    """
+    A peak-pair hash occurring in a sample at a given frame offset.
+
+    The primary key leads with the hash, so all samples containing a hash
+    are stored together and found with one index lookup.
+    """
+
+    __tablename__ = "sample_fingerprints"
+
+    hash: Mapped[int] = mapped_column(
+        Integer,
+        primary_key=True,
+    )
+    sample_id: Mapped[uuid.UUID] = mapped_column(
+        GUID(),
+        ForeignKey("samples.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    )
+    # STFT frame of the pair's anchor peak
+    offset: Mapped[int] = mapped_column(
+        Integer,
+        primary_key=True,
+    )
+
+    def __repr__(self) -> str:
+        return f"<SampleFingerprint {self.hash} sample={self.sample_id} offset={self.offset}>"
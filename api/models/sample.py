@@ -6,20 +6,38 @@ Represents a vibration sample submitted to ResonanceDB.
 
 import uuid
 from datetime import datetime
-from sqlalchemy import String, DateTime, Float, Boolean, ForeignKey, Text, JSON
+import numpy as np
+from sqlalchemy import String, DateTime, Float, Boolean, ForeignKey, Index, Integer, Text, JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from api.core.database import Base, GUID
+from api.core.database import Base, GUID, VibrationData
 
 
 class Sample(Base):
     """
     A vibration sample with metadata.
     
-    The vibration array is stored as JSONB for flexibility and efficient querying.
+    The vibration array is stored as a compressed binary blob and loads as
+    a NumPy array (see api/core/vibration_codec.py). It is deferred, and its
+    length and duration are persisted separately for listings.
     """
     
     __tablename__ = "samples"
+    __table_args__ = (
+        # Keyset pagination, newest first, optionally within one filter
+        Index("ix_samples_created_id", "created_at", "id"),
+        Index("ix_samples_material_created_id", "material", "created_at", "id"),
+        Index("ix_samples_source_created_id", "source", "created_at", "id"),
+        Index("ix_samples_validated_created_id", "validated", "created_at", "id"),
+        # Feature range filters, alone or within one material
+        Index("ix_samples_peak_frequency_hz", "peak_frequency_hz"),
+        Index("ix_samples_material_peak_frequency_hz", "material", "peak_frequency_hz"),
+        Index("ix_samples_decay_rate", "decay_rate"),
+        Index("ix_samples_energy", "energy"),
+        Index("ix_samples_spectral_centroid", "spectral_centroid"),
+        # A contributor can't store the same recording twice
+        Index("ix_samples_contributor_content_hash", "contributor_id", "content_hash", unique=True),
+    )
     
     # Primary key
     id: Mapped[uuid.UUID] = mapped_column(
@@ -42,14 +60,33 @@ class Sample(Base):
         nullable=False,
         index=True,
     )
-    vibration: Mapped[list] = mapped_column(
-        JSON,
+    # Deferred: only loaded when a query asks for it (e.g. with undefer())
+    vibration: Mapped[np.ndarray] = mapped_column(
+        VibrationData(),
         nullable=False,
+        deferred=True,
     )
     sample_rate_hz: Mapped[float] = mapped_column(
         Float,
         nullable=False,
     )
+    
+    # SHA-256 of the vibration and sample rate (api/services/dedup.py);
+    # NULL for samples stored before deduplication
+    content_hash: Mapped[str | None] = mapped_column(
+        String(64),
+        nullable=True,
+    )
+    
+    # Derived from the vibration at ingest so listings never load it
+    vibration_length: Mapped[int | None] = mapped_column(
+        Integer,
+        nullable=True,
+    )
+    duration_seconds: Mapped[float | None] = mapped_column(
+        Float,
+        nullable=True,
+    )
     excitation: Mapped[str] = mapped_column(
         String(50),
         nullable=False,
@@ -95,8 +132,18 @@ class Sample(Base):
         JSON,
         nullable=True,
     )
+    # Feature extraction: "pending" (queued), "processed", or "failed"
+    # (gave up after retries; see validation_errors)
+    status: Mapped[str] = mapped_column(
+        String(20),
+        default="processed",
+        server_default="processed",
+        nullable=False,
+        index=True,
+    )
     
-    # Computed features (cached for quick queries)
+    # Computed features (python/features.py, see ingest.FEATURE_COLUMNS),
+    # stored for range filters; NULL until extracted
     peak_frequency_hz: Mapped[float | None] = mapped_column(
         Float,
         nullable=True,
@@ -105,7 +152,58 @@ class Sample(Base):
         Float,
         nullable=True,
     )
-    
+    decay_rate: Mapped[float | None] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    spectral_centroid: Mapped[float | None] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    spectral_bandwidth: Mapped[float | None] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    zcr: Mapped[float | None] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    peak_freq_1: Mapped[float | None] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    peak_freq_2: Mapped[float | None] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    peak_freq_3: Mapped[float | None] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    ac_lag_s: Mapped[float | None] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    # Which feature set version produced the columns above
+    # (ingest.FEATURE_SET_FINGERPRINT); stale rows are re-extracted by
+    # api/commands/backfill_features.py
+    feature_set_fingerprint: Mapped[str | None] = mapped_column(
+        String(16),
+        nullable=True,
+        index=True,
+    )
+
+    # Full model feature vector, computed on first prediction and reused
+    # while the model's feature configuration (fingerprint) is unchanged
+    feature_vector: Mapped[list | None] = mapped_column(
+        JSON,
+        nullable=True,
+    )
+    feature_fingerprint: Mapped[str | None] = mapped_column(
+        String(16),
+        nullable=True,
+    )
+
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(
         DateTime,
@@ -121,20 +219,6 @@ class Sample(Base):
     
     def __repr__(self) -> str:
         return f"<Sample {self.id} material={self.material}>"
-    
-    @property
-    def vibration_length(self) -> int:
-        """Get the number of vibration samples."""
-        if isinstance(self.vibration, list):
-            return len(self.vibration)
-        return 0
-    
-    @property
-    def duration_seconds(self) -> float:
-        """Calculate the duration of the sample in seconds."""
-        if self.sample_rate_hz > 0:
-            return self.vibration_length / self.sample_rate_hz
-        return 0.0
 
 
 # Import for type hints
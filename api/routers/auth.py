@@ -6,12 +6,13 @@ Handles contributor registration and API key management.
 
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import select, update
 
 from api.core.security import generate_api_key, hash_api_key
 from api.deps import DBSession, CurrentContributor
 from api.models.contributor import Contributor
 from api.models.tier import ContributorTier
+from api.services import counters, identity, leaderboard
 from api.schemas.contributor import (
     ContributorCreate,
     ContributorWithKey,
@@ -64,6 +65,10 @@ async def register(
     db.add(contributor)
     await db.flush()
     await db.refresh(contributor)
+    # Commit before the counters and leaderboard count the contributor
+    await db.commit()
+    await counters.record_contributor()
+    await leaderboard.record_score(contributor.id, 0)
     
     return ContributorWithKey(
         id=contributor.id,
@@ -93,10 +98,14 @@ async def regenerate_key(
     api_key, key_hash = generate_api_key()
     
     # Update contributor
-    contributor.api_key_hash = key_hash
-    contributor.last_activity_at = datetime.utcnow()
-    
-    await db.flush()
+    await db.execute(
+        update(Contributor)
+        .where(Contributor.id == contributor.id)
+        .values(api_key_hash=key_hash, last_activity_at=datetime.utcnow())
+    )
+    # Commit before invalidating so no request can re-cache the old key
+    await db.commit()
+    await identity.invalidate(contributor.api_key_hash)
     
     return ContributorWithKey(
         id=contributor.id,
@@ -4,17 +4,17 @@ Contributors Router
 Handles contributor stats and leaderboard.
 """
 
-from datetime import datetime
 from fastapi import APIRouter, Query
-from sqlalchemy import select, func
 
-from api.deps import DBSession, CurrentContributor
-from api.models.contributor import Contributor
+from api.core.config import settings
+from api.deps import CurrentContributor
 from api.schemas.contributor import (
+    ContributorRank,
     ContributorStats,
     LeaderboardEntry,
     LeaderboardResponse,
 )
+from api.services import counters, leaderboard
 
 router = APIRouter(tags=["Contributors"])
 
@@ -43,43 +43,44 @@ async def get_my_stats(
     )
 
 
+@router.get(
+    "/me/rank",
+    response_model=ContributorRank,
+    summary="Get your leaderboard rank",
+    description="Get your position among all contributors by validated submissions.",
+)
+async def get_my_rank(
+    contributor: CurrentContributor,
+) -> ContributorRank:
+    """Get the authenticated contributor's rank."""
+    
+    rank = await leaderboard.get_rank(contributor.id)
+    return ContributorRank(
+        rank=rank.rank,
+        validated_submissions=rank.validated_submissions,
+        total_contributors=rank.total_contributors,
+    )
+
+
 @router.get(
     "/leaderboard",
     response_model=LeaderboardResponse,
     summary="Get contributor leaderboard",
-    description="Get the top contributors ranked by validated submissions.",
+    description=(
+        "Get the top contributors ranked by validated submissions. "
+        f"Served from a cache refreshed at least every {settings.LEADERBOARD_CACHE_SECONDS:g} seconds."
+    ),
 )
 async def get_leaderboard(
-    db: DBSession,
-    limit: int = Query(20, ge=1, le=100, description="Number of entries to return"),
+    limit: int = Query(20, ge=1, le=leaderboard.MAX_TOP_N, description="Number of entries to return"),
 ) -> LeaderboardResponse:
     """Get the top contributors by validated submissions."""
     
-    # Get total count
-    count_result = await db.execute(select(func.count(Contributor.id)))
-    total = count_result.scalar() or 0
-    
-    # Get top contributors
-    result = await db.execute(
-        select(Contributor)
-        .order_by(Contributor.validated_submissions.desc())
-        .limit(limit)
-    )
-    contributors = result.scalars().all()
-    
-    entries = [
-        LeaderboardEntry(
-            rank=i + 1,
-            display_name=c.display_name,
-            github_username=c.github_username,
-            tier=c.tier,
-            validated_submissions=c.validated_submissions,
-        )
-        for i, c in enumerate(contributors)
-    ]
+    entries, updated_at = await leaderboard.get_top(limit)
+    total = (await counters.get_counters())["total_contributors"]
     
     return LeaderboardResponse(
-        entries=entries,
+        entries=[LeaderboardEntry(**entry) for entry in entries],
         total_contributors=total,
-        updated_at=datetime.utcnow(),
+        updated_at=updated_at,
     )
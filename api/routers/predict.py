@@ -4,161 +4,201 @@ Prediction Router
 Handles material prediction using trained ML models.
 """
 
+import asyncio
+from uuid import UUID
 import numpy as np
-import joblib
-from pathlib import Path
 from fastapi import APIRouter, HTTPException, status
+from sqlalchemy import select, update
 
-from api.core.config import settings
-from api.deps import CurrentContributor
-from api.schemas.predict import PredictRequest, PredictResponse, ModelInfo
-
-# Import feature extraction from existing code
-import sys
-ROOT = Path(__file__).resolve().parent.parent.parent
-if str(ROOT) not in sys.path:
-    sys.path.insert(0, str(ROOT))
-
-from python.features import compute_feature_vector
-from python.preprocess import PreprocessConfig
+from api.core.admission import cpu_slot
+from api.core.database import primary_read_session, write_session
+from api.core.executors import feature_pool, run_on_signal
+from api.core.payload import openapi_request_body
+from api.deps import CurrentContributor, PredictBody
+from api.models.sample import Sample
+from api.schemas.predict import (
+    PredictRequest,
+    PredictResponse,
+    PredictSamplesRequest,
+    PredictSampleResult,
+    PredictSamplesResponse,
+    ModelInfo,
+)
+from api.services.inference import (
+    LoadedModel,
+    extract_features,
+    get_model,
+    load_model,
+    predict_batch,
+)
 
 router = APIRouter(tags=["Prediction"])
 
-# Cache loaded model
-_model_cache: dict = {}
-
-
-def load_model(model_path: str = None):
-    """Load and cache the trained model."""
-    path = model_path or settings.DEFAULT_MODEL_PATH
-    full_path = ROOT / path
-    
-    if path not in _model_cache:
-        if not full_path.exists():
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail=f"Model not found: {path}",
-            )
-        
-        try:
-            model_data = joblib.load(full_path)
-            _model_cache[path] = model_data
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail=f"Failed to load model: {e}",
-            )
-    
-    return _model_cache[path]
-
 
 @router.post(
     "",
     response_model=PredictResponse,
     summary="Predict material from vibration",
-    description="Submit vibration data and get a material classification prediction.",
+    description="Submit vibration data (JSON or binary upload) and get a material classification prediction.",
+    openapi_extra=openapi_request_body(PredictRequest),
 )
 async def predict(
-    data: PredictRequest,
+    payload: PredictBody,
     contributor: CurrentContributor,
 ) -> PredictResponse:
     """
     Predict material type from vibration data.
-    
+
     Uses the trained classifier to identify the material based on
     vibration characteristics (frequency, damping, energy).
     """
-    # Load model
-    model_data = load_model()
-    
-    # Handle both old (just model) and new (dict with metadata) formats
-    if isinstance(model_data, dict):
-        model = model_data.get("model")
-        config = model_data.get("config", {})
-        preprocess_config = config.get("preprocess")
-        # Get feature config to determine what extras are needed
-        feature_config = config.get("features", {})
-        use_extra = feature_config.get("extra", True)  # Default to True for trained models
-        top_k_peaks = feature_config.get("top_k_peaks", 3)
-    else:
-        model = model_data
-        preprocess_config = None
-        use_extra = True  # Assume trained model uses extras
-        top_k_peaks = 3
-    
-    if model is None:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Invalid model format",
+    loaded = get_model()
+    async with cpu_slot():
+        features = await extract_features(loaded, payload.vibration, payload.meta.sample_rate_hz)
+        return (await predict_batch(loaded, features.reshape(1, -1)))[0]
+
+
+async def _load_sample_features(
+    loaded: LoadedModel,
+    sample_ids: list[UUID],
+) -> tuple[dict[UUID, np.ndarray], dict[UUID, str]]:
+    """
+    Get model features for stored samples.
+
+    Reuses persisted feature vectors whose fingerprint matches the model's
+    feature spec. Only the remaining samples have their vibration loaded, a
+    few at a time and with no session held while features are computed;
+    the new vectors are then persisted for next time in one short write.
+
+    Returns:
+        Tuple of (features by sample id, error message by sample id)
+    """
+    fingerprint = loaded.spec.fingerprint
+    # The primary, so a sample submitted just before is always found
+    async with primary_read_session() as db:
+        result = await db.execute(
+            select(Sample.id, Sample.feature_vector, Sample.feature_fingerprint)
+            .where(Sample.id.in_(sample_ids))
         )
-    
-    # Extract features
-    vibration_array = np.array(data.vibration)
-    
-    try:
-        # Build preprocessing config if available
-        if preprocess_config:
-            cfg = PreprocessConfig(**preprocess_config)
-            features = compute_feature_vector(
-                vibration_array,
-                data.sample_rate_hz,
-                config=cfg,
-                extra=use_extra,
-                top_k_peaks=top_k_peaks,
-            )
+        rows = result.all()
+
+    features: dict[UUID, np.ndarray] = {}
+    stale: list[UUID] = []
+    for sample_id, vector, vector_fingerprint in rows:
+        if vector is not None and vector_fingerprint == fingerprint:
+            features[sample_id] = np.asarray(vector, dtype=float)
         else:
-            features = compute_feature_vector(
-                vibration_array,
-                data.sample_rate_hz,
-                extra=use_extra,
-                top_k_peaks=top_k_peaks,
+            stale.append(sample_id)
+
+    errors: dict[UUID, str] = {
+        sample_id: "Sample not found"
+        for sample_id in sample_ids
+        if sample_id not in features and sample_id not in stale
+    }
+
+    updates = []
+    chunk_size = max(1, feature_pool().max_workers)
+    for start in range(0, len(stale), chunk_size):
+        async with primary_read_session() as db:
+            result = await db.execute(
+                select(Sample.id, Sample.vibration, Sample.sample_rate_hz)
+                .where(Sample.id.in_(stale[start:start + chunk_size]))
+            )
+            rows = result.all()
+        # A CPU slot only while extracting, not across the database round-trips
+        async with cpu_slot():
+            vectors = await asyncio.gather(
+                *(
+                    run_on_signal(loaded.spec.extract, np.asarray(vibration, dtype=float), sample_rate_hz)
+                    for _, vibration, sample_rate_hz in rows
+                ),
+                return_exceptions=True,
+            )
+
+        for (sample_id, _, _), vector in zip(rows, vectors):
+            if isinstance(vector, Exception):
+                errors[sample_id] = f"Feature extraction failed: {vector}"
+                continue
+            features[sample_id] = vector
+            updates.append({
+                "id": sample_id,
+                "feature_vector": vector.tolist(),
+                "feature_fingerprint": fingerprint,
+            })
+
+    if updates:
+        try:
+            async with write_session() as db:
+                await db.execute(update(Sample), updates)
+        except Exception as e:
+            # Only a cache: the next prediction computes them again
+            print(f"⚠️  Could not persist {len(updates)} feature vectors: {e}")
+
+    return features, errors
+
+
+@router.post(
+    "/bulk",
+    response_model=PredictSamplesResponse,
+    summary="Predict material for stored samples",
+    description="Classify up to 100 already-submitted samples by ID without re-uploading their vibration data.",
+)
+async def predict_samples(
+    data: PredictSamplesRequest,
+    contributor: CurrentContributor,
+) -> PredictSamplesResponse:
+    """Predict material type for a batch of stored samples."""
+    loaded = get_model()
+    sample_ids = list(dict.fromkeys(data.sample_ids))
+    features, errors = await _load_sample_features(loaded, sample_ids)
+
+    found = [sample_id for sample_id in sample_ids if sample_id in features]
+    predictions = {}
+    if found:
+        matrix = np.vstack([features[sample_id] for sample_id in found])
+        async with cpu_slot():
+            predictions = dict(zip(found, await predict_batch(loaded, matrix)))
+
+    return PredictSamplesResponse(
+        results=[
+            PredictSampleResult(
+                sample_id=sample_id,
+                result=predictions.get(sample_id),
+                error=errors.get(sample_id),
+            )
+            for sample_id in data.sample_ids
+        ]
+    )
+
+
+@router.post(
+    "/{sample_id}",
+    response_model=PredictResponse,
+    summary="Predict material for a stored sample",
+    description="Classify an already-submitted sample by ID without re-uploading its vibration data.",
+)
+async def predict_sample(
+    sample_id: UUID,
+    contributor: CurrentContributor,
+) -> PredictResponse:
+    """Predict material type for a stored sample."""
+    loaded = get_model()
+    features, errors = await _load_sample_features(loaded, [sample_id])
+
+    if sample_id not in features:
+        error = errors.get(sample_id, "Sample not found")
+        if error == "Sample not found":
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=error,
             )
-    except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail=f"Feature extraction failed: {e}",
+            detail=error,
         )
-    
-    # Make prediction
-    try:
-        features_2d = features.reshape(1, -1)
-        prediction = model.predict(features_2d)[0]
-        
-        # Get probabilities if available
-        probabilities = None
-        confidence = 0.0
-        if hasattr(model, "predict_proba"):
-            proba = model.predict_proba(features_2d)[0]
-            classes = model.classes_
-            probabilities = {str(c): float(p) for c, p in zip(classes, proba)}
-            confidence = float(max(proba))
-        else:
-            confidence = 0.8  # Default for models without probability
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Prediction failed: {e}",
-        )
-    
-    # Build feature dict for response
-    feature_names = ["peak_freq", "decay_rate", "energy"]
-    if use_extra:
-        feature_names.extend(["spectral_centroid", "spectral_bandwidth", "zcr"])
-        feature_names.extend([f"peak_freq_{i+1}" for i in range(top_k_peaks)])
-        feature_names.append("ac_lag_s")
-    
-    features_dict = {}
-    for i, name in enumerate(feature_names):
-        if i < len(features):
-            features_dict[name] = float(features[i])
-    
-    return PredictResponse(
-        prediction=str(prediction),
-        confidence=confidence,
-        probabilities=probabilities,
-        features=features_dict,
-    )
+
+    async with cpu_slot():
+        return (await predict_batch(loaded, features[sample_id].reshape(1, -1)))[0]
 
 
 @router.get(
@@ -170,12 +210,12 @@ async def predict(
 async def get_model_info() -> ModelInfo:
     """Get information about the loaded model."""
     model_data = load_model()
-    
+
     if isinstance(model_data, dict):
         model = model_data.get("model")
         config = model_data.get("config", {})
         materials = list(model.classes_) if hasattr(model, "classes_") else []
-        
+
         return ModelInfo(
             name="material_classifier",
             version="1.0.0",
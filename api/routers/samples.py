@@ -4,32 +4,44 @@ Samples Router
 Handles vibration sample submission and retrieval.
 """
 
+import base64
+import json
 from datetime import datetime
 from uuid import UUID
 from typing import Optional
 import numpy as np
-from fastapi import APIRouter, HTTPException, Query, status
-from sqlalchemy import select, func
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from pydantic import ValidationError
+from sqlalchemy import insert, select, func, text, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import undefer
 
-from api.deps import DBSession, CurrentContributor
+from api.core.admission import cpu_slot
+from api.core.cache import TTLCache
+from api.core.config import settings
+from api.core.database import read_session
+from api.core.executors import run_on_signal
+from api.core.payload import openapi_request_body
+from api.deps import DBSession, CurrentContributor, ReadDBSession, SampleBody
 from api.models.sample import Sample
+from api.services import contributors, dedup, fingerprints, ingest, jobs, similarity, write_behind
 from api.schemas.sample import (
+    SampleBulkCreate,
+    SampleBulkItemResult,
+    SampleBulkResponse,
     SampleCreate,
     SampleResponse,
     SampleDetail,
     SampleListItem,
     SampleListResponse,
+    SampleMatch,
+    SampleMatchRequest,
+    SampleMatchResponse,
+    SimilarSample,
+    SimilarSamplesRequest,
+    SimilarSamplesResponse,
 )
 
-# Import feature extraction from existing code
-import sys
-from pathlib import Path
-ROOT = Path(__file__).resolve().parent.parent.parent
-if str(ROOT) not in sys.path:
-    sys.path.insert(0, str(ROOT))
-
-from python.features import compute_feature_vector
-
 router = APIRouter(tags=["Samples"])
 
 
@@ -38,67 +50,89 @@ router = APIRouter(tags=["Samples"])
     response_model=SampleResponse,
     status_code=status.HTTP_201_CREATED,
     summary="Submit a vibration sample",
-    description="Submit a new vibration sample to ResonanceDB.",
+    description=(
+        "Submit a new vibration sample to ResonanceDB as JSON or as a binary upload. "
+        "When the server runs in buffered ingest mode the response is 202: the "
+        "sample is durably queued and becomes readable within milliseconds. "
+        "Re-submitting a recording you already stored returns 200 with the "
+        "existing sample and `duplicate` set."
+    ),
+    responses={
+        200: {"model": SampleResponse, "description": "Recording already stored (duplicate)"},
+        202: {"model": SampleResponse, "description": "Sample queued (buffered ingest mode)"},
+    },
+    openapi_extra=openapi_request_body(SampleCreate),
 )
 async def create_sample(
-    data: SampleCreate,
+    payload: SampleBody,
     contributor: CurrentContributor,
     db: DBSession,
+    response: Response,
 ) -> SampleResponse:
     """
     Submit a new vibration sample.
     
-    The sample will be validated and features extracted automatically.
+    The sample will be validated and features extracted automatically,
+    inline or, in background extraction mode, shortly after it is stored
+    (its status is "pending" until then). A recording the contributor
+    already stored is recognized by its content hash before any of that.
     """
-    # Extract features using existing pipeline
-    vibration_array = np.array(data.vibration)
-    try:
-        features = compute_feature_vector(
-            vibration_array,
-            data.sample_rate_hz,
-            extra=False,
-        )
-        peak_freq = float(features[0])
-        energy = float(features[2])
-        validated = True
-        validation_errors = None
-    except Exception as e:
-        peak_freq = None
-        energy = None
-        validated = False
-        validation_errors = [str(e)]
-    
-    # Create sample
-    sample = Sample(
-        contributor_id=contributor.id,
-        material=data.material,
-        vibration=data.vibration,
-        sample_rate_hz=data.sample_rate_hz,
-        excitation=data.excitation,
-        source=data.source,
-        temperature_c=data.temperature_c,
-        thickness_mm=data.thickness_mm,
-        load_g=data.load_g,
-        mounting=data.mounting,
-        device=data.device,
-        notes=data.notes,
-        validated=validated,
-        validation_errors=validation_errors,
-        peak_frequency_hz=peak_freq,
-        energy=energy,
-    )
+    digest = dedup.content_hash(payload.vibration, payload.meta.sample_rate_hz)
+    buffer = write_behind.get_buffer()
+    existing = buffer.find_pending(contributor.id, digest) if buffer is not None else None
+    if existing is None:
+        # Looked up on a read connection, so the write one isn't held during DSP
+        async with read_session() as rdb:
+            existing = (await dedup.find_existing(rdb, contributor.id, [digest])).get(digest)
+    if existing is not None:
+        dedup.record_duplicates()
+        response.status_code = status.HTTP_200_OK
+        return SampleResponse(**existing, duplicate=True)
     
-    db.add(sample)
+    async with cpu_slot():
+        if jobs.is_background():
+            features = ingest.PENDING_FEATURES
+        else:
+            features = await ingest.extract_ingest_features(payload.vibration, payload.meta.sample_rate_hz)
+        row = ingest.build_sample_row(contributor.id, payload.meta, payload.vibration, features, content_hash=digest)
+        # Buffered rows get their fingerprints when they are flushed
+        peaks = await fingerprints.compute_for_rows([row]) if buffer is None else {}
     
-    # Update contributor stats
-    contributor.total_submissions += 1
-    if validated:
-        contributor.validated_submissions += 1
-        contributor.update_tier()
-    contributor.last_activity_at = datetime.utcnow()
+    if buffer is not None:
+        await buffer.submit(row, contributor.api_key_hash)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return SampleResponse(**row)
     
-    await db.flush()
-    await db.refresh(sample)
+    sample = Sample(**row)
+    try:
+        async with db.begin_nested():
+            db.add(sample)
+            await db.flush()
+    except IntegrityError:
+        # A concurrent request stored the same recording first
+        existing = (await dedup.find_existing(db, contributor.id, [digest])).get(digest)
+        if existing is None:
+            raise
+        dedup.record_duplicates(race=True)
+        response.status_code = status.HTTP_200_OK
+        return SampleResponse(**existing, duplicate=True)
+    await fingerprints.insert_fingerprints(db, peaks)
+    
+    # Update contributor stats (atomic increment, last so the row lock is brief)
+    counts = await contributors.record_submissions(
+        db,
+        contributor.id,
+        contributor.api_key_hash,
+        total=1,
+        validated=int(sample.validated),
+    )
+    # Commit before anything outside the database sees the sample
+    await db.commit()
+    await counts.publish()
+    if sample.status == "pending":
+        await jobs.enqueue_features([(sample.id, contributor.id, contributor.api_key_hash)])
+    else:
+        similarity.add_rows([row])
     
     return SampleResponse(
         id=sample.id,
@@ -107,69 +141,444 @@ async def create_sample(
         vibration_length=sample.vibration_length,
         duration_seconds=sample.duration_seconds,
         validated=sample.validated,
+        status=sample.status,
         created_at=sample.created_at,
     )
 
 
+def _mark_duplicate(result: SampleBulkItemResult, existing: dict) -> None:
+    """Report a bulk item as the already stored sample `existing`."""
+    result.id = existing["id"]
+    result.validated = existing["validated"]
+    result.status = existing["status"]
+    result.errors = existing["validation_errors"]
+    result.duplicate = True
+
+
+@router.post(
+    "/bulk",
+    response_model=SampleBulkResponse,
+    summary="Submit many vibration samples",
+    description=(
+        f"Submit up to {settings.SAMPLES_BULK_MAX_ITEMS:,} samples in one request. "
+        "Each item is validated on its own: invalid items are reported by index "
+        "and skipped, recordings already stored are reported as duplicates, and "
+        "the rest are stored in a single insert."
+    ),
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": SampleBulkCreate.model_json_schema()}},
+        }
+    },
+)
+async def create_samples_bulk(
+    request: Request,
+    contributor: CurrentContributor,
+    db: DBSession,
+) -> SampleBulkResponse:
+    """
+    Submit many vibration samples.
+    
+    Features for all valid items are extracted in parallel batches across
+    the feature pool, the rows are inserted with one executemany, and the
+    contributor's counters are updated once.
+    """
+    try:
+        items = json.loads(await request.body())["samples"]
+        if not isinstance(items, list):
+            raise TypeError
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail='Body must be a JSON object with a "samples" array',
+        )
+    if not 1 <= len(items) <= settings.SAMPLES_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"samples must contain 1 to {settings.SAMPLES_BULK_MAX_ITEMS} items",
+        )
+    
+    # Validate every item, keeping the valid ones
+    results = [SampleBulkItemResult(index=i) for i in range(len(items))]
+    accepted: list[tuple[int, SampleCreate, np.ndarray]] = []
+    for i, item in enumerate(items):
+        try:
+            data = SampleCreate.model_validate(item)
+        except ValidationError as e:
+            # Without the input: a bad item's vibration is not echoed back
+            results[i].errors = e.errors(include_url=False, include_context=False, include_input=False)
+            continue
+        accepted.append((i, data, np.asarray(data.vibration, dtype=float)))
+    
+    # Drop recordings already stored, or repeated earlier in this request
+    digests = {i: dedup.content_hash(vibration, data.sample_rate_hz) for i, data, vibration in accepted}
+    async with read_session() as rdb:
+        stored = await dedup.find_existing(rdb, contributor.id, list(set(digests.values())))
+    first_index: dict[str, int] = {}
+    repeats: list[tuple[int, int]] = []
+    fresh = []
+    for i, data, vibration in accepted:
+        digest = digests[i]
+        if digest in stored:
+            _mark_duplicate(results[i], stored[digest])
+        elif digest in first_index:
+            repeats.append((i, first_index[digest]))
+        else:
+            first_index[digest] = i
+            fresh.append((i, data, vibration))
+    accepted = fresh
+    
+    async with cpu_slot():
+        if jobs.is_background():
+            features = [ingest.PENDING_FEATURES] * len(accepted)
+        else:
+            features = await ingest.extract_ingest_features_many(
+                [(vibration, data.sample_rate_hz) for _, data, vibration in accepted]
+            )
+        
+        rows = []
+        for (i, data, vibration), item_features in zip(accepted, features):
+            row = ingest.build_sample_row(contributor.id, data, vibration, item_features, content_hash=digests[i])
+            rows.append(row)
+            results[i].id = row["id"]
+            results[i].validated = row["validated"]
+            results[i].status = row["status"]
+            results[i].errors = row["validation_errors"]
+        peaks = await fingerprints.compute_for_rows(rows) if rows else {}
+    
+    if len(accepted) < len(digests):
+        dedup.record_duplicates(len(digests) - len(accepted))
+    
+    if rows:
+        try:
+            async with db.begin_nested():
+                await db.execute(insert(Sample), rows)
+        except IntegrityError:
+            # A concurrent request stored some of these recordings first
+            raced = await dedup.find_existing(db, contributor.id, [row["content_hash"] for row in rows])
+            if not raced:
+                raise
+            for (i, _, _), row in zip(accepted, rows):
+                if row["content_hash"] in raced:
+                    _mark_duplicate(results[i], raced[row["content_hash"]])
+            dedup.record_duplicates(len(raced), race=True)
+            rows = [row for row in rows if row["content_hash"] not in raced]
+            peaks = {row["id"]: peaks[row["id"]] for row in rows if row["id"] in peaks}
+            if rows:
+                await db.execute(insert(Sample), rows)
+        await fingerprints.insert_fingerprints(db, peaks)
+        counts = await contributors.record_submissions(
+            db,
+            contributor.id,
+            contributor.api_key_hash,
+            total=len(rows),
+            validated=sum(row["validated"] for row in rows),
+        )
+        # Commit before anything outside the database sees the samples
+        await db.commit()
+        await counts.publish()
+        pending = [(row["id"], contributor.id, contributor.api_key_hash) for row in rows if row["status"] == "pending"]
+        if pending:
+            await jobs.enqueue_features(pending)
+        similarity.add_rows(rows)
+    
+    for i, first in repeats:
+        results[i] = results[first].model_copy(update={"index": i, "duplicate": True})
+    duplicates = sum(result.duplicate for result in results)
+    
+    return SampleBulkResponse(
+        created=len(rows),
+        rejected=len(items) - len(rows) - duplicates,
+        duplicates=duplicates,
+        results=results,
+    )
+
+
+@router.post(
+    "/similar",
+    response_model=SimilarSamplesResponse,
+    summary="Find similar samples",
+    description=(
+        "Find the stored samples whose features are nearest to a vibration or to "
+        "a stored sample, optionally only within a material, source or device. "
+        "Large collections are searched approximately unless `exact` is set."
+    ),
+)
+async def find_similar_samples(
+    payload: SimilarSamplesRequest,
+    contributor: CurrentContributor,
+    db: ReadDBSession,
+) -> SimilarSamplesResponse:
+    """Find the k nearest stored samples by standardized feature vector."""
+    if payload.sample_id is not None:
+        query = similarity.get_index().vector_of(payload.sample_id)
+        if query is None:
+            row = (await db.execute(
+                select(*(getattr(Sample, column) for column in ingest.FEATURE_COLUMNS.values()))
+                .where(Sample.id == payload.sample_id)
+            )).one_or_none()
+            if row is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Sample not found",
+                )
+            query = similarity.feature_vector(row._mapping)
+            if query is None:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Sample has no extracted features",
+                )
+    
+    async with cpu_slot():
+        if payload.sample_id is None:
+            try:
+                features = await run_on_signal(
+                    ingest.compute_feature_columns,
+                    np.asarray(payload.vibration, dtype=float),
+                    payload.sample_rate_hz,
+                )
+            except Exception as e:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=f"Could not compute features: {e}",
+                )
+            query = similarity.feature_vector(features)
+            if query is None:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Could not compute features: non-finite values",
+                )
+        
+        neighbors, method = await similarity.search(
+            query,
+            payload.k,
+            material=payload.material and payload.material.lower(),
+            source=payload.source and payload.source.lower(),
+            device=payload.device,
+            exclude=payload.sample_id,
+            exact=payload.exact,
+        )
+    return SimilarSamplesResponse(
+        results=[SimilarSample(**vars(neighbor)) for neighbor in neighbors],
+        method=method,
+        indexed=similarity.get_index().size,
+    )
+
+
+@router.post(
+    "/match",
+    response_model=SampleMatchResponse,
+    summary="Identify a recording by fingerprint",
+    description=(
+        "Find the stored samples a recording most likely came from, by looking "
+        "up its spectral-peak fingerprints in the fingerprint index and ranking "
+        "samples by how many hashes line up at one offset. Recordings should use "
+        "the same sample rate as the stored samples."
+    ),
+)
+async def match_sample(
+    payload: SampleMatchRequest,
+    contributor: CurrentContributor,
+    db: ReadDBSession,
+) -> SampleMatchResponse:
+    """Rank stored samples by offset-aligned fingerprint votes."""
+    async with cpu_slot():
+        pairs = await run_on_signal(
+            ingest.compute_fingerprints,
+            np.asarray(payload.vibration, dtype=float),
+            payload.sample_rate_hz,
+        )
+    # The index lookups run without the CPU slot
+    matches, query_hashes = await fingerprints.match(
+        db,
+        pairs,
+        limit=payload.limit,
+        min_votes=payload.min_votes,
+    )
+    
+    details = {}
+    if matches:
+        result = await db.execute(
+            select(Sample.id, Sample.material, Sample.source, Sample.device)
+            .where(Sample.id.in_([m.sample_id for m in matches]))
+        )
+        details = {row.id: row for row in result}
+    
+    return SampleMatchResponse(
+        matches=[
+            SampleMatch(
+                id=m.sample_id,
+                votes=m.votes,
+                offset_frames=m.offset_frames,
+                material=details[m.sample_id].material,
+                source=details[m.sample_id].source,
+                device=details[m.sample_id].device,
+            )
+            for m in matches
+            if m.sample_id in details
+        ],
+        query_hashes=query_hashes,
+    )
+
+
+# Recent row counts per filter combination, so paging doesn't re-count
+_count_cache = TTLCache(ttl_seconds=settings.SAMPLE_COUNT_CACHE_SECONDS)
+
+
+def _encode_cursor(created_at: datetime, sample_id: UUID) -> str:
+    """Opaque keyset cursor pointing just past (created_at, id)."""
+    raw = json.dumps({"t": created_at.isoformat(), "id": sample_id.hex})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data["t"]), UUID(data["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid cursor",
+        )
+
+
+async def _count_samples(db: DBSession, filters: list, cache_key: tuple, exact: bool) -> tuple[int, bool]:
+    """
+    Count samples matching the filters.
+    
+    Returns:
+        Tuple of (count, whether it was computed just now). Unless `exact`
+        is set, a recently cached count is reused, and on PostgreSQL the
+        unfiltered total comes from the planner's row estimate.
+    """
+    if not exact:
+        cached = _count_cache.get(cache_key)
+        if cached is not None:
+            return cached, False
+        if not filters and db.get_bind().dialect.name == "postgresql":
+            estimate = await db.scalar(
+                text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'samples'")
+            )
+            if estimate is not None and estimate >= 0:
+                return int(estimate), False
+    
+    total = await db.scalar(select(func.count(Sample.id)).where(*filters)) or 0
+    _count_cache.set(cache_key, total)
+    return total, True
+
+
 @router.get(
     "",
     response_model=SampleListResponse,
     summary="List samples",
-    description="Get a paginated list of samples with optional filters.",
+    description=(
+        "Get a list of samples, newest first, with optional filters. "
+        "Pass `next_cursor` from the previous response as `cursor` to page "
+        "efficiently; `page` is kept for compatibility but gets slower on "
+        "deep pages. `total` is cached or estimated unless `exact_total` is set. "
+        "The `min_*`/`max_*` feature ranges are inclusive and exclude samples "
+        "whose features have not been extracted."
+    ),
 )
 async def list_samples(
     db: DBSession,
     material: Optional[str] = Query(None, description="Filter by material"),
     source: Optional[str] = Query(None, description="Filter by source"),
     validated: Optional[bool] = Query(None, description="Filter by validation status"),
-    page: int = Query(1, ge=1, description="Page number"),
+    min_peak_freq: Optional[float] = Query(None, description="Minimum peak frequency (Hz)"),
+    max_peak_freq: Optional[float] = Query(None, description="Maximum peak frequency (Hz)"),
+    min_decay_rate: Optional[float] = Query(None, description="Minimum decay rate"),
+    max_decay_rate: Optional[float] = Query(None, description="Maximum decay rate"),
+    min_energy: Optional[float] = Query(None, description="Minimum signal energy"),
+    max_energy: Optional[float] = Query(None, description="Maximum signal energy"),
+    min_spectral_centroid: Optional[float] = Query(None, description="Minimum spectral centroid (Hz)"),
+    max_spectral_centroid: Optional[float] = Query(None, description="Maximum spectral centroid (Hz)"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous response's next_cursor"),
+    page: int = Query(1, ge=1, description="Page number (ignored when cursor is given)"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    exact_total: bool = Query(False, description="Compute an exact total instead of a cached/estimated one"),
 ) -> SampleListResponse:
-    """List samples with optional filtering and pagination."""
-    
-    # Build query
-    query = select(Sample)
+    """List samples with optional filtering and keyset or offset pagination."""
     
+    # Build filters
+    filters = []
     if material:
-        query = query.where(Sample.material == material.lower())
+        filters.append(Sample.material == material.lower())
     if source:
-        query = query.where(Sample.source == source.lower())
+        filters.append(Sample.source == source.lower())
     if validated is not None:
-        query = query.where(Sample.validated == validated)
+        filters.append(Sample.validated == validated)
     
-    # Get total count
-    count_query = select(func.count()).select_from(query.subquery())
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
+    # Feature ranges, inclusive; each column has its own index
+    ranges = (
+        (Sample.peak_frequency_hz, min_peak_freq, max_peak_freq),
+        (Sample.decay_rate, min_decay_rate, max_decay_rate),
+        (Sample.energy, min_energy, max_energy),
+        (Sample.spectral_centroid, min_spectral_centroid, max_spectral_centroid),
+    )
+    for column, low, high in ranges:
+        if low is not None:
+            filters.append(column >= low)
+        if high is not None:
+            filters.append(column <= high)
     
-    # Apply pagination
-    offset = (page - 1) * page_size
-    query = query.order_by(Sample.created_at.desc()).offset(offset).limit(page_size)
+    total, total_exact = await _count_samples(
+        db,
+        filters,
+        (
+            material and material.lower(),
+            source and source.lower(),
+            validated,
+            *(bound for _, low, high in ranges for bound in (low, high)),
+        ),
+        exact_total,
+    )
     
-    result = await db.execute(query)
-    samples = result.scalars().all()
-    
-    items = [
-        SampleListItem(
-            id=s.id,
-            material=s.material,
-            sample_rate_hz=s.sample_rate_hz,
-            vibration_length=s.vibration_length,
-            duration_seconds=s.duration_seconds,
-            source=s.source,
-            device=s.device,
-            validated=s.validated,
-            created_at=s.created_at,
+    # Project only the listed columns so vibration payloads are never read
+    query = (
+        select(
+            Sample.id,
+            Sample.material,
+            Sample.sample_rate_hz,
+            func.coalesce(Sample.vibration_length, 0).label("vibration_length"),
+            func.coalesce(Sample.duration_seconds, 0.0).label("duration_seconds"),
+            Sample.source,
+            Sample.device,
+            Sample.validated,
+            Sample.status,
+            Sample.peak_frequency_hz,
+            Sample.decay_rate,
+            Sample.energy,
+            Sample.spectral_centroid,
+            Sample.created_at,
         )
-        for s in samples
-    ]
+        .where(*filters)
+        .order_by(Sample.created_at.desc(), Sample.id.desc())
+        .limit(page_size + 1)
+    )
+    if cursor:
+        # Keyset: served from the (filter, created_at, id) indexes at any depth
+        created_at, sample_id = _decode_cursor(cursor)
+        # A plain tuple binds each value with its column's type (GUID bytes on SQLite)
+        query = query.where(tuple_(Sample.created_at, Sample.id) < (created_at, sample_id))
+    else:
+        query = query.offset((page - 1) * page_size)
+    
+    result = await db.execute(query)
+    rows = result.all()
+    has_next = len(rows) > page_size
+    items = [SampleListItem.model_validate(row._mapping) for row in rows[:page_size]]
     
     return SampleListResponse(
         items=items,
         total=total,
+        total_exact=total_exact,
         page=page,
         page_size=page_size,
-        has_next=(offset + len(items)) < total,
+        has_next=has_next,
+        next_cursor=_encode_cursor(items[-1].created_at, items[-1].id) if has_next else None,
     )
 
 
@@ -186,7 +595,9 @@ async def get_sample(
     """Get a sample by ID with full vibration data."""
     
     result = await db.execute(
-        select(Sample).where(Sample.id == sample_id)
+        select(Sample)
+        .options(undefer(Sample.vibration))
+        .where(Sample.id == sample_id)
     )
     sample = result.scalar_one_or_none()
     
@@ -0,0 +1,183 @@
+"""
+Streaming Prediction Router
+
+WebSocket endpoint for sensors that stream continuously. The client
+authenticates once, then sends binary frames of raw samples; the server
+cuts hop-spaced windows from the stream and pushes back a prediction for
+each one as soon as it is ready.
+
+Every window is a full feature extraction (model feature specs are
+whole-window functions such as spectra, so they are not updated
+incrementally), and each one takes a CPU admission slot like an HTTP
+prediction does. A window shed under load is reported as an error and
+the stream continues with the next one.
+"""
+
+import asyncio
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query, WebSocket, status
+
+from api.core.admission import cpu_slot
+from api.core.config import settings
+from api.core.payload import SAMPLE_DTYPES, decode_samples
+from api.deps import authenticate_api_key
+from api.services.inference import LoadedModel, extract_features, get_model, predict_batch
+
+router = APIRouter(tags=["Prediction"])
+
+
+class SlidingWindow:
+    """
+    Ring buffer that cuts fixed-size windows from a sample stream.
+
+    The first window is emitted once `window` samples have arrived, and a
+    new one every `hop` samples after that.
+    """
+
+    def __init__(self, window: int, hop: int):
+        self.window = window
+        self.hop = hop
+        self.total = 0  # samples received so far
+        self._buffer = np.zeros(window, dtype=np.float64)
+        self._pos = 0  # next write index
+        self._filled = 0
+        self._since_emit = 0
+
+    def _write(self, chunk: np.ndarray) -> None:
+        first = min(len(chunk), self.window - self._pos)
+        self._buffer[self._pos:self._pos + first] = chunk[:first]
+        self._buffer[:len(chunk) - first] = chunk[first:]
+        self._pos = (self._pos + len(chunk)) % self.window
+
+    def _snapshot(self) -> np.ndarray:
+        return np.concatenate((self._buffer[self._pos:], self._buffer[:self._pos]))
+
+    def push(self, samples: np.ndarray) -> list[tuple[int, np.ndarray]]:
+        """
+        Add samples to the stream.
+
+        Returns:
+            List of (end sample index, window) for every window completed
+        """
+        completed = []
+        i = 0
+        while i < len(samples):
+            if self._filled < self.window:
+                need = self.window - self._filled
+            else:
+                need = self.hop - self._since_emit
+            chunk = samples[i:i + need]
+            self._write(chunk)
+            i += len(chunk)
+            self.total += len(chunk)
+
+            just_filled = self._filled < self.window and self._filled + len(chunk) == self.window
+            self._filled = min(self.window, self._filled + len(chunk))
+            self._since_emit += len(chunk)
+            if just_filled or (self._filled == self.window and self._since_emit >= self.hop):
+                completed.append((self.total, self._snapshot()))
+                self._since_emit = 0
+        return completed
+
+
+async def _predict_windows(
+    websocket: WebSocket,
+    windows: asyncio.Queue,
+    loaded: LoadedModel,
+    sample_rate_hz: float,
+) -> None:
+    """Consume completed windows and send a prediction for each."""
+    while True:
+        end, samples = await windows.get()
+        try:
+            async with cpu_slot():
+                features = await extract_features(loaded, samples, sample_rate_hz)
+                result = (await predict_batch(loaded, features.reshape(1, -1)))[0]
+        except HTTPException as e:
+            await websocket.send_json({"type": "error", "window_end": end, "detail": e.detail})
+            continue
+
+        await websocket.send_json({
+            "type": "prediction",
+            "window_start": end - len(samples),
+            "window_end": end,
+            **result.model_dump(),
+        })
+
+
+@router.websocket("/stream")
+async def predict_stream(
+    websocket: WebSocket,
+    sample_rate_hz: float = Query(..., gt=0, description="Samples per second"),
+    window: int = Query(settings.STREAM_DEFAULT_WINDOW, ge=10, le=100000, description="Samples per prediction window"),
+    hop: int | None = Query(None, ge=1, description="Samples between windows (defaults to window)"),
+    dtype: str = Query("float32", description="Sample encoding: float32, float64 or int16"),
+    scale: float | None = Query(None, description="Multiplier for raw values, e.g. g per int16 count"),
+    api_key: str | None = Query(None, description="API key, for clients that cannot set headers"),
+):
+    """
+    Stream samples and receive predictions.
+
+    Authenticate with an `Authorization: Bearer <key>` header or the
+    `api_key` query parameter, then send binary frames of little-endian
+    samples. Each completed window yields a JSON message of type
+    `prediction` (or `error`). When predictions fall behind, the server
+    stops reading frames until it catches up.
+    """
+    authorization = websocket.headers.get("Authorization", "")
+    if authorization.startswith("Bearer "):
+        api_key = authorization[7:]
+
+    contributor = None
+    if api_key:
+        contributor = await authenticate_api_key(api_key)
+    if contributor is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid API key")
+        return
+
+    hop = hop or window
+    if dtype not in SAMPLE_DTYPES or hop > window:
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION,
+            reason=f"dtype must be one of {', '.join(SAMPLE_DTYPES)} and hop <= window",
+        )
+        return
+
+    try:
+        loaded = get_model()
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason=e.detail)
+        return
+
+    await websocket.accept()
+
+    # Bounded so a client that sends faster than we compute is throttled
+    windows: asyncio.Queue = asyncio.Queue(maxsize=settings.STREAM_MAX_PENDING_WINDOWS)
+    sender = asyncio.create_task(_predict_windows(websocket, windows, loaded, sample_rate_hz))
+    windower = SlidingWindow(window, hop)
+
+    try:
+        while not sender.done():
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            data = message.get("bytes")
+            if data is None:
+                await websocket.send_json({"type": "error", "detail": "Send samples as binary frames"})
+                continue
+            try:
+                samples = decode_samples(data, dtype, scale)
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+                continue
+
+            for item in windower.push(samples):
+                put = asyncio.ensure_future(windows.put(item))
+                await asyncio.wait({put, sender}, return_when=asyncio.FIRST_COMPLETED)
+                if not put.done():
+                    put.cancel()
+                    break
+    finally:
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
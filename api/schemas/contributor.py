@@ -87,9 +87,17 @@ class LeaderboardEntry(BaseModel):
         from_attributes = True
 
 
+class ContributorRank(BaseModel):
+    """A contributor's own leaderboard position."""
+    
+    rank: int = Field(..., description="1 + contributors with more validated submissions")
+    validated_submissions: int
+    total_contributors: int
+
+
 class LeaderboardResponse(BaseModel):
     """Leaderboard response with top contributors."""
     
     entries: list[LeaderboardEntry]
     total_contributors: int
-    updated_at: datetime
+    updated_at: datetime = Field(..., description="When the cached ranking was loaded")
@@ -2,16 +2,24 @@
 Pydantic Schemas for Prediction endpoints.
 """
 
+from uuid import UUID
 from pydantic import BaseModel, Field
 
+from api.core.payload import MIN_VIBRATION_SAMPLES
 
-class PredictRequest(BaseModel):
-    """Request schema for material prediction."""
+
+class PredictMetadata(BaseModel):
+    """Prediction fields other than the vibration data (header of binary uploads)."""
     
-    vibration: list[float] = Field(..., min_length=10, description="Acceleration values (g)")
     sample_rate_hz: float = Field(..., gt=0, description="Samples per second")
 
 
+class PredictRequest(PredictMetadata):
+    """Request schema for material prediction."""
+    
+    vibration: list[float] = Field(..., min_length=MIN_VIBRATION_SAMPLES, description="Acceleration values (g)")
+
+
 class PredictResponse(BaseModel):
     """Response from material prediction."""
     
@@ -36,3 +44,23 @@ class ModelInfo(BaseModel):
     accuracy: float | None = Field(None, description="Evaluated accuracy")
     feature_config: dict | None = Field(None, description="Feature extraction configuration")
     created_at: str | None = None
+
+
+class PredictSamplesRequest(BaseModel):
+    """Request schema for predicting on already-stored samples."""
+    
+    sample_ids: list[UUID] = Field(..., min_length=1, max_length=100, description="IDs of stored samples")
+
+
+class PredictSampleResult(BaseModel):
+    """Prediction outcome for one stored sample."""
+    
+    sample_id: UUID
+    result: PredictResponse | None = Field(None, description="Prediction, if it succeeded")
+    error: str | None = Field(None, description="Why no prediction was made")
+
+
+class PredictSamplesResponse(BaseModel):
+    """Predictions for a batch of stored samples, in request order."""
+    
+    results: list[PredictSampleResult]
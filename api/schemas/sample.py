@@ -4,17 +4,19 @@ Pydantic Schemas for Sample endpoints.
 
 from datetime import datetime
 from uuid import UUID
-from pydantic import BaseModel, Field, field_validator
+import numpy as np
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from api.core.payload import MAX_VIBRATION_SAMPLES, MIN_VIBRATION_SAMPLES
 
 
 # --- Request Schemas ---
 
-class SampleCreate(BaseModel):
-    """Schema for submitting a new vibration sample."""
+class SampleMetadata(BaseModel):
+    """Sample fields other than the vibration data (header of binary uploads)."""
     
     # Required fields (matching DATA_FORMAT.md)
     material: str = Field(..., min_length=1, max_length=100, description="Material type, e.g., 'glass', 'oak_wood'")
-    vibration: list[float] = Field(..., min_length=10, description="Acceleration values (g) over time")
     sample_rate_hz: float = Field(..., gt=0, description="Samples per second")
     excitation: str = Field(..., description="How vibration was created: 'manual_tap', 'solenoid', 'ambient'")
     source: str = Field(..., description="Data source: 'real', 'simulation', 'phone_sensor'")
@@ -27,16 +29,6 @@ class SampleCreate(BaseModel):
     device: str | None = Field(None, max_length=100, description="Sensor used: 'ESP32+MPU6050', 'iPhone14', etc.")
     notes: str | None = Field(None, max_length=500, description="Additional notes")
     
-    @field_validator("vibration")
-    @classmethod
-    def validate_vibration(cls, v: list[float]) -> list[float]:
-        """Ensure vibration array contains valid numbers."""
-        if not all(isinstance(x, (int, float)) for x in v):
-            raise ValueError("vibration must contain only numbers")
-        if len(v) > 100000:
-            raise ValueError("vibration array too large (max 100,000 samples)")
-        return v
-    
     @field_validator("excitation")
     @classmethod
     def validate_excitation(cls, v: str) -> str:
@@ -57,6 +49,63 @@ class SampleCreate(BaseModel):
         return v.lower()
 
 
+class SampleCreate(SampleMetadata):
+    """Schema for submitting a new vibration sample."""
+    
+    vibration: list[float] = Field(..., min_length=MIN_VIBRATION_SAMPLES, description="Acceleration values (g) over time")
+    
+    @field_validator("vibration")
+    @classmethod
+    def validate_vibration(cls, v: list[float]) -> list[float]:
+        """Ensure vibration array contains valid numbers."""
+        if not all(isinstance(x, (int, float)) for x in v):
+            raise ValueError("vibration must contain only numbers")
+        if len(v) > MAX_VIBRATION_SAMPLES:
+            raise ValueError("vibration array too large (max 100,000 samples)")
+        return v
+
+
+class SimilarSamplesRequest(BaseModel):
+    """Schema for finding stored samples similar to a vibration or a stored sample."""
+    
+    sample_id: UUID | None = Field(None, description="Stored sample to find neighbours of")
+    vibration: list[float] | None = Field(
+        None, min_length=MIN_VIBRATION_SAMPLES, max_length=MAX_VIBRATION_SAMPLES, description="Acceleration values (g)"
+    )
+    sample_rate_hz: float | None = Field(None, gt=0, description="Samples per second (with vibration)")
+    k: int = Field(10, ge=1, le=100, description="Number of neighbours to return")
+    material: str | None = Field(None, description="Only return samples of this material")
+    source: str | None = Field(None, description="Only return samples from this source")
+    device: str | None = Field(None, description="Only return samples recorded with this device")
+    exact: bool = Field(False, description="Always scan every sample instead of approximate search")
+    
+    @model_validator(mode="after")
+    def check_query(self) -> "SimilarSamplesRequest":
+        """Require exactly one of sample_id or vibration (with its sample rate)."""
+        if (self.sample_id is None) == (self.vibration is None):
+            raise ValueError("provide exactly one of sample_id or vibration")
+        if self.vibration is not None and self.sample_rate_hz is None:
+            raise ValueError("sample_rate_hz is required with vibration")
+        return self
+
+
+class SampleMatchRequest(BaseModel):
+    """Schema for identifying the stored samples a recording came from."""
+    
+    vibration: list[float] = Field(
+        ..., min_length=MIN_VIBRATION_SAMPLES, max_length=MAX_VIBRATION_SAMPLES, description="Acceleration values (g)"
+    )
+    sample_rate_hz: float = Field(..., gt=0, description="Samples per second")
+    limit: int = Field(10, ge=1, le=100, description="Most matches to return")
+    min_votes: int = Field(3, ge=1, description="Aligned fingerprint hashes a match needs")
+
+
+class SampleBulkCreate(BaseModel):
+    """Schema for submitting many samples in one request."""
+    
+    samples: list[SampleCreate] = Field(..., min_length=1, description="Samples to submit")
+
+
 # --- Response Schemas ---
 
 class SampleResponse(BaseModel):
@@ -68,12 +117,34 @@ class SampleResponse(BaseModel):
     vibration_length: int
     duration_seconds: float
     validated: bool
+    status: str = Field("processed", description="Feature extraction status: pending, processed or failed")
+    duplicate: bool = Field(False, description="True if this recording was already stored; the existing sample is returned")
     created_at: datetime
     
     class Config:
         from_attributes = True
 
 
+class SampleBulkItemResult(BaseModel):
+    """Outcome of one item in a bulk submission."""
+    
+    index: int = Field(..., description="Position of the item in the request")
+    id: UUID | None = Field(None, description="Id of the stored sample, if it was stored")
+    validated: bool | None = Field(None, description="Whether feature extraction succeeded")
+    status: str | None = Field(None, description="Feature extraction status, if stored")
+    duplicate: bool = Field(False, description="True if the recording was already stored under `id`")
+    errors: list | None = Field(None, description="Why the item was rejected or failed validation")
+
+
+class SampleBulkResponse(BaseModel):
+    """Response after a bulk submission."""
+    
+    created: int
+    rejected: int
+    duplicates: int = Field(0, description="Items already stored, answered with the existing sample")
+    results: list[SampleBulkItemResult]
+
+
 class SampleDetail(BaseModel):
     """Full sample details including vibration data."""
     
@@ -91,10 +162,29 @@ class SampleDetail(BaseModel):
     device: str | None
     notes: str | None
     validated: bool
+    status: str = "processed"
+    validation_errors: list | None = None
     peak_frequency_hz: float | None
     energy: float | None
+    decay_rate: float | None = None
+    spectral_centroid: float | None = None
+    spectral_bandwidth: float | None = None
+    zcr: float | None = None
+    peak_freq_1: float | None = None
+    peak_freq_2: float | None = None
+    peak_freq_3: float | None = None
+    ac_lag_s: float | None = None
+    feature_set_fingerprint: str | None = None
     created_at: datetime
     
+    @field_validator("vibration", mode="before")
+    @classmethod
+    def vibration_to_list(cls, v):
+        """Stored vibrations load as NumPy arrays."""
+        if isinstance(v, np.ndarray):
+            return v.tolist()
+        return v
+    
     class Config:
         from_attributes = True
 
@@ -110,6 +200,11 @@ class SampleListItem(BaseModel):
     source: str
     device: str | None
     validated: bool
+    status: str = "processed"
+    peak_frequency_hz: float | None = None
+    decay_rate: float | None = None
+    energy: float | None = None
+    spectral_centroid: float | None = None
     created_at: datetime
     
     class Config:
@@ -121,6 +216,44 @@ class SampleListResponse(BaseModel):
     
     items: list[SampleListItem]
     total: int
+    total_exact: bool = Field(True, description="False if total is cached or estimated")
     page: int
     page_size: int
     has_next: bool
+    next_cursor: str | None = Field(None, description="Pass as `cursor` to fetch the next page")
+
+
+class SimilarSample(BaseModel):
+    """A stored sample and its distance from the query."""
+    
+    id: UUID
+    distance: float = Field(..., description="Distance between standardized feature vectors")
+    material: str
+    source: str
+    device: str | None
+
+
+class SimilarSamplesResponse(BaseModel):
+    """Nearest stored samples, closest first."""
+    
+    results: list[SimilarSample]
+    method: str = Field(..., description="'exact' (every sample scanned) or 'ivf' (approximate)")
+    indexed: int = Field(..., description="Samples in the search index")
+
+
+class SampleMatch(BaseModel):
+    """A stored sample whose fingerprints line up with the query."""
+    
+    id: UUID
+    votes: int = Field(..., description="Query hashes found in the sample at one consistent offset")
+    offset_frames: int = Field(..., description="STFT frames from the query's start to the aligned point in the sample")
+    material: str
+    source: str
+    device: str | None
+
+
+class SampleMatchResponse(BaseModel):
+    """Fingerprint matches, most votes first."""
+    
+    matches: list[SampleMatch]
+    query_hashes: int = Field(..., description="Distinct fingerprint hashes looked up")
@@ -0,0 +1,119 @@
+"""
+Contributors Service
+
+Maintains contributor submission counters with atomic SQL increments
+(`UPDATE ... SET x = x + n ... RETURNING`) rather than read-modify-write
+on an ORM row, so concurrent uploads from one key neither lose updates
+nor wait on a row loaded earlier in the request.
+
+Side effects outside the database (stats counters, leaderboard, cached
+identity) are returned with the new counts and only applied by the caller
+once the transaction has committed, so a rollback never leaves them ahead
+of the stored rows.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.models.contributor import Contributor
+from api.models.tier import ContributorTier
+from api.services import counters, identity, leaderboard
+
+
+@dataclass(frozen=True)
+class SubmissionCounts:
+    """A contributor's counters after an update, and the submissions added."""
+
+    contributor_id: UUID
+    api_key_hash: str
+    added_total: int
+    added_validated: int
+    total_submissions: int
+    validated_submissions: int
+    tier: ContributorTier
+    last_activity_at: datetime
+
+    async def publish(self) -> None:
+        """Update the stats counters, leaderboard and cached identity; call after commit."""
+        await identity.update_counts(
+            self.api_key_hash,
+            self.total_submissions,
+            self.validated_submissions,
+            self.tier,
+            self.last_activity_at,
+        )
+        await counters.record_samples(self.added_total, self.added_validated)
+        if self.added_validated:
+            await leaderboard.record_score(self.contributor_id, self.validated_submissions)
+
+
+# Tiers from lowest to highest, in declaration order
+_TIER_RANK = {tier: rank for rank, tier in enumerate(ContributorTier)}
+
+
+async def record_submissions(
+    db: AsyncSession,
+    contributor_id: UUID,
+    api_key_hash: str,
+    total: int,
+    validated: int,
+) -> SubmissionCounts:
+    """
+    Add newly stored samples to a contributor's counters.
+
+    Increments the counters in one statement and promotes the tier if the
+    returned validated count crosses a threshold; tiers are never lowered
+    here, so a tier granted by other means is kept. Call `publish()` on the
+    result once the transaction has committed.
+
+    Call after the samples are added, as late in the transaction as
+    possible: the row stays locked until commit.
+
+    Args:
+        db: Session holding the inserts
+        contributor_id: Contributor to update
+        api_key_hash: Their key hash, to refresh the cached identity
+        total: Samples stored
+        validated: How many of them passed validation
+    """
+    result = await db.execute(
+        update(Contributor)
+        .where(Contributor.id == contributor_id)
+        .values(
+            total_submissions=Contributor.total_submissions + total,
+            validated_submissions=Contributor.validated_submissions + validated,
+            last_activity_at=datetime.utcnow(),
+        )
+        .returning(
+            Contributor.total_submissions,
+            Contributor.validated_submissions,
+            Contributor.tier,
+            Contributor.last_activity_at,
+        )
+    )
+    total_count, validated_count, tier, last_activity_at = result.one()
+
+    if validated:
+        new_tier = ContributorTier.from_submission_count(validated_count)
+        if _TIER_RANK[new_tier] > _TIER_RANK[tier]:
+            await db.execute(
+                update(Contributor)
+                .where(Contributor.id == contributor_id)
+                .values(tier=new_tier)
+            )
+            tier = new_tier
+
+    return SubmissionCounts(
+        contributor_id=contributor_id,
+        api_key_hash=api_key_hash,
+        added_total=total,
+        added_validated=validated,
+        total_submissions=total_count,
+        validated_submissions=validated_count,
+        tier=tier,
+        last_activity_at=last_activity_at,
+    )
@@ -0,0 +1,177 @@
+"""
+Counters Service
+
+Keeps the public database statistics (total samples, validated samples,
+contributors) up to date incrementally, so /api/v1/stats never has to
+count tables.
+
+Counters live in Redis when REDIS_URL is set, giving every worker the
+same view; otherwise each worker keeps its own copy in memory. Either way
+they are periodically reconciled against real COUNT queries to correct
+drift (rolled-back inserts, writes made outside the API, other workers).
+"""
+
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from api.core.cache import TTLCache
+from api.core.config import settings
+from api.core.database import primary_read_session
+from api.core.redis import get_redis
+from api.models.contributor import Contributor
+from api.models.sample import Sample
+
+COUNTER_NAMES = ("total_samples", "validated_samples", "total_contributors")
+
+_REDIS_KEY = "rdb:counters"
+_REDIS_RECONCILE_LOCK = "rdb:counters:reconcile"
+
+
+class MemoryCounterStore:
+    """Per-worker counters."""
+
+    def __init__(self):
+        self._values = {name: 0 for name in COUNTER_NAMES}
+
+    async def incr(self, name: str, amount: int = 1) -> None:
+        self._values[name] += amount
+
+    async def get_all(self) -> dict[str, int]:
+        return dict(self._values)
+
+    async def set_all(self, values: dict[str, int]) -> None:
+        self._values.update(values)
+
+    async def acquire_reconcile(self) -> bool:
+        return True
+
+
+class RedisCounterStore:
+    """Counters in a Redis hash shared by all workers."""
+
+    def __init__(self, client):
+        self._client = client
+
+    async def incr(self, name: str, amount: int = 1) -> None:
+        await self._client.hincrby(_REDIS_KEY, name, amount)
+
+    async def get_all(self) -> dict[str, int]:
+        values = await self._client.hgetall(_REDIS_KEY)
+        return {name: int(values.get(name, 0)) for name in COUNTER_NAMES}
+
+    async def set_all(self, values: dict[str, int]) -> None:
+        await self._client.hset(_REDIS_KEY, mapping=values)
+
+    async def acquire_reconcile(self) -> bool:
+        # Only one worker per interval needs to run the COUNT queries
+        ttl = max(1, int(settings.STATS_RECONCILE_SECONDS * 0.9))
+        return bool(await self._client.set(_REDIS_RECONCILE_LOCK, "1", nx=True, ex=ttl))
+
+
+_store = None
+_snapshot = TTLCache(ttl_seconds=settings.STATS_CACHE_SECONDS, max_entries=1)
+_reconcile_task: asyncio.Task | None = None
+_last_reconcile: dict = {"at": None, "drift": {}}
+
+
+def get_store():
+    """Get the counter store for this worker."""
+    global _store
+    if _store is None:
+        client = get_redis()
+        _store = RedisCounterStore(client) if client is not None else MemoryCounterStore()
+    return _store
+
+
+async def record_samples(total: int, validated: int) -> None:
+    """Count newly stored samples, `validated` of which passed validation."""
+    store = get_store()
+    await store.incr("total_samples", total)
+    if validated:
+        await store.incr("validated_samples", validated)
+
+
+async def record_validation(count: int = 1) -> None:
+    """Count samples that became validated after they were stored."""
+    await get_store().incr("validated_samples", count)
+
+
+async def record_contributor() -> None:
+    """Count a newly registered contributor."""
+    await get_store().incr("total_contributors")
+
+
+async def get_counters() -> dict[str, int]:
+    """Current counters, served from a short-lived in-process snapshot."""
+    values = _snapshot.get("counters")
+    if values is None:
+        values = await get_store().get_all()
+        _snapshot.set("counters", values)
+    return values
+
+
+async def reconcile(force: bool = False) -> dict[str, int] | None:
+    """
+    Reset counters from real COUNT queries.
+
+    Returns:
+        The reconciled values, or None if another worker holds the
+        reconciliation lock for this interval
+    """
+    store = get_store()
+    if not force and not await store.acquire_reconcile():
+        return None
+
+    async with primary_read_session() as session:
+        values = {
+            "total_samples": await session.scalar(select(func.count(Sample.id))) or 0,
+            "validated_samples": await session.scalar(
+                select(func.count(Sample.id)).where(Sample.validated == True)  # noqa: E712
+            ) or 0,
+            "total_contributors": await session.scalar(select(func.count(Contributor.id))) or 0,
+        }
+
+    previous = await store.get_all()
+    await store.set_all(values)
+    _snapshot.invalidate()
+    if _last_reconcile["at"] is not None:
+        _last_reconcile["drift"] = {name: values[name] - previous[name] for name in COUNTER_NAMES}
+    _last_reconcile["at"] = datetime.utcnow().isoformat()
+    return values
+
+
+async def stats() -> dict:
+    """Counter values plus backend and reconciliation details, for /metrics."""
+    return {
+        "backend": "redis" if isinstance(get_store(), RedisCounterStore) else "memory",
+        "values": await get_counters(),
+        "last_reconciled_at": _last_reconcile["at"],
+        "last_drift": _last_reconcile["drift"],
+    }
+
+
+async def _reconcile_periodically() -> None:
+    while True:
+        await asyncio.sleep(settings.STATS_RECONCILE_SECONDS)
+        try:
+            await reconcile()
+        except Exception as e:
+            print(f"⚠️  Counter reconciliation failed: {e}")
+
+
+async def start() -> None:
+    """Load initial counters and start periodic reconciliation. Call on startup."""
+    global _reconcile_task
+    await reconcile(force=True)
+    _reconcile_task = asyncio.create_task(_reconcile_periodically())
+
+
+async def stop() -> None:
+    """Stop periodic reconciliation. Call on shutdown."""
+    global _reconcile_task
+    if _reconcile_task is not None:
+        _reconcile_task.cancel()
+        await asyncio.gather(_reconcile_task, return_exceptions=True)
+        _reconcile_task = None
@@ -0,0 +1,70 @@
+"""
+Dedup Service
+
+Recognizes re-submitted recordings before any feature extraction or
+insert. Each sample stores a content hash of its vibration and sample
+rate, unique per contributor, so a retried upload or a repeated
+recording resolves to the sample already stored instead of creating a
+copy (and counting towards the contributor's submissions again).
+"""
+
+import hashlib
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.models.sample import Sample
+
+_stats = {"duplicates": 0, "races": 0}
+
+
+def content_hash(vibration: np.ndarray, sample_rate_hz: float) -> str:
+    """
+    Canonical SHA-256 of a recording: its values as little-endian float64
+    followed by the sample rate, so JSON and binary uploads of the same
+    signal hash alike.
+    """
+    digest = hashlib.sha256(np.ascontiguousarray(vibration, dtype="<f8").tobytes())
+    digest.update(np.float64(sample_rate_hz).astype("<f8").tobytes())
+    return digest.hexdigest()
+
+
+async def find_existing(db: AsyncSession, contributor_id: UUID, hashes: list[str]) -> dict[str, dict]:
+    """
+    A contributor's stored samples with the given content hashes.
+
+    Returns:
+        Content hash -> the stored sample's response fields
+    """
+    if not hashes:
+        return {}
+    result = await db.execute(
+        select(
+            Sample.content_hash,
+            Sample.id,
+            Sample.material,
+            Sample.sample_rate_hz,
+            func.coalesce(Sample.vibration_length, 0).label("vibration_length"),
+            func.coalesce(Sample.duration_seconds, 0.0).label("duration_seconds"),
+            Sample.validated,
+            Sample.status,
+            Sample.validation_errors,
+            Sample.created_at,
+        )
+        .where(Sample.contributor_id == contributor_id, Sample.content_hash.in_(hashes))
+    )
+    return {row.content_hash: dict(row._mapping) for row in result}
+
+
+def record_duplicates(count: int = 1, race: bool = False) -> None:
+    """Count submissions answered with an existing sample."""
+    _stats["duplicates"] += count
+    if race:
+        _stats["races"] += count
+
+
+def stats() -> dict:
+    """Duplicate submissions seen by this worker, for /metrics."""
+    return dict(_stats)
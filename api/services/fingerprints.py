@@ -0,0 +1,129 @@
+"""
+Fingerprints Service
+
+Exact-match lookup of specific objects, Shazam style: each validated
+sample's spectral-peak pair hashes (python/features.compute_peak_fingerprints)
+are stored in the `sample_fingerprints` inverted index, and a query
+recording is matched by looking up its own hashes.
+
+Candidates are ranked by votes: a hash shared with a stored sample votes
+for that sample at the difference between the two frame offsets, and a
+sample's score is its largest vote count at a single offset. A genuine
+match lines up at one offset; coincidental shared hashes scatter.
+
+A lookup reads only the index entries of the query's strongest
+MAX_QUERY_HASHES hashes, so its cost depends on how many samples share
+those hashes rather than on the size of the samples table.
+"""
+
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from uuid import UUID
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.models.fingerprint import SampleFingerprint
+from api.services import ingest
+
+# Distinct hashes of a query that are looked up, strongest anchors first
+MAX_QUERY_HASHES = 256
+
+# Hashes per IN (...) lookup, and rows per executemany insert
+LOOKUP_CHUNK = 256
+INSERT_CHUNK = 5000
+
+# Index entries read per lookup at most; very common hashes carry little signal
+MAX_POSTINGS = 200_000
+
+
+@dataclass
+class Match:
+    """A stored sample sharing aligned fingerprints with the query."""
+
+    sample_id: UUID
+    votes: int
+    offset_frames: int
+
+
+async def insert_fingerprints(db: AsyncSession, fingerprints: dict[UUID, list[tuple[int, int]]]) -> int:
+    """Insert computed fingerprints per sample id; returns rows inserted."""
+    rows = [
+        {"hash": h, "sample_id": sample_id, "offset": offset}
+        for sample_id, pairs in fingerprints.items()
+        for h, offset in pairs
+    ]
+    for start in range(0, len(rows), INSERT_CHUNK):
+        await db.execute(insert(SampleFingerprint), rows[start:start + INSERT_CHUNK])
+    return len(rows)
+
+
+async def compute_for_rows(rows: list[dict]) -> dict[UUID, list[tuple[int, int]]]:
+    """
+    Fingerprints of new `samples` rows (as built by ingest.build_sample_row)
+    that passed validation, computed in the feature pool.
+
+    Computed before the rows' transaction starts, so CPU work never holds
+    a write transaction open.
+    """
+    rows = [row for row in rows if row["validated"]]
+    computed = await ingest.extract_fingerprints_many([(row["vibration"], row["sample_rate_hz"]) for row in rows])
+    return {row["id"]: pairs for row, pairs in zip(rows, computed)}
+
+
+async def replace_fingerprints(db: AsyncSession, fingerprints: dict[UUID, list[tuple[int, int]]]) -> int:
+    """Replace the stored fingerprints of samples, e.g. when re-extracting features."""
+    if fingerprints:
+        await db.execute(delete(SampleFingerprint).where(SampleFingerprint.sample_id.in_(list(fingerprints))))
+    return await insert_fingerprints(db, fingerprints)
+
+
+async def match(
+    db: AsyncSession,
+    pairs: list[tuple[int, int]],
+    limit: int,
+    min_votes: int,
+) -> tuple[list[Match], int]:
+    """
+    Stored samples whose fingerprints line up with a recording's.
+
+    Args:
+        pairs: The recording's (hash, frame offset) pairs, from
+            ingest.compute_fingerprints
+
+    Returns:
+        Tuple of (matches with at least `min_votes`, most votes first;
+        number of distinct query hashes looked up)
+    """
+    query_offsets: dict[int, list[int]] = defaultdict(list)
+    for h, offset in pairs:
+        if h in query_offsets or len(query_offsets) < MAX_QUERY_HASHES:
+            query_offsets[h].append(offset)
+    if not query_offsets:
+        return [], 0
+
+    hashes = list(query_offsets)
+    votes: Counter[tuple[UUID, int]] = Counter()
+    read = 0
+    for start in range(0, len(hashes), LOOKUP_CHUNK):
+        result = await db.execute(
+            select(SampleFingerprint.hash, SampleFingerprint.sample_id, SampleFingerprint.offset)
+            .where(SampleFingerprint.hash.in_(hashes[start:start + LOOKUP_CHUNK]))
+            .limit(MAX_POSTINGS - read)
+        )
+        rows = result.all()
+        read += len(rows)
+        for h, sample_id, offset in rows:
+            for query_offset in query_offsets[h]:
+                votes[(sample_id, offset - query_offset)] += 1
+        if read >= MAX_POSTINGS:
+            break
+
+    best: dict[UUID, Match] = {}
+    for (sample_id, offset), count in votes.items():
+        current = best.get(sample_id)
+        if current is None or count > current.votes:
+            best[sample_id] = Match(sample_id=sample_id, votes=count, offset_frames=offset)
+
+    ranked = sorted((m for m in best.values() if m.votes >= min_votes), key=lambda m: -m.votes)
+    return ranked[:limit], len(hashes)
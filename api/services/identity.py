@@ -0,0 +1,168 @@
+"""
+Identity Service
+
+Resolves API key hashes to a lightweight, cacheable `AuthIdentity`
+instead of a `Contributor` ORM row, so authentication costs one
+projected query per key per TTL, or none on a cache hit.
+
+Identities are cached in Redis when REDIS_URL is set, so every worker
+sees invalidations (e.g. `regenerate-key`) immediately. Without Redis
+each worker keeps its own cache, and a regenerated key can keep working
+on other workers for up to IDENTITY_CACHE_SECONDS.
+
+New submissions update a cached identity's counters in place rather than
+evicting it, so active uploaders keep authenticating from the cache.
+"""
+
+import json
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import select
+
+from api.core.cache import TTLCache
+from api.core.config import settings
+from api.core.database import primary_read_session
+from api.core.redis import get_redis
+from api.models.contributor import Contributor, TierProgressMixin
+from api.models.tier import ContributorTier
+
+_REDIS_PREFIX = "rdb:identity:"
+
+_local = TTLCache(ttl_seconds=settings.IDENTITY_CACHE_SECONDS, max_entries=10_000)
+
+
+@dataclass(frozen=True)
+class AuthIdentity(TierProgressMixin):
+    """The authenticated contributor as seen by request handlers."""
+    
+    id: UUID
+    api_key_hash: str
+    email: str
+    display_name: str | None
+    github_username: str | None
+    tier: ContributorTier
+    total_submissions: int
+    validated_submissions: int
+    created_at: datetime
+    last_activity_at: datetime | None
+    
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["id"] = self.id.hex
+        data["tier"] = self.tier.value
+        data["created_at"] = self.created_at.isoformat()
+        data["last_activity_at"] = self.last_activity_at.isoformat() if self.last_activity_at else None
+        return json.dumps(data)
+    
+    @classmethod
+    def from_json(cls, raw: str) -> "AuthIdentity":
+        data = json.loads(raw)
+        data["id"] = UUID(data["id"])
+        data["tier"] = ContributorTier(data["tier"])
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        if data["last_activity_at"]:
+            data["last_activity_at"] = datetime.fromisoformat(data["last_activity_at"])
+        return cls(**data)
+
+
+# Columns selected on a cache miss; never the ORM entity or its relationships
+_IDENTITY_COLUMNS = (
+    Contributor.id,
+    Contributor.api_key_hash,
+    Contributor.email,
+    Contributor.display_name,
+    Contributor.github_username,
+    Contributor.tier,
+    Contributor.total_submissions,
+    Contributor.validated_submissions,
+    Contributor.created_at,
+    Contributor.last_activity_at,
+)
+
+
+async def _cache_get(key_hash: str) -> AuthIdentity | None:
+    client = get_redis()
+    if client is None:
+        return _local.get(key_hash)
+    raw = await client.get(_REDIS_PREFIX + key_hash)
+    return AuthIdentity.from_json(raw) if raw else None
+
+
+async def _cache_set(identity: AuthIdentity) -> None:
+    client = get_redis()
+    if client is None:
+        _local.set(identity.api_key_hash, identity)
+    else:
+        await client.set(
+            _REDIS_PREFIX + identity.api_key_hash,
+            identity.to_json(),
+            ex=max(1, int(settings.IDENTITY_CACHE_SECONDS)),
+        )
+
+
+async def get_identity(key_hash: str) -> AuthIdentity | None:
+    """
+    Resolve an API key hash to an identity, or None if no contributor has it.
+    
+    Misses are read from the primary, never a replica, so a lagging replica
+    cannot re-cache a key that was just regenerated.
+    """
+    identity = await _cache_get(key_hash)
+    if identity is not None:
+        return identity
+    
+    async with primary_read_session() as db:
+        result = await db.execute(select(*_IDENTITY_COLUMNS).where(Contributor.api_key_hash == key_hash))
+        row = result.one_or_none()
+    if row is None:
+        return None
+    
+    identity = AuthIdentity(**row._asdict())
+    await _cache_set(identity)
+    return identity
+
+
+async def update_counts(
+    key_hash: str,
+    total_submissions: int,
+    validated_submissions: int,
+    tier: ContributorTier,
+    last_activity_at: datetime,
+) -> None:
+    """
+    Refresh the counters of a cached identity after new submissions.
+    
+    Keeps the entry's expiry, so a regenerated key still ages out of other
+    workers' caches, and never replaces newer counts with older ones when
+    concurrent submissions publish out of order. Not cached: nothing to do.
+    """
+    cached = await _cache_get(key_hash)
+    if cached is None or (cached.total_submissions, cached.validated_submissions) > (
+        total_submissions,
+        validated_submissions,
+    ):
+        return
+    updated = replace(
+        cached,
+        total_submissions=total_submissions,
+        validated_submissions=validated_submissions,
+        tier=tier,
+        last_activity_at=last_activity_at,
+    )
+    client = get_redis()
+    if client is None:
+        _local.replace(key_hash, updated)
+    else:
+        # XX: not if it was invalidated meanwhile; KEEPTTL: same expiry
+        await client.set(_REDIS_PREFIX + key_hash, updated.to_json(), xx=True, keepttl=True)
+
+
+async def invalidate(key_hash: str) -> None:
+    """Drop a cached identity, e.g. after its key changes."""
+    client = get_redis()
+    if client is None:
+        _local.invalidate(key_hash)
+    else:
+        await client.delete(_REDIS_PREFIX + key_hash)
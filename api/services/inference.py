@@ -0,0 +1,205 @@
+"""
+Inference Service
+
+Loads the trained material classifier and runs feature extraction and
+prediction on its behalf. Shared by the prediction endpoints so that raw
+vibration uploads and stored samples go through the same pipeline.
+"""
+
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import joblib
+from fastapi import HTTPException, status
+
+from api.core.config import settings
+from api.core.executors import run_on_signal, thread_pool
+from api.schemas.predict import PredictResponse
+
+# Import feature extraction from existing code
+import sys
+ROOT = Path(__file__).resolve().parent.parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from python.features import compute_feature_vector
+from python.preprocess import PreprocessConfig
+
+# Cache loaded model
+_model_cache: dict = {}
+
+
+def load_model(model_path: str = None):
+    """Load and cache the trained model."""
+    path = model_path or settings.DEFAULT_MODEL_PATH
+    full_path = ROOT / path
+
+    if path not in _model_cache:
+        if not full_path.exists():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Model not found: {path}",
+            )
+
+        try:
+            model_data = joblib.load(full_path)
+            _model_cache[path] = model_data
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Failed to load model: {e}",
+            )
+
+    return _model_cache[path]
+
+
+@dataclass(frozen=True)
+class FeatureSpec:
+    """Feature extraction settings a model expects its input to be built with."""
+
+    preprocess: dict | None = None
+    extra: bool = True
+    top_k_peaks: int = 3
+
+    @property
+    def names(self) -> list[str]:
+        """Feature names in the order `compute_feature_vector` produces them."""
+        names = ["peak_freq", "decay_rate", "energy"]
+        if self.extra:
+            names.extend(["spectral_centroid", "spectral_bandwidth", "zcr"])
+            names.extend([f"peak_freq_{i+1}" for i in range(self.top_k_peaks)])
+            names.append("ac_lag_s")
+        return names
+
+    @property
+    def fingerprint(self) -> str:
+        """Short stable hash identifying this configuration.
+
+        Stored next to persisted feature vectors so they are only reused
+        when they were computed with the same settings.
+        """
+        payload = json.dumps(asdict(self), sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def extract(self, vibration: np.ndarray, sample_rate_hz: float) -> np.ndarray:
+        """Compute the feature vector for one signal."""
+        if self.preprocess:
+            return compute_feature_vector(
+                vibration,
+                sample_rate_hz,
+                config=PreprocessConfig(**self.preprocess),
+                extra=self.extra,
+                top_k_peaks=self.top_k_peaks,
+            )
+        return compute_feature_vector(
+            vibration,
+            sample_rate_hz,
+            extra=self.extra,
+            top_k_peaks=self.top_k_peaks,
+        )
+
+
+@dataclass
+class LoadedModel:
+    """A classifier together with the feature settings it was trained on."""
+
+    model: Any
+    spec: FeatureSpec
+
+
+def get_model() -> LoadedModel:
+    """Load the default model and resolve its feature configuration."""
+    model_data = load_model()
+
+    # Handle both old (just model) and new (dict with metadata) formats
+    if isinstance(model_data, dict):
+        model = model_data.get("model")
+        config = model_data.get("config", {})
+        # Get feature config to determine what extras are needed
+        feature_config = config.get("features", {})
+        spec = FeatureSpec(
+            preprocess=config.get("preprocess"),
+            extra=feature_config.get("extra", True),  # Default to True for trained models
+            top_k_peaks=feature_config.get("top_k_peaks", 3),
+        )
+    else:
+        model = model_data
+        spec = FeatureSpec()  # Assume trained model uses extras
+
+    if model is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Invalid model format",
+        )
+
+    return LoadedModel(model=model, spec=spec)
+
+
+async def extract_features(
+    loaded: LoadedModel,
+    vibration: np.ndarray,
+    sample_rate_hz: float,
+) -> np.ndarray:
+    """Compute model features in the feature pool, mapping failures to a 422 response."""
+    try:
+        return await run_on_signal(loaded.spec.extract, vibration, sample_rate_hz)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Feature extraction failed: {e}",
+        )
+
+
+def _classify(model: Any, features: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
+    """Run the classifier, returning predictions and probabilities if available."""
+    predictions = model.predict(features)
+    proba = model.predict_proba(features) if hasattr(model, "predict_proba") else None
+    return predictions, proba
+
+
+async def predict_batch(loaded: LoadedModel, features: np.ndarray) -> list[PredictResponse]:
+    """
+    Classify a batch of feature vectors in the thread pool.
+
+    Args:
+        loaded: Model and feature spec from `get_model()`
+        features: 2D array with one feature vector per row
+
+    Returns:
+        One PredictResponse per row, in input order
+    """
+    model = loaded.model
+    try:
+        predictions, proba = await thread_pool.run(_classify, model, features)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Prediction failed: {e}",
+        )
+
+    names = loaded.spec.names
+    classes = [str(c) for c in getattr(model, "classes_", [])]
+    responses = []
+    for row, prediction in enumerate(predictions):
+        if proba is not None:
+            probabilities = {c: float(p) for c, p in zip(classes, proba[row])}
+            confidence = float(max(proba[row]))
+        else:
+            probabilities = None
+            confidence = 0.8  # Default for models without probability
+
+        responses.append(PredictResponse(
+            prediction=str(prediction),
+            confidence=confidence,
+            probabilities=probabilities,
+            features={
+                name: float(value)
+                for name, value in zip(names, features[row])
+            },
+        ))
+
+    return responses
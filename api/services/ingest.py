@@ -0,0 +1,211 @@
+"""
+Ingest Service
+
+Turns validated sample uploads into `samples` rows: extracts the features
+stored with each sample and builds the column values to insert. Shared by
+single and bulk submission so both store samples identically.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import uuid
+from datetime import datetime
+from pathlib import Path
+from uuid import UUID
+
+import numpy as np
+
+from api.core.executors import feature_pool, run_on_signal
+from api.schemas.sample import SampleMetadata
+
+# Import feature extraction from existing code
+import sys
+ROOT = Path(__file__).resolve().parent.parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from python.features import compute_features, compute_peak_fingerprints
+
+# Largest number of signals handed to one executor task in a batch
+MAX_SIGNALS_PER_TASK = 64
+
+# Feature name (python/features.py) -> samples column storing it
+FEATURE_COLUMNS = {
+    "peak_freq": "peak_frequency_hz",
+    "decay_rate": "decay_rate",
+    "energy": "energy",
+    "spectral_centroid": "spectral_centroid",
+    "spectral_bandwidth": "spectral_bandwidth",
+    "zcr": "zcr",
+    "peak_freq_1": "peak_freq_1",
+    "peak_freq_2": "peak_freq_2",
+    "peak_freq_3": "peak_freq_3",
+    "ac_lag_s": "ac_lag_s",
+}
+
+# Settings passed to compute_features for the stored feature set. Bump
+# FEATURE_SET_VERSION whenever python/features.py changes what these
+# settings produce, so samples computed before the change are re-extracted
+# by `python -m api.commands.backfill_features`.
+FEATURE_SET_CONFIG = {"extra": True, "top_k_peaks": 3}
+FEATURE_SET_VERSION = 1
+
+# Settings for the spectral-peak hashes in `sample_fingerprints`
+FINGERPRINT_CONFIG = {"frame_size": 512, "hop": 256, "peaks_per_frame": 3, "fan_out": 5, "freq_step_hz": 5.0}
+
+FEATURE_SET_FINGERPRINT = hashlib.sha256(
+    json.dumps(
+        {
+            "version": FEATURE_SET_VERSION,
+            "config": FEATURE_SET_CONFIG,
+            "columns": FEATURE_COLUMNS,
+            "fingerprints": FINGERPRINT_CONFIG,
+        },
+        sort_keys=True,
+    ).encode()
+).hexdigest()[:16]
+
+_NO_FEATURES = dict.fromkeys(FEATURE_COLUMNS.values())
+
+
+def compute_feature_columns(vibration: np.ndarray, sample_rate_hz: float) -> dict:
+    """
+    Stored feature columns for one signal, tagged with the feature set
+    fingerprint.
+    
+    Raises:
+        Exception: If the features cannot be computed
+    """
+    features = compute_features(vibration, sample_rate_hz, **FEATURE_SET_CONFIG)
+    return {
+        **{column: features[name] for name, column in FEATURE_COLUMNS.items()},
+        "feature_set_fingerprint": FEATURE_SET_FINGERPRINT,
+    }
+
+
+def compute_fingerprints(vibration: np.ndarray, sample_rate_hz: float) -> list[tuple[int, int]]:
+    """Spectral-peak (hash, frame offset) pairs indexed for exact-match lookup."""
+    return compute_peak_fingerprints(vibration, sample_rate_hz, **FINGERPRINT_CONFIG)
+
+
+def compute_ingest_features(vibration: np.ndarray, sample_rate_hz: float) -> dict:
+    """
+    Features stored at ingest, plus the resulting validation status.
+    
+    A sample whose features cannot be computed is still stored, marked
+    not validated with the error recorded.
+    """
+    try:
+        features = compute_feature_columns(vibration, sample_rate_hz)
+    except Exception as e:
+        return {
+            **_NO_FEATURES,
+            "feature_set_fingerprint": None,
+            "validated": False,
+            "validation_errors": [str(e)],
+        }
+    return {
+        **features,
+        "validated": True,
+        "validation_errors": None,
+    }
+
+
+# Stored in place of features when extraction is left to the job queue
+PENDING_FEATURES = {
+    **_NO_FEATURES,
+    "feature_set_fingerprint": None,
+    "validated": False,
+    "validation_errors": None,
+    "status": "pending",
+}
+
+
+def compute_stored_features(vibration: np.ndarray, sample_rate_hz: float, spec=None) -> dict:
+    """
+    Ingest features plus, when a model feature spec is given, the model's
+    feature vector, so later predictions on the sample can reuse it.
+    
+    Args:
+        spec: `api.services.inference.FeatureSpec` of the current model
+    """
+    features = compute_ingest_features(vibration, sample_rate_hz)
+    if spec is not None and features["validated"]:
+        features["feature_vector"] = spec.extract(vibration, sample_rate_hz).tolist()
+        features["feature_fingerprint"] = spec.fingerprint
+    return features
+
+
+def _compute_ingest_features_batch(signals: list[tuple[np.ndarray, float]]) -> list[dict]:
+    return [compute_ingest_features(vibration, sample_rate_hz) for vibration, sample_rate_hz in signals]
+
+
+def _compute_fingerprints_batch(signals: list[tuple[np.ndarray, float]]) -> list[list[tuple[int, int]]]:
+    return [compute_fingerprints(vibration, sample_rate_hz) for vibration, sample_rate_hz in signals]
+
+
+async def _map_signals(batch_func, signals: list[tuple[np.ndarray, float]]) -> list:
+    """
+    Apply a per-batch function to many signals in the feature pool, in input order.
+    
+    Signals are split into a few chunks per pool worker, so each executor
+    task amortizes its IPC overhead over many signals while every worker
+    stays busy.
+    """
+    if not signals:
+        return []
+    pool = feature_pool()
+    per_task = min(MAX_SIGNALS_PER_TASK, max(1, math.ceil(len(signals) / (pool.max_workers * 4))))
+    chunks = [signals[i:i + per_task] for i in range(0, len(signals), per_task)]
+    results = await asyncio.gather(*(pool.run(batch_func, chunk) for chunk in chunks))
+    return [item for chunk in results for item in chunk]
+
+
+async def extract_ingest_features(vibration: np.ndarray, sample_rate_hz: float) -> dict:
+    """Ingest features for one sample, computed in the feature pool."""
+    return await run_on_signal(compute_ingest_features, vibration, sample_rate_hz)
+
+
+async def extract_ingest_features_many(signals: list[tuple[np.ndarray, float]]) -> list[dict]:
+    """Ingest features for many samples, in input order."""
+    return await _map_signals(_compute_ingest_features_batch, signals)
+
+
+async def extract_fingerprints_many(signals: list[tuple[np.ndarray, float]]) -> list[list[tuple[int, int]]]:
+    """Spectral-peak fingerprints for many samples, in input order."""
+    if len(signals) == 1:
+        return [await run_on_signal(compute_fingerprints, *signals[0])]
+    return await _map_signals(_compute_fingerprints_batch, signals)
+
+
+def build_sample_row(
+    contributor_id: UUID,
+    meta: SampleMetadata,
+    vibration: np.ndarray,
+    features: dict,
+    content_hash: str | None = None,
+) -> dict:
+    """Column values for a new `samples` row, including its id and timestamp."""
+    return {
+        "id": uuid.uuid4(),
+        "contributor_id": contributor_id,
+        "content_hash": content_hash,
+        "material": meta.material,
+        "vibration": vibration,
+        "vibration_length": len(vibration),
+        "duration_seconds": len(vibration) / meta.sample_rate_hz,
+        "sample_rate_hz": meta.sample_rate_hz,
+        "excitation": meta.excitation,
+        "source": meta.source,
+        "temperature_c": meta.temperature_c,
+        "thickness_mm": meta.thickness_mm,
+        "load_g": meta.load_g,
+        "mounting": meta.mounting,
+        "device": meta.device,
+        "notes": meta.notes,
+        "created_at": datetime.utcnow(),
+        "status": "processed",
+        **features,
+    }
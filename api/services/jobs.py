@@ -0,0 +1,380 @@
+"""
+Jobs Service
+
+Background feature extraction for samples stored with status "pending"
+(FEATURE_EXTRACTION_MODE=background), so uploads return without waiting
+for the DSP.
+
+Jobs go through a queue: Redis when REDIS_URL is set (shared by all
+workers), otherwise an in-process asyncio queue, which also serves as the
+stand-in for tests. Each worker runs JOB_WORKERS consumers that compute
+the full feature set, set validated/validation_errors, and update the
+contributor counters.
+
+Infrastructure failures are retried with exponential backoff up to
+JOB_MAX_ATTEMPTS; after that the sample is marked "failed" and the job is
+moved to a dead-letter list. A signal whose features cannot be computed
+is not an infrastructure failure: it is stored as processed and not
+validated, as with inline extraction.
+
+The database is the source of truth: pending samples without a queued
+job are re-enqueued on startup, and a job only takes effect if its sample
+is still pending, so duplicate or replayed jobs are harmless.
+
+With Redis, a consumer moves each job to a processing list (BLMOVE) and
+removes it once handled. Jobs left there by a worker that crashed are put
+back on the queue when a worker next starts; until then they wait, like
+the pending samples they belong to.
+"""
+
+import asyncio
+import json
+from collections import deque
+from functools import partial
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+
+from api.core.config import settings
+from api.core.database import primary_read_session, write_session
+from api.core.executors import run_on_signal
+from api.core.redis import get_redis
+from api.models.contributor import Contributor
+from api.models.sample import Sample
+from api.services import contributors, fingerprints, ingest, similarity
+from api.services.inference import get_model
+
+_REDIS_QUEUE = "rdb:jobs:features"
+_REDIS_DEAD = "rdb:jobs:features:dead"
+_REDIS_PROCESSING = "rdb:jobs:features:processing"
+_REDIS_RECOVERY_LOCK = "rdb:jobs:features:recovering"
+
+# Workers starting within this window leave pending-sample recovery to the
+# first of them (the Redis queue only)
+RECOVERY_LOCK_SECONDS = 60
+
+# Dead-lettered jobs kept in memory (the in-process queue only)
+MAX_DEAD_LETTERS = 1000
+
+
+class MemoryJobQueue:
+    """In-process queue; jobs are lost on restart and recovered from the database."""
+
+    def __init__(self):
+        self._queue: asyncio.Queue | None = None
+        self.dead: deque[dict] = deque(maxlen=MAX_DEAD_LETTERS)
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    async def enqueue(self, job: dict) -> None:
+        self.queue.put_nowait(job)
+
+    async def dequeue(self, timeout: float) -> dict | None:
+        # Not asyncio.wait_for: on Python 3.11 it can time out just after
+        # get() took a job, which would then be lost
+        getter = asyncio.ensure_future(self.queue.get())
+        try:
+            await asyncio.wait({getter}, timeout=timeout)
+        except asyncio.CancelledError:
+            self._abandon(getter)
+            raise
+        if not getter.done():
+            self._abandon(getter)
+            return None
+        return getter.result()
+
+    def _abandon(self, getter: asyncio.Future) -> None:
+        """Stop waiting, putting back a job taken meanwhile (or not yet delivered)."""
+        getter.cancel()
+        getter.add_done_callback(
+            lambda g: g.cancelled() or g.exception() is not None or self.queue.put_nowait(g.result())
+        )
+
+    async def ack(self, job: dict) -> None:
+        pass
+
+    async def recover(self) -> int:
+        return 0
+
+    async def enqueue_missing(self, jobs: list[dict]) -> int:
+        """Enqueue jobs for pending samples; the in-process queue starts empty."""
+        for job in jobs:
+            await self.enqueue(job)
+        return len(jobs)
+
+    async def dead_letter(self, job: dict) -> None:
+        self.dead.append(job)
+
+    async def sizes(self) -> dict[str, int]:
+        return {"queued": self.queue.qsize(), "dead": len(self.dead)}
+
+
+class RedisJobQueue:
+    """Redis lists shared by all workers."""
+
+    def __init__(self, client):
+        self._client = client
+
+    async def enqueue(self, job: dict) -> None:
+        await self._client.lpush(_REDIS_QUEUE, json.dumps(job))
+
+    async def dequeue(self, timeout: float) -> dict | None:
+        item = await self._client.blmove(
+            _REDIS_QUEUE, _REDIS_PROCESSING, max(1, int(timeout)), src="RIGHT", dest="LEFT"
+        )
+        return json.loads(item) if item else None
+
+    async def ack(self, job: dict) -> None:
+        """Remove a dequeued job from the processing list once it is handled."""
+        # Jobs round-trip through json unchanged, so this is the stored value
+        await self._client.lrem(_REDIS_PROCESSING, 1, json.dumps(job))
+
+    async def recover(self) -> int:
+        """
+        Put jobs left in the processing list back on the queue.
+
+        Also catches jobs other live workers are running right now; those
+        run twice, which is harmless.
+        """
+        recovered = 0
+        while await self._client.lmove(_REDIS_PROCESSING, _REDIS_QUEUE, src="RIGHT", dest="RIGHT"):
+            recovered += 1
+        return recovered
+
+    async def enqueue_missing(self, jobs: list[dict]) -> int:
+        """
+        Enqueue the jobs whose samples have none queued or in progress.
+
+        The queue outlives workers, so only samples whose job was never
+        enqueued (e.g. Redis was briefly unreachable) are missing; one
+        worker per recovery window checks, rather than each starting
+        worker adding the whole backlog again.
+        """
+        if not await self._client.set(_REDIS_RECOVERY_LOCK, "1", nx=True, ex=RECOVERY_LOCK_SECONDS):
+            return 0
+        queued = {
+            json.loads(item)["sample_id"]
+            for key in (_REDIS_QUEUE, _REDIS_PROCESSING)
+            for item in await self._client.lrange(key, 0, -1)
+        }
+        missing = [job for job in jobs if job["sample_id"] not in queued]
+        for job in missing:
+            await self.enqueue(job)
+        return len(missing)
+
+    async def dead_letter(self, job: dict) -> None:
+        await self._client.lpush(_REDIS_DEAD, json.dumps(job))
+
+    async def sizes(self) -> dict[str, int]:
+        return {
+            "queued": await self._client.llen(_REDIS_QUEUE),
+            "processing": await self._client.llen(_REDIS_PROCESSING),
+            "dead": await self._client.llen(_REDIS_DEAD),
+        }
+
+
+_queue = None
+_workers: list[asyncio.Task] = []
+_retries: set[asyncio.Task] = set()
+_stats = {"processed": 0, "retried": 0, "dead_lettered": 0, "skipped": 0}
+
+
+def get_queue():
+    """Get the job queue for this worker."""
+    global _queue
+    if _queue is None:
+        client = get_redis()
+        _queue = RedisJobQueue(client) if client is not None else MemoryJobQueue()
+    return _queue
+
+
+def is_background() -> bool:
+    """Whether new samples leave feature extraction to the job queue."""
+    return settings.FEATURE_EXTRACTION_MODE == "background"
+
+
+async def enqueue_features(samples: list[tuple[UUID, UUID, str]]) -> None:
+    """
+    Queue feature extraction for committed, pending samples.
+
+    Args:
+        samples: (sample id, contributor id, contributor's API key hash)
+    """
+    queue = get_queue()
+    for job in _jobs(samples):
+        await queue.enqueue(job)
+
+
+def _jobs(samples: list[tuple[UUID, UUID, str]]) -> list[dict]:
+    """First-attempt jobs for (sample id, contributor id, API key hash)."""
+    return [
+        {
+            "sample_id": sample_id.hex,
+            "contributor_id": contributor_id.hex,
+            "api_key_hash": api_key_hash,
+            "attempt": 1,
+        }
+        for sample_id, contributor_id, api_key_hash in samples
+    ]
+
+
+def _feature_spec():
+    """The current model's feature spec, or None if no model is available."""
+    try:
+        return get_model().spec
+    except HTTPException:
+        return None
+
+
+async def _process(job: dict) -> None:
+    sample_id = UUID(job["sample_id"])
+
+    async with primary_read_session() as db:
+        row = (await db.execute(
+            select(
+                Sample.status,
+                Sample.sample_rate_hz,
+                Sample.material,
+                Sample.source,
+                Sample.device,
+                Sample.created_at,
+            ).where(Sample.id == sample_id)
+        )).one_or_none()
+        # Duplicate and replayed jobs stop here, before reading the signal
+        if row is None or row.status != "pending":
+            _stats["skipped"] += 1
+            return
+        vibration = await db.scalar(select(Sample.vibration).where(Sample.id == sample_id))
+
+    features = await run_on_signal(
+        partial(ingest.compute_stored_features, spec=_feature_spec()),
+        vibration,
+        row.sample_rate_hz,
+    )
+    peaks = await fingerprints.compute_for_rows([{
+        "id": sample_id,
+        "vibration": vibration,
+        "sample_rate_hz": row.sample_rate_hz,
+        "validated": features["validated"],
+    }])
+
+    async with write_session() as db:
+        result = await db.execute(
+            update(Sample)
+            .where(Sample.id == sample_id, Sample.status == "pending")
+            .values(**features, status="processed")
+        )
+        if result.rowcount:
+            await fingerprints.replace_fingerprints(db, peaks)
+            counts = await contributors.record_submissions(
+                db,
+                UUID(job["contributor_id"]),
+                job["api_key_hash"],
+                total=0,
+                validated=int(features["validated"]),
+            )
+    if result.rowcount:
+        await counts.publish()
+        similarity.add_rows([{
+            **features,
+            "id": sample_id,
+            "material": row.material,
+            "source": row.source,
+            "device": row.device,
+            "created_at": row.created_at,
+        }])
+    _stats["processed"] += 1
+
+
+async def _retry_later(job: dict, delay: float) -> None:
+    await asyncio.sleep(delay)
+    await get_queue().enqueue({**job, "attempt": job["attempt"] + 1})
+    # Only now, so a crash during the delay leaves it to be recovered
+    await get_queue().ack(job)
+
+
+async def _fail(job: dict, error: str) -> None:
+    """Give up on a job: mark its sample failed and dead-letter it."""
+    async with write_session() as db:
+        await db.execute(
+            update(Sample)
+            .where(Sample.id == UUID(job["sample_id"]), Sample.status == "pending")
+            .values(status="failed", validation_errors=[error])
+        )
+    await get_queue().dead_letter({**job, "error": error})
+    _stats["dead_lettered"] += 1
+
+
+async def _worker() -> None:
+    queue = get_queue()
+    while True:
+        job = await queue.dequeue(timeout=5.0)
+        if job is None:
+            continue
+        try:
+            await _process(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if job["attempt"] < settings.JOB_MAX_ATTEMPTS:
+                _stats["retried"] += 1
+                delay = settings.JOB_RETRY_BASE_SECONDS * 2 ** (job["attempt"] - 1)
+                task = asyncio.create_task(_retry_later(job, delay))
+                _retries.add(task)
+                task.add_done_callback(_retries.discard)
+                continue
+            print(f"⚠️  Feature job for sample {job['sample_id']} failed permanently: {e}")
+            try:
+                await _fail(job, str(e))
+            except Exception as fail_error:
+                print(f"⚠️  Could not dead-letter job for sample {job['sample_id']}: {fail_error}")
+        try:
+            await queue.ack(job)
+        except Exception as e:
+            print(f"⚠️  Could not acknowledge job for sample {job['sample_id']}: {e}")
+
+
+async def recover_pending() -> int:
+    """Enqueue pending samples that have no job, e.g. after a restart lost the in-process queue."""
+    async with primary_read_session() as db:
+        result = await db.execute(
+            select(Sample.id, Sample.contributor_id, Contributor.api_key_hash)
+            .join(Contributor, Contributor.id == Sample.contributor_id)
+            .where(Sample.status == "pending")
+        )
+        pending = [tuple(row) for row in result]
+    return await get_queue().enqueue_missing(_jobs(pending))
+
+
+async def stats() -> dict:
+    """Queue sizes and job outcomes, for /metrics."""
+    return {
+        "backend": "redis" if isinstance(get_queue(), RedisJobQueue) else "memory",
+        "mode": settings.FEATURE_EXTRACTION_MODE,
+        **await get_queue().sizes(),
+        **_stats,
+    }
+
+
+async def start() -> None:
+    """Recover pending samples and start consumers. Call on startup."""
+    requeued = await get_queue().recover()
+    if requeued:
+        print(f"🔁 Re-queued {requeued} feature jobs left unfinished by a stopped worker")
+    recovered = await recover_pending()
+    if recovered:
+        print(f"🔁 Re-enqueued {recovered} samples pending feature extraction")
+    _workers.extend(asyncio.create_task(_worker()) for _ in range(settings.JOB_WORKERS))
+
+
+async def stop() -> None:
+    """Stop consumers. Unfinished samples stay pending and are recovered on startup."""
+    for task in [*_workers, *_retries]:
+        task.cancel()
+    await asyncio.gather(*_workers, *_retries, return_exceptions=True)
+    _workers.clear()
@@ -0,0 +1,232 @@
+"""
+Leaderboard Service
+
+Ranks contributors by validated submissions without scanning the
+contributors table per request.
+
+Scores live in a Redis sorted set when REDIS_URL is set; otherwise each
+worker keeps a sorted list of scores and answers rank lookups by
+bisection. Either way a lookup is O(log n). Scores are updated as
+`validated_submissions` changes and periodically rebuilt from the
+database, which bounds how stale another worker's view can be.
+
+Ranks use competition ranking: a contributor's rank is one plus the
+number of contributors with strictly more validated submissions.
+"""
+
+import asyncio
+import bisect
+from dataclasses import dataclass
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import select
+
+from api.core.cache import TTLCache
+from api.core.config import settings
+from api.core.database import primary_read_session, read_session
+from api.core.redis import get_redis
+from api.models.contributor import Contributor
+
+# Top-N is cached once at this size and sliced per request
+MAX_TOP_N = 100
+
+_REDIS_KEY = "rdb:leaderboard"
+_REDIS_REFRESH_LOCK = "rdb:leaderboard:refresh"
+
+
+@dataclass(frozen=True)
+class Rank:
+    """A contributor's position on the leaderboard."""
+
+    rank: int
+    validated_submissions: int
+    total_contributors: int
+
+
+class MemoryLeaderboard:
+    """Per-worker sorted scores with bisect rank lookups."""
+
+    def __init__(self):
+        self._scores: dict[str, int] = {}
+        self._sorted: list[int] = []
+
+    async def rebuild(self, scores: dict[str, int]) -> None:
+        self._scores = dict(scores)
+        self._sorted = sorted(scores.values())
+
+    async def set_score(self, member: str, score: int) -> None:
+        old = self._scores.get(member)
+        if old is not None:
+            del self._sorted[bisect.bisect_left(self._sorted, old)]
+        self._scores[member] = score
+        bisect.insort(self._sorted, score)
+
+    async def rank(self, member: str) -> Rank | None:
+        score = self._scores.get(member)
+        if score is None:
+            return None
+        above = len(self._sorted) - bisect.bisect_right(self._sorted, score)
+        return Rank(rank=above + 1, validated_submissions=score, total_contributors=len(self._sorted))
+
+    async def acquire_refresh(self) -> bool:
+        return True
+
+
+class RedisLeaderboard:
+    """Scores in a Redis sorted set shared by all workers."""
+
+    def __init__(self, client):
+        self._client = client
+
+    async def rebuild(self, scores: dict[str, int]) -> None:
+        # Build under a temporary key and swap it in atomically
+        staging = f"{_REDIS_KEY}:staging"
+        pipe = self._client.pipeline(transaction=False)
+        pipe.delete(staging)
+        items = list(scores.items())
+        for start in range(0, len(items), 1000):
+            pipe.zadd(staging, dict(items[start:start + 1000]))
+        if items:
+            pipe.rename(staging, _REDIS_KEY)
+        else:
+            pipe.delete(_REDIS_KEY)
+        await pipe.execute()
+
+    async def set_score(self, member: str, score: int) -> None:
+        await self._client.zadd(_REDIS_KEY, {member: score})
+
+    async def rank(self, member: str) -> Rank | None:
+        score = await self._client.zscore(_REDIS_KEY, member)
+        if score is None:
+            return None
+        pipe = self._client.pipeline(transaction=False)
+        pipe.zcount(_REDIS_KEY, f"({score}", "+inf")
+        pipe.zcard(_REDIS_KEY)
+        above, total = await pipe.execute()
+        return Rank(rank=above + 1, validated_submissions=int(score), total_contributors=total)
+
+    async def acquire_refresh(self) -> bool:
+        ttl = max(1, int(settings.LEADERBOARD_REFRESH_SECONDS * 0.9))
+        return bool(await self._client.set(_REDIS_REFRESH_LOCK, "1", nx=True, ex=ttl))
+
+
+_board = None
+_top = TTLCache(ttl_seconds=settings.LEADERBOARD_CACHE_SECONDS, max_entries=1)
+_refresh_task: asyncio.Task | None = None
+
+
+def get_board():
+    """Get the leaderboard backend for this worker."""
+    global _board
+    if _board is None:
+        client = get_redis()
+        _board = RedisLeaderboard(client) if client is not None else MemoryLeaderboard()
+    return _board
+
+
+async def record_score(contributor_id: UUID, validated_submissions: int) -> None:
+    """Update a contributor's score after their validated count changes."""
+    await get_board().set_score(contributor_id.hex, validated_submissions)
+
+
+async def get_rank(contributor_id: UUID) -> Rank:
+    """Look up a contributor's rank in O(log n)."""
+    board = get_board()
+    rank = await board.rank(contributor_id.hex)
+    if rank is None:
+        # Registered since this worker last refreshed: load just this score
+        async with primary_read_session() as session:
+            score = await session.scalar(
+                select(Contributor.validated_submissions).where(Contributor.id == contributor_id)
+            )
+        await board.set_score(contributor_id.hex, score or 0)
+        rank = await board.rank(contributor_id.hex)
+    return rank
+
+
+async def get_top(limit: int) -> tuple[list[dict], datetime]:
+    """
+    Top contributors, served from a cache at most LEADERBOARD_CACHE_SECONDS old.
+
+    Returns:
+        Tuple of (entries with rank/display fields, time the cache was filled)
+    """
+    cached = _top.get("top")
+    if cached is None:
+        cached = (await _load_top(), datetime.utcnow())
+        _top.set("top", cached)
+    entries, updated_at = cached
+    return entries[:limit], updated_at
+
+
+async def _load_top() -> list[dict]:
+    async with read_session() as session:
+        result = await session.execute(
+            select(
+                Contributor.display_name,
+                Contributor.github_username,
+                Contributor.tier,
+                Contributor.validated_submissions,
+            )
+            .order_by(Contributor.validated_submissions.desc(), Contributor.id)
+            .limit(MAX_TOP_N)
+        )
+        rows = result.all()
+
+    entries = []
+    for i, row in enumerate(rows):
+        ties = entries and entries[-1]["validated_submissions"] == row.validated_submissions
+        entries.append({
+            "rank": entries[-1]["rank"] if ties else i + 1,
+            "display_name": row.display_name,
+            "github_username": row.github_username,
+            "tier": row.tier,
+            "validated_submissions": row.validated_submissions,
+        })
+    return entries
+
+
+async def refresh(force: bool = False) -> bool:
+    """
+    Rebuild scores from the database.
+
+    Returns:
+        True if rebuilt, False if another worker holds the refresh lock
+    """
+    board = get_board()
+    if not force and not await board.acquire_refresh():
+        return False
+
+    async with primary_read_session() as session:
+        result = await session.execute(select(Contributor.id, Contributor.validated_submissions))
+        scores = {row.id.hex: row.validated_submissions for row in result}
+
+    await board.rebuild(scores)
+    _top.invalidate()
+    return True
+
+
+async def _refresh_periodically() -> None:
+    while True:
+        await asyncio.sleep(settings.LEADERBOARD_REFRESH_SECONDS)
+        try:
+            await refresh()
+        except Exception as e:
+            print(f"⚠️  Leaderboard refresh failed: {e}")
+
+
+async def start() -> None:
+    """Build the leaderboard and start periodic refreshes. Call on startup."""
+    global _refresh_task
+    await refresh(force=True)
+    _refresh_task = asyncio.create_task(_refresh_periodically())
+
+
+async def stop() -> None:
+    """Stop periodic refreshes. Call on shutdown."""
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        await asyncio.gather(_refresh_task, return_exceptions=True)
+        _refresh_task = None
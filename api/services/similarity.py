@@ -0,0 +1,573 @@
+"""
+Similarity Service
+
+Answers "which stored samples vibrate most like this one?" from an
+in-memory index of the stored feature columns (ingest.FEATURE_COLUMNS)
+of every validated sample.
+
+Vectors are compared by Euclidean distance after standardizing each
+feature (energy on a log scale) with the mean and spread of the indexed
+samples. Small indexes are searched exactly by brute force; once an
+index reaches SIMILARITY_IVF_MIN_ROWS it also gets an inverted-file
+(IVF) partition into k-means cells, and queries only scan the
+SIMILARITY_IVF_NPROBE cells nearest to them.
+
+Each worker keeps its own index. It is loaded from a snapshot file (or
+built from the database) on startup, updated as this worker stores
+samples, and synced every SIMILARITY_SYNC_SECONDS with samples created
+by other workers, after which the snapshot is rewritten. The index is
+rebuilt from the database every SIMILARITY_REBUILD_SECONDS, or sooner
+once it has doubled in size, which also picks up samples whose features
+were extracted later by another worker.
+
+Besides the database URL, a snapshot records how many samples it holds
+and the newest of them (created_at, id). It is only loaded if that sample
+is still stored and at least as many indexable samples were created up to
+it, so a database recreated or restored at the same URL is not served
+stale ids.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import func, select
+
+from api.core.config import settings
+from api.core.database import read_session
+from api.core.executors import thread_pool
+from api.models.sample import Sample
+from api.services.ingest import FEATURE_COLUMNS, FEATURE_SET_FINGERPRINT
+
+_COLUMNS = list(FEATURE_COLUMNS.values())
+_ENERGY = _COLUMNS.index("energy")
+
+# Rows fetched per query while building from the database
+LOAD_CHUNK_ROWS = 50_000
+
+# Snapshots are only loaded into a worker using the database they came from
+_DATABASE_TAG = hashlib.sha256(settings.DATABASE_URL.encode()).hexdigest()[:16]
+
+# Samples the index holds: validated, with the current feature set
+_INDEXABLE = (
+    Sample.validated.is_(True),
+    Sample.feature_set_fingerprint == FEATURE_SET_FINGERPRINT,
+)
+
+# Syncs look back this far before the last sync, for rows committed late
+SYNC_OVERLAP = timedelta(minutes=5)
+
+# k-means iterations and training rows per cell when building IVF cells
+KMEANS_ITERATIONS = 10
+KMEANS_ROWS_PER_CELL = 64
+
+
+def _to_vector(values) -> np.ndarray:
+    """Feature values in column order, with energy on a log scale."""
+    vector = np.asarray(values, dtype=np.float64)
+    vector[_ENERGY] = np.log1p(max(vector[_ENERGY], 0.0))
+    return vector
+
+
+def feature_vector(row: dict) -> np.ndarray | None:
+    """Index vector for a row of feature columns, or None if any is missing."""
+    values = [row.get(column) for column in _COLUMNS]
+    if any(value is None or not np.isfinite(value) for value in values):
+        return None
+    return _to_vector(values)
+
+
+@dataclass
+class Neighbor:
+    """One search result."""
+
+    id: UUID
+    distance: float
+    material: str
+    source: str
+    device: str | None
+
+
+class _Vocabulary:
+    """Interns string values as small integer codes for cheap filter masks."""
+
+    def __init__(self, values: list | None = None):
+        self.values: list = list(values or [])
+        self._codes = {value: code for code, value in enumerate(self.values)}
+
+    def code(self, value) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value) -> int | None:
+        return self._codes.get(value)
+
+
+class _IVF:
+    """Inverted-file partition of the index rows into k-means cells."""
+
+    def __init__(self, centroids: np.ndarray, cells: list[np.ndarray], size: int):
+        self.centroids = centroids
+        self.cells = cells
+        self.size = size  # Rows covered by `cells`
+        self.extra: list[list[int]] = [[] for _ in cells]  # Rows added since
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, seed: int = 0) -> "_IVF":
+        n = len(vectors)
+        nlist = int(np.clip(np.sqrt(n), 16, 4096))
+        rng = np.random.default_rng(seed)
+        train = vectors[rng.choice(n, size=min(n, nlist * KMEANS_ROWS_PER_CELL), replace=False)]
+        centroids = train[rng.choice(len(train), size=nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            assign = cls._nearest(centroids, train)
+            for cell in range(nlist):
+                members = train[assign == cell]
+                if len(members):
+                    centroids[cell] = members.mean(axis=0)
+        assign = cls._nearest(centroids, vectors)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(nlist + 1))
+        cells = [order[bounds[i]:bounds[i + 1]] for i in range(nlist)]
+        return cls(centroids, cells, n)
+
+    @staticmethod
+    def _nearest(centroids: np.ndarray, vectors: np.ndarray, chunk: int = 65_536) -> np.ndarray:
+        out = np.empty(len(vectors), dtype=np.int64)
+        c_sq = np.einsum("ij,ij->i", centroids, centroids)
+        for start in range(0, len(vectors), chunk):
+            block = vectors[start:start + chunk]
+            out[start:start + chunk] = np.argmin(c_sq - 2 * block @ centroids.T, axis=1)
+        return out
+
+    def add(self, position: int, vector: np.ndarray) -> None:
+        cell = int(np.argmin(np.sum((self.centroids - vector) ** 2, axis=1)))
+        self.extra[cell].append(position)
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        distances = np.sum((self.centroids - query) ** 2, axis=1)
+        probe = np.argsort(distances)[:nprobe]
+        parts = [self.cells[cell] for cell in probe]
+        parts += [np.asarray(self.extra[cell], dtype=np.int64) for cell in probe if self.extra[cell]]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+
+class SimilarityIndex:
+    """Standardized feature vectors of stored samples, with filter codes."""
+
+    def __init__(self, capacity: int = 1024):
+        dims = len(_COLUMNS)
+        self.size = 0
+        self.ids: list[UUID] = []
+        self.positions: dict[UUID, int] = {}
+        self.raw = np.empty((capacity, dims), dtype=np.float64)
+        self.vectors = np.empty((capacity, dims), dtype=np.float32)
+        self.material = np.empty(capacity, dtype=np.int32)
+        self.source = np.empty(capacity, dtype=np.int32)
+        self.device = np.empty(capacity, dtype=np.int32)
+        self.vocab = {"material": _Vocabulary(), "source": _Vocabulary(), "device": _Vocabulary()}
+        self.mean = np.zeros(dims)
+        self.scale = np.ones(dims)
+        self.ivf: _IVF | None = None
+        self.synced_at: datetime | None = None
+        # Newest indexed sample as (created_at, id), checked when a snapshot is loaded
+        self.newest: tuple[datetime, UUID] | None = None
+
+    def __contains__(self, sample_id: UUID) -> bool:
+        return sample_id in self.positions
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self.raw)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        for name in ("raw", "vectors", "material", "source", "device"):
+            old = getattr(self, name)
+            new = np.empty((capacity, *old.shape[1:]), dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def standardize(self, vector: np.ndarray) -> np.ndarray:
+        return ((vector - self.mean) / self.scale).astype(np.float32)
+
+    def add(
+        self,
+        sample_id: UUID,
+        vector: np.ndarray,
+        material: str,
+        source: str,
+        device: str | None,
+        created_at: datetime | None = None,
+    ) -> None:
+        """Add a sample, or replace its vector if it is already indexed."""
+        position = self.positions.get(sample_id)
+        is_new = position is None
+        if is_new:
+            self._grow(self.size + 1)
+            position = self.size
+        self.raw[position] = vector
+        self.vectors[position] = self.standardize(vector)
+        self.material[position] = self.vocab["material"].code(material)
+        self.source[position] = self.vocab["source"].code(source)
+        self.device[position] = self.vocab["device"].code(device)
+        if is_new:
+            # Publish only once the row is complete; searches may run concurrently
+            self.ids.append(sample_id)
+            self.positions[sample_id] = position
+            self.size += 1
+            if self.ivf is not None:
+                self.ivf.add(position, self.vectors[position])
+        if created_at is not None and (self.newest is None or (created_at, sample_id) > self.newest):
+            self.newest = (created_at, sample_id)
+
+    def vector_of(self, sample_id: UUID) -> np.ndarray | None:
+        position = self.positions.get(sample_id)
+        return None if position is None else self.raw[position].copy()
+
+    def rebuild(self) -> None:
+        """Recompute the standardization and, for large indexes, the IVF cells."""
+        n = self.size
+        if n:
+            self.mean = self.raw[:n].mean(axis=0)
+            self.scale = self.raw[:n].std(axis=0)
+            self.scale[self.scale == 0] = 1.0
+            self.vectors[:n] = ((self.raw[:n] - self.mean) / self.scale).astype(np.float32)
+        self.ivf = _IVF.build(self.vectors[:n]) if n >= settings.SIMILARITY_IVF_MIN_ROWS else None
+
+    def _mask(self, filters: dict[str, str | None], positions: np.ndarray) -> np.ndarray | None:
+        """Rows among `positions` matching the filters, or None if a value was never seen."""
+        for name, value in filters.items():
+            if value is None:
+                continue
+            code = self.vocab[name].lookup(value)
+            if code is None:
+                return None
+            positions = positions[getattr(self, name)[positions] == code]
+        return positions
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        filters: dict[str, str | None],
+        exclude: UUID | None = None,
+        exact: bool = False,
+    ) -> tuple[list[Neighbor], str]:
+        """
+        Nearest samples to a (raw) query vector.
+
+        Returns:
+            Tuple of (neighbors, nearest first; "exact" or "ivf")
+        """
+        n, ivf = self.size, self.ivf
+        z = self.standardize(query)
+        excluded = self.positions.get(exclude) if exclude is not None else None
+
+        method = "exact"
+        positions = None
+        if ivf is not None and not exact:
+            positions = self._mask(filters, ivf.candidates(z, settings.SIMILARITY_IVF_NPROBE))
+            if positions is not None and excluded is not None:
+                positions = positions[positions != excluded]
+            if positions is not None and len(positions) >= k:
+                method = "ivf"
+            else:
+                positions = None  # Too few candidates nearby: scan everything
+        if positions is None:
+            positions = self._mask(filters, np.arange(n))
+            if positions is None:
+                return [], method
+            if excluded is not None:
+                positions = positions[positions != excluded]
+        if not len(positions):
+            return [], method
+
+        distances = np.sum((self.vectors[positions] - z) ** 2, axis=1)
+        if len(positions) > k:
+            top = np.argpartition(distances, k)[:k]
+        else:
+            top = np.arange(len(positions))
+        top = top[np.argsort(distances[top])]
+
+        vocab = self.vocab
+        return [
+            Neighbor(
+                id=self.ids[p],
+                distance=float(np.sqrt(distances[i])),
+                material=vocab["material"].values[self.material[p]],
+                source=vocab["source"].values[self.source[p]],
+                device=vocab["device"].values[self.device[p]],
+            )
+            for i, p in ((i, int(positions[i])) for i in top)
+        ], method
+
+    def stats(self) -> dict:
+        return {
+            "samples": self.size,
+            "ivf_cells": len(self.ivf.cells) if self.ivf is not None else 0,
+            "synced_at": self.synced_at.isoformat() if self.synced_at else None,
+        }
+
+    # --- Snapshots ---
+
+    def save(self, path: Path) -> None:
+        """Write atomically, so readers never see a partial snapshot."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        n = self.size
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                ids=np.frombuffer(b"".join(i.bytes for i in self.ids), dtype=np.uint8).reshape(n, 16),
+                raw=self.raw[:n],
+                material=self.material[:n],
+                source=self.source[:n],
+                device=self.device[:n],
+                meta=np.array(json.dumps({
+                    "fingerprint": FEATURE_SET_FINGERPRINT,
+                    "database": _DATABASE_TAG,
+                    "rows": n,
+                    "newest": [self.newest[0].isoformat(), self.newest[1].hex] if self.newest else None,
+                    "columns": _COLUMNS,
+                    "vocab": {name: vocab.values for name, vocab in self.vocab.items()},
+                    "synced_at": self.synced_at.isoformat() if self.synced_at else None,
+                })),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "SimilarityIndex | None":
+        """Load a snapshot, or None if missing or from another database or feature set."""
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data["meta"]))
+                if (
+                    meta["fingerprint"] != FEATURE_SET_FINGERPRINT
+                    or meta["database"] != _DATABASE_TAG
+                    or meta["columns"] != _COLUMNS
+                    or "newest" not in meta
+                ):
+                    return None
+                ids = data["ids"]
+                index = cls(capacity=max(1024, len(ids) * 2))
+                n = len(ids)
+                index.size = n
+                index.ids = [UUID(bytes=bytes(row)) for row in ids]
+                index.positions = {sample_id: i for i, sample_id in enumerate(index.ids)}
+                index.raw[:n] = data["raw"]
+                index.material[:n] = data["material"]
+                index.source[:n] = data["source"]
+                index.device[:n] = data["device"]
+        except (OSError, ValueError, KeyError):
+            return None
+        index.vocab = {name: _Vocabulary(values) for name, values in meta["vocab"].items()}
+        index.synced_at = datetime.fromisoformat(meta["synced_at"]) if meta["synced_at"] else None
+        if meta["newest"]:
+            index.newest = (datetime.fromisoformat(meta["newest"][0]), UUID(meta["newest"][1]))
+        return index
+
+
+_index = SimilarityIndex()
+_built_at = 0.0
+_built_size = 0
+_saved_size = -1
+_sync_task: asyncio.Task | None = None
+
+
+def get_index() -> SimilarityIndex:
+    return _index
+
+
+def add_rows(rows: list[dict]) -> None:
+    """
+    Index newly stored samples with their features.
+
+    Rows are `samples` column dicts (as built by ingest.build_sample_row);
+    rows without current features are skipped.
+    """
+    global _built_size
+    for row in rows:
+        if not row.get("validated") or row.get("feature_set_fingerprint") != FEATURE_SET_FINGERPRINT:
+            continue
+        vector = feature_vector(row)
+        if vector is not None:
+            _index.add(
+                row["id"], vector, row["material"], row["source"], row.get("device"), row.get("created_at")
+            )
+    # Small indexes are cheap to re-standardize, so do it as soon as they double
+    if _index.size < settings.SIMILARITY_IVF_MIN_ROWS and _index.size >= 2 * max(_built_size, 1):
+        _index.rebuild()
+        _built_size = _index.size
+
+
+async def _load_rows(index: SimilarityIndex, since: datetime | None) -> int:
+    """Add rows with current features from the database, created at or after `since`."""
+    columns = [getattr(Sample, column) for column in _COLUMNS]
+    filters = list(_INDEXABLE)
+    if since is not None:
+        filters.append(Sample.created_at >= since)
+
+    started_at = datetime.utcnow()
+    added = 0
+    last_id = None
+    while True:
+        query = (
+            select(Sample.id, Sample.material, Sample.source, Sample.device, Sample.created_at, *columns)
+            .where(*filters)
+            .order_by(Sample.id)
+            .limit(LOAD_CHUNK_ROWS)
+        )
+        if last_id is not None:
+            query = query.where(Sample.id > last_id)
+        async with read_session() as session:
+            rows = (await session.execute(query)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        for row in rows:
+            if row.id in index:
+                continue
+            vector = feature_vector(row._mapping)
+            if vector is not None:
+                index.add(row.id, vector, row.material, row.source, row.device, row.created_at)
+                added += 1
+    index.synced_at = started_at
+    return added
+
+
+async def matches_database(index: SimilarityIndex) -> bool:
+    """
+    Whether a loaded snapshot can belong to the database as it is now.
+
+    Its newest sample must still be stored, with the same created_at, and
+    no fewer indexable samples may have been created up to it (more is
+    fine: features extracted since are picked up by the next rebuild).
+    """
+    if index.newest is None:
+        # Nothing to check it against; building an empty index is cheap
+        return False
+    created_at, sample_id = index.newest
+    async with read_session() as session:
+        stored_at = await session.scalar(select(Sample.created_at).where(Sample.id == sample_id))
+        if stored_at != created_at:
+            return False
+        rows = await session.scalar(
+            select(func.count(Sample.id)).where(*_INDEXABLE, Sample.created_at <= created_at)
+        )
+    return rows >= index.size
+
+
+async def rebuild() -> None:
+    """Build a fresh index from the database and swap it in."""
+    global _index, _built_at, _built_size
+    index = SimilarityIndex()
+    await _load_rows(index, since=None)
+    await thread_pool.run(index.rebuild)
+    # Catch rows this worker indexed while the database was being read
+    for sample_id in _index.ids[_built_size:]:
+        if sample_id not in index:
+            position = _index.positions[sample_id]
+            index.add(
+                sample_id,
+                _index.raw[position],
+                _index.vocab["material"].values[_index.material[position]],
+                _index.vocab["source"].values[_index.source[position]],
+                _index.vocab["device"].values[_index.device[position]],
+            )
+    # The rows copied above carry no created_at; they may include the newest
+    previous = _index.newest
+    if previous is not None and previous[1] in index and (index.newest is None or previous > index.newest):
+        index.newest = previous
+    _index = index
+    _built_at = time.monotonic()
+    _built_size = index.size
+
+
+async def sync() -> int:
+    """Index samples created since the last sync, e.g. by other workers."""
+    since = _index.synced_at - SYNC_OVERLAP if _index.synced_at else None
+    return await _load_rows(_index, since)
+
+
+async def save_snapshot() -> None:
+    global _saved_size
+    if _index.size != _saved_size:
+        await asyncio.to_thread(_index.save, Path(settings.SIMILARITY_SNAPSHOT_PATH))
+        _saved_size = _index.size
+
+
+async def search(
+    query: np.ndarray,
+    k: int,
+    material: str | None = None,
+    source: str | None = None,
+    device: str | None = None,
+    exclude: UUID | None = None,
+    exact: bool = False,
+) -> tuple[list[Neighbor], str]:
+    """Nearest indexed samples to a raw feature vector (see `feature_vector`)."""
+    filters = {"material": material, "source": source, "device": device}
+    return await thread_pool.run(_index.search, query, k, filters, exclude, exact)
+
+
+async def _maintain_periodically() -> None:
+    while True:
+        await asyncio.sleep(settings.SIMILARITY_SYNC_SECONDS)
+        try:
+            stale = time.monotonic() - _built_at > settings.SIMILARITY_REBUILD_SECONDS
+            if stale or _index.size >= 2 * max(_built_size, 1):
+                await rebuild()
+            else:
+                await sync()
+            await save_snapshot()
+        except Exception as e:
+            print(f"⚠️  Similarity index sync failed: {e}")
+
+
+def stats() -> dict:
+    """Index size and state, for /metrics."""
+    return _index.stats()
+
+
+async def start() -> None:
+    """Load the snapshot (or build from the database) and start syncing. Call on startup."""
+    global _index, _built_at, _built_size, _saved_size, _sync_task
+    snapshot = SimilarityIndex.load(Path(settings.SIMILARITY_SNAPSHOT_PATH))
+    if snapshot is not None and not await matches_database(snapshot):
+        print("⚠️  Similarity index snapshot does not match the database; rebuilding")
+        snapshot = None
+    if snapshot is not None:
+        _index = snapshot
+        _saved_size = snapshot.size
+        await sync()
+        await thread_pool.run(_index.rebuild)
+        _built_at = time.monotonic()
+        _built_size = _index.size
+        print(f"✅ Similarity index loaded from snapshot ({_index.size} samples)")
+    else:
+        await rebuild()
+        print(f"✅ Similarity index built ({_index.size} samples)")
+    _sync_task = asyncio.create_task(_maintain_periodically())
+
+
+async def stop() -> None:
+    """Stop syncing and write a final snapshot. Call on shutdown."""
+    global _sync_task
+    if _sync_task is not None:
+        _sync_task.cancel()
+        await asyncio.gather(_sync_task, return_exceptions=True)
+        _sync_task = None
+    try:
+        await save_snapshot()
+    except OSError as e:
+        print(f"⚠️  Could not save similarity index snapshot: {e}")
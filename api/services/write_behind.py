@@ -0,0 +1,497 @@
+"""
+Write-Behind Ingest Buffer
+
+Optional ingest mode (INGEST_MODE=buffered) in which single-sample
+submissions are acknowledged once they are durable in a local journal,
+and a background task inserts them into the database in grouped
+transactions, every INGEST_FLUSH_ROWS rows or INGEST_FLUSH_MS
+milliseconds, whichever comes first.
+
+Journal appends are group-committed too: requests arriving while an
+fsync is in flight share the next one, so a burst of N submissions costs
+a handful of fsyncs and N / INGEST_FLUSH_ROWS database commits instead of
+N of each.
+
+The journal is a directory of append-only segment files holding one JSON
+record per line. A segment is deleted once every record in it has been
+committed. Each live segment is held under an exclusive flock, so on
+startup a worker replays only segments left behind by a crashed process,
+skipping rows that were already committed.
+
+Rows accepted but not yet committed are indexed by contributor and
+content hash, so a re-submitted recording is recognized before it
+reaches the database; copies journaled concurrently are dropped at
+commit time, in the same transaction as the insert.
+
+A batch that fails for a reason retrying won't fix (a constraint
+violation, bad data) is committed again one row at a time, and rows
+that still fail are moved to a dead-letter file in the journal
+directory instead of blocking every later submission.
+"""
+
+import asyncio
+import base64
+import fcntl
+import json
+import os
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.core.config import settings
+from api.core.database import write_session
+from api.core.vibration_codec import decode_vibration, encode_vibration
+from api.models.sample import Sample
+from api.services import contributors, dedup, fingerprints, jobs, similarity
+
+# A segment is closed and a new one started past this size
+SEGMENT_MAX_BYTES = 16 * 1024 * 1024
+
+_SEGMENT_SUFFIX = ".journal"
+
+# Rows that could not be committed, one JSON record per line
+_DEAD_LETTER_FILE = "dead-letter.jsonl"
+
+
+@dataclass
+class _Record:
+    row: dict
+    api_key_hash: str
+    segment: "_Segment | None" = None
+
+
+@dataclass
+class _Segment:
+    path: Path
+    fd: int
+    written: int = 0
+    committed: int = 0
+    size: int = 0
+    closed: bool = False
+
+
+@dataclass
+class _Pending:
+    line: bytes
+    record: _Record
+    durable: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+def _encode_record(record: _Record) -> bytes:
+    row = dict(record.row)
+    row["id"] = row["id"].hex
+    row["contributor_id"] = row["contributor_id"].hex
+    row["created_at"] = row["created_at"].isoformat()
+    # Lossless and fast: the column's own codec is applied at insert
+    row["vibration"] = base64.b64encode(encode_vibration(row["vibration"], codec="float64", level=1)).decode()
+    return json.dumps({"row": row, "api_key_hash": record.api_key_hash}).encode() + b"\n"
+
+
+def _decode_record(line: bytes) -> _Record:
+    data = json.loads(line)
+    row = data["row"]
+    row["id"] = UUID(row["id"])
+    row["contributor_id"] = UUID(row["contributor_id"])
+    row["created_at"] = datetime.fromisoformat(row["created_at"])
+    row["vibration"] = decode_vibration(base64.b64decode(row["vibration"]))
+    return _Record(row=row, api_key_hash=data["api_key_hash"])
+
+
+def _content_key(row: dict) -> tuple[UUID, str] | None:
+    return (row["contributor_id"], row["content_hash"]) if row.get("content_hash") else None
+
+
+async def _drop_duplicates(db: AsyncSession, records: list[_Record], skip_existing: bool) -> tuple[list[_Record], int]:
+    """
+    Records whose recording is not stored yet, keeping the first of any
+    copies in the batch, and how many copies were dropped. With
+    `skip_existing`, rows whose id is already stored are dropped too
+    (replay after a crash).
+
+    Run in the inserting transaction, so a copy committed by another worker
+    in between either is seen here or makes the insert fail.
+    """
+    keys = {key for r in records if (key := _content_key(r.row)) is not None}
+    stored = set()
+    if keys:
+        result = await db.execute(
+            select(Sample.contributor_id, Sample.content_hash)
+            .where(tuple_(Sample.contributor_id, Sample.content_hash).in_(list(keys)))
+        )
+        stored = {tuple(row) for row in result}
+    existing = set()
+    if skip_existing:
+        existing = set(
+            await db.scalars(select(Sample.id).where(Sample.id.in_([r.row["id"] for r in records])))
+        )
+
+    kept = []
+    duplicates = 0
+    for r in records:
+        if r.row["id"] in existing:
+            continue
+        key = _content_key(r.row)
+        if key is not None:
+            if key in stored:
+                duplicates += 1
+                continue
+            stored.add(key)
+        kept.append(r)
+    return kept, duplicates
+
+
+async def _commit_records(records: list[_Record], skip_existing: bool = False) -> None:
+    """Insert records, their fingerprints and contributor counters in one transaction."""
+    # Computed up front so the writer isn't held during DSP
+    peaks = await fingerprints.compute_for_rows([r.row for r in records])
+    async with write_session() as db:
+        records, duplicates = await _drop_duplicates(db, records, skip_existing)
+        if not records:
+            return
+        await db.execute(insert(Sample), [r.row for r in records])
+        await fingerprints.insert_fingerprints(
+            db, {r.row["id"]: peaks[r.row["id"]] for r in records if r.row["id"] in peaks}
+        )
+
+        per_contributor: dict[UUID, list] = defaultdict(lambda: [None, 0, 0])
+        for r in records:
+            totals = per_contributor[r.row["contributor_id"]]
+            totals[0] = r.api_key_hash
+            totals[1] += 1
+            totals[2] += int(r.row["validated"])
+        updated = [
+            await contributors.record_submissions(db, contributor_id, api_key_hash, total, validated)
+            for contributor_id, (api_key_hash, total, validated) in per_contributor.items()
+        ]
+
+    if duplicates:
+        dedup.record_duplicates(duplicates, race=True)
+    for counts in updated:
+        await counts.publish()
+    similarity.add_rows([r.row for r in records])
+    # Only committed rows can be picked up by feature jobs
+    await jobs.enqueue_features([
+        (r.row["id"], r.row["contributor_id"], r.api_key_hash)
+        for r in records
+        if r.row.get("status") == "pending"
+    ])
+
+
+def _is_transient(error: Exception) -> bool:
+    """Whether retrying the same rows later may succeed (lost connection, locked database)."""
+    if isinstance(error, (OperationalError, InterfaceError, OSError, asyncio.TimeoutError)):
+        return True
+    return isinstance(error, DBAPIError) and error.connection_invalidated
+
+
+class WriteBehindBuffer:
+    """Durable local queue in front of grouped sample INSERTs."""
+
+    def __init__(self, journal_dir: str, flush_rows: int, flush_ms: float, max_pending: int):
+        self.journal_dir = Path(journal_dir)
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_ms / 1000
+        self.max_pending = max_pending
+        self._pending: list[_Pending] = []
+        self._queue: list[_Record] = []
+        self._uncommitted: dict[tuple[UUID, str], dict] = {}
+        self._segments: list[_Segment] = []
+        self._segment_lock = asyncio.Lock()
+        self._journal_wakeup = asyncio.Event()
+        self._queue_wakeup = asyncio.Event()
+        self._queue_full = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        self._closing = False
+        self._next_segment = 0
+        self._stats = {
+            "accepted": 0, "fsyncs": 0, "flushed": 0, "batches": 0,
+            "flush_failures": 0, "replayed": 0, "dead_lettered": 0,
+        }
+
+    # --- Journal segments ---
+
+    def _open_segment(self) -> _Segment:
+        self._next_segment += 1
+        name = f"{os.getpid()}-{time.time_ns()}-{self._next_segment}{_SEGMENT_SUFFIX}"
+        path = self.journal_dir / name
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        segment = _Segment(path=path, fd=fd)
+        self._segments.append(segment)
+        return segment
+
+    def _retire_segments(self) -> None:
+        """Delete closed segments whose records are all committed."""
+        for segment in list(self._segments):
+            if segment.closed and segment.committed == segment.written:
+                segment.path.unlink(missing_ok=True)
+                os.close(segment.fd)
+                self._segments.remove(segment)
+
+    async def _rotate(self) -> None:
+        async with self._segment_lock:
+            self._segments[-1].closed = True
+            self._open_segment()
+            self._retire_segments()
+
+    @staticmethod
+    def _append(fd: int, data: bytes) -> None:
+        os.write(fd, data)
+        os.fsync(fd)
+
+    # --- Replay ---
+
+    async def _replay(self) -> None:
+        """Commit records from segments left behind by a crashed process."""
+        for path in sorted(self.journal_dir.glob(f"*{_SEGMENT_SUFFIX}")):
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # Live segment of another worker
+
+                by_id: dict[UUID, _Record] = {}
+                with open(path, "rb") as f:
+                    for line in f:
+                        try:
+                            record = _decode_record(line)
+                        except (ValueError, KeyError):
+                            # Torn final write: never acknowledged
+                            break
+                        by_id.setdefault(record.row["id"], record)
+                records = list(by_id.values())
+                for start in range(0, len(records), self.flush_rows):
+                    batch = records[start:start + self.flush_rows]
+                    if await self._commit(batch, skip_existing=True) < len(batch):
+                        raise RuntimeError(f"Could not replay {path.name}, the database is unavailable")
+                path.unlink()
+                self._stats["replayed"] += len(records)
+                if records:
+                    print(f"🔁 Replayed {len(records)} journaled samples from {path.name}")
+            finally:
+                os.close(fd)
+
+    # --- Committing ---
+
+    def _dead_letter(self, record: _Record, error: Exception) -> None:
+        """Set aside a row that can never be committed."""
+        line = json.dumps({"error": str(error), **json.loads(_encode_record(record))}).encode() + b"\n"
+        with open(self.journal_dir / _DEAD_LETTER_FILE, "ab") as f:
+            f.write(line)
+            os.fsync(f.fileno())
+        self._stats["dead_lettered"] += 1
+        print(f"❌ Ingest of sample {record.row['id']} failed permanently, moved to {_DEAD_LETTER_FILE}: {error}")
+
+    async def _commit(self, batch: list[_Record], skip_existing: bool = False) -> int:
+        """
+        Commit a batch, isolating rows that fail permanently.
+
+        Returns:
+            How many leading records of the batch were handled (committed,
+            dropped as duplicates or dead-lettered); fewer than all only if
+            a transient error stopped the one-by-one retry
+
+        Raises:
+            Exception: A transient error from committing the whole batch
+        """
+        try:
+            await _commit_records(batch, skip_existing)
+            return len(batch)
+        except Exception as e:
+            if _is_transient(e):
+                raise
+            print(f"⚠️  Ingest flush of {len(batch)} samples failed, retrying them one by one: {e}")
+
+        for handled, record in enumerate(batch):
+            try:
+                await _commit_records([record], skip_existing)
+            except Exception as e:
+                if _is_transient(e):
+                    self._stats["flush_failures"] += 1
+                    return handled
+                self._dead_letter(record, e)
+        return len(batch)
+
+    # --- Lifecycle ---
+
+    async def start(self) -> None:
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        await self._replay()
+        self._open_segment()
+        self._tasks = [
+            asyncio.create_task(self._journal_loop()),
+            asyncio.create_task(self._flush_loop()),
+        ]
+
+    async def stop(self) -> None:
+        """Stop accepting samples and commit everything already accepted."""
+        self._closing = True
+        self._journal_wakeup.set()
+        self._queue_wakeup.set()
+        self._queue_full.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._segments[-1].closed = True
+        self._retire_segments()
+        for segment in self._segments:
+            os.close(segment.fd)  # Uncommitted segments remain for replay
+        self._segments.clear()
+
+    # --- Request path ---
+
+    async def submit(self, row: dict, api_key_hash: str) -> None:
+        """
+        Queue a sample row, returning once it is durable in the journal.
+
+        Raises:
+            HTTPException 503: If shutting down or too many rows are pending
+        """
+        if self._closing or len(self._queue) + len(self._pending) >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Ingest buffer is full, please retry later",
+                headers={"Retry-After": str(max(1, round(self.flush_seconds * 10)))},
+            )
+        record = _Record(row=row, api_key_hash=api_key_hash)
+        pending = _Pending(line=_encode_record(record), record=record)
+        self._pending.append(pending)
+        self._journal_wakeup.set()
+        await pending.durable
+        self._stats["accepted"] += 1
+
+    def find_pending(self, contributor_id: UUID, content_hash: str) -> dict | None:
+        """A contributor's accepted but not yet committed row with this content hash."""
+        return self._uncommitted.get((contributor_id, content_hash))
+
+    # --- Background tasks ---
+
+    async def _journal_loop(self) -> None:
+        while True:
+            await self._journal_wakeup.wait()
+            self._journal_wakeup.clear()
+            batch, self._pending = self._pending, []
+            if not batch:
+                if self._closing:
+                    return
+                continue
+
+            data = b"".join(p.line for p in batch)
+            async with self._segment_lock:
+                segment = self._segments[-1]
+                try:
+                    await asyncio.to_thread(self._append, segment.fd, data)
+                except OSError as e:
+                    for p in batch:
+                        p.durable.set_exception(
+                            HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"Journal write failed: {e}")
+                        )
+                    continue
+                segment.written += len(batch)
+                segment.size += len(data)
+            self._stats["fsyncs"] += 1
+
+            for p in batch:
+                p.record.segment = segment
+                self._queue.append(p.record)
+                if (key := _content_key(p.record.row)) is not None:
+                    self._uncommitted.setdefault(key, p.record.row)
+                if not p.durable.done():
+                    p.durable.set_result(None)
+            self._queue_wakeup.set()
+            if len(self._queue) >= self.flush_rows:
+                self._queue_full.set()
+            if segment.size >= SEGMENT_MAX_BYTES:
+                await self._rotate()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            if not self._queue:
+                if self._closing and not self._pending:
+                    return
+                await self._queue_wakeup.wait()
+                self._queue_wakeup.clear()
+                continue
+
+            # Give the group time to fill unless it already has
+            if len(self._queue) < self.flush_rows and not self._closing:
+                try:
+                    await asyncio.wait_for(self._queue_full.wait(), timeout=self.flush_seconds)
+                except asyncio.TimeoutError:
+                    pass
+            self._queue_full.clear()
+
+            batch = self._queue[:self.flush_rows]
+            try:
+                handled = await self._commit(batch)
+            except Exception as e:
+                handled = 0
+                self._stats["flush_failures"] += 1
+                if self._closing:
+                    # Left in the journal; replayed on next startup
+                    print(f"⚠️  Ingest flush failed during shutdown, {len(self._queue)} samples left in journal: {e}")
+                    return
+                print(f"⚠️  Ingest flush of {len(batch)} samples failed, retrying: {e}")
+
+            done = batch[:handled]
+            del self._queue[:handled]
+            if done:
+                self._stats["flushed"] += len(done)
+                self._stats["batches"] += 1
+            for record in done:
+                record.segment.committed += 1
+                if (key := _content_key(record.row)) is not None and self._uncommitted.get(key) is record.row:
+                    del self._uncommitted[key]
+            if self._segments[-1].committed == self._segments[-1].written and self._segments[-1].size:
+                await self._rotate()
+            else:
+                self._retire_segments()
+            if handled < len(batch):
+                if self._closing:
+                    return
+                await asyncio.sleep(min(5.0, self.flush_seconds * 10))
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "pending_journal": len(self._pending),
+            "pending_commit": len(self._queue),
+            "segments": len(self._segments),
+        }
+
+
+_buffer: WriteBehindBuffer | None = None
+
+
+def get_buffer() -> WriteBehindBuffer | None:
+    """The running buffer, or None in direct ingest mode."""
+    return _buffer
+
+
+async def start() -> None:
+    """Replay leftover journals and start buffering if enabled. Call on startup."""
+    global _buffer
+    if settings.INGEST_MODE != "buffered":
+        return
+    _buffer = WriteBehindBuffer(
+        settings.INGEST_JOURNAL_DIR,
+        flush_rows=settings.INGEST_FLUSH_ROWS,
+        flush_ms=settings.INGEST_FLUSH_MS,
+        max_pending=settings.INGEST_MAX_PENDING,
+    )
+    await _buffer.start()
+
+
+async def stop() -> None:
+    """Drain the buffer into the database. Call on shutdown."""
+    global _buffer
+    if _buffer is not None:
+        await _buffer.stop()
+        _buffer = None
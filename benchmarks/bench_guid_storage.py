@@ -0,0 +1,139 @@
+"""
+Benchmark: GUID storage as CHAR(32) hex text vs the current GUID type.
+
+Fills two SQLite databases with the same sample rows, one keyed by the
+legacy CHAR(32) hex GUIDs and one by the GUID type of api.core.database
+(16 raw bytes on SQLite), and reports the size of each table and index
+(from SQLite's dbstat) and the best latency of list-style queries through
+the ORM, including the per-row GUID conversion.
+
+Usage:
+    python -m benchmarks.bench_guid_storage [--rows 200000] [--repeat 50]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+os.environ.setdefault("API_KEY_SECRET", "benchmark")
+
+from sqlalchemy import Column, DateTime, Index, MetaData, String, Table, select  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+from sqlalchemy.types import CHAR, TypeDecorator  # noqa: E402
+
+from api.core.database import GUID  # noqa: E402
+
+
+class LegacyGUID(TypeDecorator):
+    """The CHAR(32) hex GUID used before native UUID storage."""
+    impl = CHAR
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        return dialect.type_descriptor(CHAR(32))
+
+    def process_bind_param(self, value, dialect):
+        return value.hex if value is not None else value
+
+    def process_result_value(self, value, dialect):
+        return uuid.UUID(value) if value is not None else value
+
+
+def _samples_table(guid_type) -> Table:
+    metadata = MetaData()
+    return Table(
+        "samples",
+        metadata,
+        Column("id", guid_type, primary_key=True),
+        Column("contributor_id", guid_type, nullable=False, index=True),
+        Column("material", String(50), nullable=False),
+        Column("created_at", DateTime, nullable=False),
+        Index("ix_samples_created_id", "created_at", "id"),
+    )
+
+
+def _rows(count: int) -> list[dict]:
+    rng = random.Random(0)
+    contributors = [uuid.UUID(int=rng.getrandbits(128), version=4) for _ in range(max(1, count // 100))]
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "id": uuid.UUID(int=rng.getrandbits(128), version=4),
+            "contributor_id": rng.choice(contributors),
+            "material": rng.choice(["glass", "oak", "steel", "ceramic"]),
+            "created_at": start + timedelta(seconds=i),
+        }
+        for i in range(count)
+    ]
+
+
+def _sizes(path: str) -> dict[str, int]:
+    with sqlite3.connect(path) as conn:
+        return dict(conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"))
+
+
+async def _run(path: str, guid_type, rows: list[dict], repeat: int) -> tuple[dict[str, int], dict[str, float]]:
+    table = _samples_table(guid_type)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(table.metadata.create_all)
+        for start in range(0, len(rows), 10_000):
+            await conn.execute(table.insert(), rows[start:start + 10_000])
+
+    rng = random.Random(1)
+    queries = {
+        "list page (50)": lambda: select(table).order_by(table.c.created_at.desc(), table.c.id.desc()).limit(50),
+        "list 1000 rows": lambda: select(table).order_by(table.c.created_at.desc(), table.c.id.desc()).limit(1000),
+        "by contributor": lambda: select(table).where(table.c.contributor_id == rng.choice(rows)["contributor_id"]),
+        "100 ids": lambda: select(table).where(table.c.id.in_([r["id"] for r in rng.sample(rows, 100)])),
+    }
+    latencies = {}
+    async with engine.connect() as conn:
+        for name, query in queries.items():
+            (await conn.execute(query())).all()  # Warm the page cache
+            best = float("inf")
+            for _ in range(repeat):
+                statement = query()
+                start = time.perf_counter()
+                (await conn.execute(statement)).all()
+                best = min(best, time.perf_counter() - start)
+            latencies[name] = best
+    await engine.dispose()
+    return _sizes(path), latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="Sample rows per database")
+    parser.add_argument("--repeat", type=int, default=50, help="Runs per query; the fastest is reported")
+    args = parser.parse_args()
+
+    rows = _rows(args.rows)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, guid_type in (("char32", LegacyGUID()), ("guid", GUID())):
+            results[name] = asyncio.run(_run(f"{tmp}/{name}.db", guid_type, rows, args.repeat))
+
+    print(f"{args.rows:,} rows\n")
+    print(f"{'table / index':<32} {'char32 KB':>10} {'guid KB':>10} {'ratio':>6}")
+    legacy_sizes, sizes = results["char32"][0], results["guid"][0]
+    for name in sorted(legacy_sizes):
+        if name in sizes and not name.startswith("sqlite_schema"):
+            print(f"{name:<32} {legacy_sizes[name] / 1024:>10,.0f} {sizes[name] / 1024:>10,.0f} "
+                  f"{legacy_sizes[name] / sizes[name]:>6.2f}")
+
+    print(f"\n{'query':<32} {'char32 ms':>10} {'guid ms':>10} {'ratio':>6}")
+    legacy_latencies, latencies = results["char32"][1], results["guid"][1]
+    for name in latencies:
+        print(f"{name:<32} {legacy_latencies[name] * 1000:>10.3f} {latencies[name] * 1000:>10.3f} "
+              f"{legacy_latencies[name] / latencies[name]:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
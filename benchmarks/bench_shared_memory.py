@@ -0,0 +1,83 @@
+"""
+Benchmark: shared-memory signal handoff vs pickled submission.
+
+Submits batches of vibration signals to a process pool either as pickled
+arrays or as descriptors into a SignalRing, and reports throughput for a
+no-op worker (pure transfer cost) and for the real feature pipeline.
+
+Usage:
+    python -m benchmarks.bench_shared_memory [--length 100000] [--count 200] [--workers 4]
+"""
+
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from api.core.shared_memory import SignalRing, run_on_shared_signal
+from python.features import compute_feature_vector
+
+
+def _noop(signal: np.ndarray, sample_rate_hz: float) -> np.ndarray:
+    return np.array([signal[0], signal[-1], sample_rate_hz])
+
+
+def _run_pickled(pool, func, signals, sample_rate_hz):
+    futures = [pool.submit(func, s, sample_rate_hz) for s in signals]
+    return [f.result() for f in futures]
+
+
+def _run_shared(pool, func, signals, sample_rate_hz, ring):
+    descriptors = [ring.write(s, sample_rate_hz) for s in signals]
+    if any(d is None for d in descriptors):
+        raise SystemExit("Ring too small for one batch; increase --ring-mb")
+    futures = [pool.submit(run_on_shared_signal, d, func) for d in descriptors]
+    results = [f.result() for f in futures]
+    for d in descriptors:
+        ring.release(d)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--length", type=int, default=100_000, help="Samples per signal")
+    parser.add_argument("--count", type=int, default=200, help="Signals per run")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes")
+    parser.add_argument("--ring-mb", type=int, default=256, help="Shared-memory ring size")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    signals = [rng.standard_normal(args.length) for _ in range(args.count)]
+    sample_rate_hz = 1000.0
+    ring = SignalRing(args.ring_mb * 1024 * 1024)
+    workloads = {
+        "transfer only": _noop,
+        "compute_feature_vector": partial(compute_feature_vector, extra=False),
+    }
+
+    print(f"{args.count} signals x {args.length} samples, {args.workers} workers\n")
+    print(f"{'workload':<24} {'mode':<8} {'seconds':>8} {'signals/s':>10}")
+    try:
+        with ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            # Warm up workers (imports, shared-memory attach)
+            _run_shared(pool, _noop, signals[: args.workers], sample_rate_hz, ring)
+            _run_pickled(pool, _noop, signals[: args.workers], sample_rate_hz)
+
+            for name, func in workloads.items():
+                for mode in ("pickled", "shared"):
+                    start = time.perf_counter()
+                    if mode == "pickled":
+                        _run_pickled(pool, func, signals, sample_rate_hz)
+                    else:
+                        _run_shared(pool, func, signals, sample_rate_hz, ring)
+                    elapsed = time.perf_counter() - start
+                    print(f"{name:<24} {mode:<8} {elapsed:>8.3f} {args.count / elapsed:>10.1f}")
+    finally:
+        ring.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark: SQLite under concurrent writes and reads, default vs tuned profile.
+
+Several worker processes share one database file, each running many
+concurrent tasks that mix write transactions (read the contributor's
+sample count, insert a sample, bump the contributor's counter, like a
+submission) with sample listings. Each run uses a fresh file, first with
+a plain aiosqlite engine (rollback journal, one pool for everything) and
+then with the SQLite profile of api.core.database (WAL and pragmas, one
+writer connection per worker, a query-only read pool).
+
+Reports operations per second, latency percentiles and the operations
+that failed with "database is locked".
+
+Usage:
+    python -m benchmarks.bench_sqlite_concurrency [--workers 4] [--tasks 16] [--seconds 10] [--write-ratio 0.3]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+os.environ.setdefault("API_KEY_SECRET", "benchmark")
+
+
+def _percentile(values: list[float], q: float) -> float:
+    return float(np.percentile(values, q)) * 1000 if values else 0.0
+
+
+async def _setup(url: str, contributor_ids: list[uuid.UUID]) -> None:
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from api.core.database import Base
+    from api.models.contributor import Contributor
+
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            Contributor.__table__.insert(),
+            [{"id": cid, "email": f"{cid.hex}@bench", "api_key_hash": cid.hex} for cid in contributor_ids],
+        )
+    await engine.dispose()
+
+
+async def _worker(mode: str, url: str, contributor_id: uuid.UUID, tasks: int, seconds: float, write_ratio: float) -> dict:
+    from sqlalchemy import func, select, update
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from api.core import database
+    from api.models.contributor import Contributor
+    from api.models.sample import Sample
+    from api.schemas.sample import SampleMetadata
+    from api.services import ingest
+
+    if mode == "profile":
+        write_engine, read_engine = database.engine, database.read_engine
+    else:
+        write_engine = read_engine = create_async_engine(url)
+    write_sessions = async_sessionmaker(write_engine, expire_on_commit=False)
+    read_sessions = async_sessionmaker(read_engine, expire_on_commit=False)
+
+    meta = SampleMetadata(material="glass", sample_rate_hz=1000, excitation="manual_tap", source="real")
+    vibration = np.random.default_rng(0).standard_normal(2000)
+    latencies = {"write": [], "read": []}
+    locked = {"write": 0, "read": 0}
+    deadline = time.monotonic() + seconds
+
+    async def write() -> None:
+        async with write_sessions() as db:
+            await db.scalar(select(func.count()).select_from(Sample).where(Sample.contributor_id == contributor_id))
+            await db.execute(Sample.__table__.insert(), [
+                ingest.build_sample_row(contributor_id, meta, vibration, ingest.PENDING_FEATURES)
+            ])
+            await db.execute(
+                update(Contributor)
+                .where(Contributor.id == contributor_id)
+                .values(total_submissions=Contributor.total_submissions + 1)
+            )
+            await db.commit()
+
+    async def read() -> None:
+        async with read_sessions() as db:
+            result = await db.execute(
+                select(Sample.id, Sample.material, Sample.created_at)
+                .order_by(Sample.created_at.desc())
+                .limit(50)
+            )
+            result.all()
+
+    async def loop() -> None:
+        rng = random.Random()
+        while time.monotonic() < deadline:
+            kind = "write" if rng.random() < write_ratio else "read"
+            start = time.perf_counter()
+            try:
+                await (write() if kind == "write" else read())
+            except OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+                locked[kind] += 1
+                continue
+            latencies[kind].append(time.perf_counter() - start)
+
+    await asyncio.gather(*(loop() for _ in range(tasks)))
+    if mode == "profile":
+        await database.close_db()
+    else:
+        await write_engine.dispose()
+    return {"latencies": latencies, "locked": locked}
+
+
+def _run_worker(mode: str, url: str, contributor_id: uuid.UUID, tasks: int, seconds: float, write_ratio: float) -> dict:
+    # The profile is configured from DATABASE_URL when api.core.database is imported
+    os.environ["DATABASE_URL"] = url
+    return asyncio.run(_worker(mode, url, contributor_id, tasks, seconds, write_ratio))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes")
+    parser.add_argument("--tasks", type=int, default=16, help="Concurrent tasks per worker")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duration of each run")
+    parser.add_argument("--write-ratio", type=float, default=0.3, help="Fraction of operations that write")
+    args = parser.parse_args()
+
+    print(
+        f"{args.workers} workers x {args.tasks} tasks, {args.seconds:.0f}s per run, "
+        f"{args.write_ratio:.0%} writes\n"
+    )
+    print(
+        f"{'mode':<8} {'op':<6} {'ops/s':>8} {'p50 ms':>8} {'p99 ms':>9} {'locked':>7}"
+    )
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("default", "profile"):
+            url = f"sqlite+aiosqlite:///{tmp}/{mode}.db"
+            contributor_ids = [uuid.uuid4() for _ in range(args.workers)]
+            asyncio.run(_setup(url, contributor_ids))
+
+            with ProcessPoolExecutor(args.workers, mp_context=context) as pool:
+                futures = [
+                    pool.submit(_run_worker, mode, url, cid, args.tasks, args.seconds, args.write_ratio)
+                    for cid in contributor_ids
+                ]
+                results = [f.result() for f in futures]
+
+            for kind in ("write", "read"):
+                latencies = [v for r in results for v in r["latencies"][kind]]
+                locked = sum(r["locked"][kind] for r in results)
+                print(
+                    f"{mode:<8} {kind:<6} {len(latencies) / args.seconds:>8.1f} "
+                    f"{_percentile(latencies, 50):>8.2f} {_percentile(latencies, 99):>9.2f} {locked:>7}"
+                )
+
+
+if __name__ == "__main__":
+    main()
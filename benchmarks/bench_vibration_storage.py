@@ -0,0 +1,67 @@
+"""
+Benchmark: vibration storage size and decode time per codec.
+
+Compares the legacy JSON text encoding of `samples.vibration` with each
+binary codec in api/core/vibration_codec.py on synthetic decaying taps
+with sensor noise.
+
+Usage:
+    python -m benchmarks.bench_vibration_storage [--length 100000] [--count 20]
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from api.core.vibration_codec import CODECS, decode_vibration, encode_vibration
+
+
+def _synthetic_taps(count: int, length: int, sample_rate_hz: float = 10_000.0) -> list[np.ndarray]:
+    rng = np.random.default_rng(0)
+    t = np.arange(length) / sample_rate_hz
+    taps = []
+    for _ in range(count):
+        freq = rng.uniform(200, 1500)
+        damping = rng.uniform(0.5, 5.0)
+        signal = np.exp(-damping * t) * np.sin(2 * np.pi * freq * t)
+        taps.append(signal + rng.normal(0, 0.002, length))
+    return taps
+
+
+def _time(func, values, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for value in values:
+            func(value)
+        best = min(best, time.perf_counter() - start)
+    return best / len(values)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--length", type=int, default=100_000, help="Samples per tap")
+    parser.add_argument("--count", type=int, default=20, help="Taps to encode")
+    args = parser.parse_args()
+
+    taps = _synthetic_taps(args.count, args.length)
+    json_values = [json.dumps(tap.tolist()) for tap in taps]
+    json_size = sum(len(v) for v in json_values) / len(taps)
+    json_decode = _time(lambda v: np.array(json.loads(v)), json_values)
+
+    print(f"{args.count} taps x {args.length} samples\n")
+    print(f"{'encoding':<14} {'bytes/tap':>12} {'ratio':>7} {'decode ms':>10} {'max abs err':>12}")
+    print(f"{'json (legacy)':<14} {json_size:>12,.0f} {1.0:>7.1f} {json_decode * 1000:>10.2f} {0.0:>12.2e}")
+
+    for codec in CODECS:
+        blobs = [encode_vibration(tap, codec=codec) for tap in taps]
+        size = sum(len(b) for b in blobs) / len(blobs)
+        decode = _time(decode_vibration, blobs)
+        error = max(float(np.max(np.abs(decode_vibration(b) - tap))) for b, tap in zip(blobs, taps))
+        print(f"{codec:<14} {size:>12,.0f} {json_size / size:>7.1f} {decode * 1000:>10.2f} {error:>12.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -117,8 +117,11 @@ def compute_feature_vector(signal: np.ndarray, sample_rate_hz: float, *, detrend
             base.extend(peaks)
 
         if 'ac_lag_s' in requested:
-            ac = np.correlate(x, x, mode='full')
-            ac = ac[len(x)-1:]  # lags >= 0
+            # Autocorrelation via FFT (Wiener-Khinchin), zero-padded so lags don't
+            # wrap; same lags >= 0 as np.correlate(x, x, 'full') in O(n log n)
+            nfft = 1 << max(0, 2 * len(x) - 2).bit_length()
+            spec = np.fft.rfft(x, nfft)
+            ac = np.fft.irfft(spec * np.conj(spec), nfft)[:len(x)]
             if len(ac) > 1:
                 lag_idx = int(np.argmax(ac[1:]) + 1)
                 lag_s = float(lag_idx / sample_rate_hz)
@@ -162,4 +165,76 @@ def compute_features(signal: np.ndarray, sample_rate_hz: float, **kwargs) -> dic
         if 'ac_lag_s' in requested:
             result['ac_lag_s'] = float(vec[idx]); idx += 1
 
-    return result
\ No newline at end of file
+    return result
+
+
+def _spectral_peaks(x: np.ndarray, frame_size: int, hop: int, peaks_per_frame: int,
+                    min_rel_magnitude: float) -> list[tuple[int, int, float]]:
+    """Strongest local-maximum bins per STFT frame, as (frame, bin, magnitude)."""
+    frames = np.lib.stride_tricks.sliding_window_view(x, frame_size)[::hop] * np.hanning(frame_size)
+    spec = np.abs(np.fft.rfft(frames, axis=1))
+    # Local maxima along frequency, excluding DC and Nyquist
+    peaks = np.zeros_like(spec)
+    inner = spec[:, 1:-1]
+    is_peak = (inner > spec[:, :-2]) & (inner >= spec[:, 2:]) & (inner >= min_rel_magnitude * spec.max())
+    peaks[:, 1:-1] = np.where(is_peak, inner, 0.0)
+
+    k = min(peaks_per_frame, peaks.shape[1])
+    top = np.argpartition(peaks, -k, axis=1)[:, -k:]
+    return [
+        (frame, int(b), float(peaks[frame, b]))
+        for frame in range(len(peaks))
+        for b in top[frame]
+        if peaks[frame, b] > 0
+    ]
+
+
+def compute_peak_fingerprints(signal: np.ndarray, sample_rate_hz: float, *, frame_size: int = 512, hop: int = 256,
+                              peaks_per_frame: int = 3, fan_out: int = 5, max_dt_frames: int = 32,
+                              freq_step_hz: float = 5.0, min_rel_magnitude: float = 0.05,
+                              max_fingerprints: int = 2048) -> list[tuple[int, int]]:
+    """Constellation fingerprints of a signal: hashes of pairs of prominent spectral peaks.
+
+    Each STFT frame contributes its strongest peaks (as with 'top_peaks'); every peak is paired
+    with up to `fan_out` later peaks at most `max_dt_frames` away. A pair hashes to a 30-bit int
+    packing both frequencies (in `freq_step_hz` buckets, 12 bits each) and the frame gap
+    (6 bits), and is returned with the anchor's frame index as (hash, offset). Two recordings
+    of the same object at the same sample rate share many hashes at a constant offset difference.
+    Frames are shortened for signals under 4 frames long; the strongest anchors are kept first.
+    """
+    x = np.asarray(signal, dtype=float)
+    x = x - np.mean(x) if len(x) else x
+    while frame_size > 32 and len(x) < 4 * frame_size:
+        frame_size //= 2
+        hop //= 2
+    if len(x) < frame_size + hop:
+        return []
+
+    peaks = _spectral_peaks(x, frame_size, max(1, hop), peaks_per_frame, min_rel_magnitude)
+    peaks.sort(key=lambda p: (p[0], -p[2]))
+    bin_hz = sample_rate_hz / frame_size
+    buckets = [min(4095, int(round(b * bin_hz / freq_step_hz))) for _, b, _ in peaks]
+    max_dt_frames = min(max_dt_frames, 63)
+
+    pairs = []
+    for i, (frame, _, magnitude) in enumerate(peaks):
+        paired = 0
+        for j in range(i + 1, len(peaks)):
+            dt = peaks[j][0] - frame
+            if dt == 0:
+                continue
+            if dt > max_dt_frames or paired >= fan_out:
+                break
+            pairs.append((magnitude, (buckets[i] << 18) | (buckets[j] << 6) | dt, frame))
+            paired += 1
+
+    pairs.sort(key=lambda p: -p[0])
+    seen = set()
+    result = []
+    for _, h, offset in pairs:
+        if (h, offset) not in seen:
+            seen.add((h, offset))
+            result.append((h, offset))
+            if len(result) >= max_fingerprints:
+                break
+    return result
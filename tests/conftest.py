@@ -0,0 +1,118 @@
+"""
+Shared Test Configuration
+
+Settings are read from the environment when `api.core.config` is first
+imported, so test defaults are set here, before any test module imports
+the API. The in-process app uses a fresh database in a temporary
+directory; tests of the commands run them on their own copies.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Scratch space for the database and data files of the in-process app
+_TEST_DATA_DIR = tempfile.mkdtemp(prefix="resonancedb-tests-")
+
+os.environ.setdefault("API_KEY_SECRET", "test-secret")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_TEST_DATA_DIR}/api.db")
+os.environ.setdefault("INGEST_JOURNAL_DIR", f"{_TEST_DATA_DIR}/ingest-journal")
+os.environ.setdefault("SIMILARITY_SNAPSHOT_PATH", f"{_TEST_DATA_DIR}/similarity-index.npz")
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Tracked database with the schema of the first release: CHAR(32) ids, a
+# JSON vibration column and no persisted features; 1 sample, 2 contributors
+BASELINE_DB = REPO_ROOT / "resonancedb.db"
+
+
+@pytest.fixture
+def baseline_db(tmp_path) -> Path:
+    """A scratch copy of the baseline database."""
+    path = tmp_path / "resonancedb.db"
+    shutil.copy(BASELINE_DB, path)
+    return path
+
+
+def _run_python(args: list[str], database: Path, cwd: Path) -> subprocess.CompletedProcess:
+    """Run Python in a subprocess with the API configured for a database file."""
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{database}",
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])),
+    }
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+
+
+@pytest.fixture
+def run_command(tmp_path):
+    """
+    Run an `api.commands` module against a database file in a subprocess,
+    since the API configures its engine from DATABASE_URL at import.
+
+    Returns:
+        Function (module, database path, *args) -> CompletedProcess
+    """
+    def run(module: str, database: Path, *args: str) -> subprocess.CompletedProcess:
+        return _run_python(["-m", f"api.commands.{module}", *args], database, tmp_path)
+
+    return run
+
+
+# Runs the app's startup and shutdown, printing "started" in between
+_START_APP = """
+import asyncio
+from api.main import app, lifespan
+
+async def start():
+    async with lifespan(app):
+        print("started")
+
+asyncio.run(start())
+"""
+
+
+@pytest.fixture
+def start_app(tmp_path):
+    """
+    Start and stop the app against a database file in a subprocess.
+
+    Returns:
+        Function (database path) -> CompletedProcess
+    """
+    def start(database: Path) -> subprocess.CompletedProcess:
+        return _run_python(["-c", _START_APP], database, tmp_path)
+
+    return start
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Test client for the app, started once for the session."""
+    from fastapi.testclient import TestClient
+
+    from api.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(client) -> dict[str, str]:
+    """Authorization header of a newly registered contributor."""
+    response = client.post("/api/v1/auth/register", json={"email": f"{uuid.uuid4().hex}@example.com"})
+    assert response.status_code == 201, response.text
+    return {"Authorization": f"Bearer {response.json()['api_key']}"}
@@ -0,0 +1,49 @@
+"""Tests for `python -m api.commands.backfill_features` on a baseline-schema database."""
+
+import sqlite3
+
+from api.services.ingest import FEATURE_SET_FINGERPRINT
+
+
+def _backfill(run_command, database, tmp_path, *args):
+    return run_command(
+        "backfill_features", database, "--workers", "1", "--checkpoint", str(tmp_path / "checkpoint.json"), *args
+    )
+
+
+def test_refuses_to_run_on_char32_ids(baseline_db, run_command, tmp_path):
+    result = _backfill(run_command, baseline_db, tmp_path)
+    assert result.returncode == 1
+    assert "migrate_guids" in result.stdout
+    with sqlite3.connect(baseline_db) as conn:
+        assert conn.execute("SELECT feature_set_fingerprint FROM samples").fetchone() == (None,)
+
+
+def test_backfills_after_guid_migration(baseline_db, run_command, tmp_path):
+    assert run_command("migrate_guids", baseline_db).returncode == 0
+
+    result = _backfill(run_command, baseline_db, tmp_path)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Done: 1 updated, 0 failed of 1 samples" in result.stdout
+    assert not (tmp_path / "checkpoint.json").exists()
+
+    with sqlite3.connect(baseline_db) as conn:
+        fingerprint, peak, centroid = conn.execute(
+            "SELECT feature_set_fingerprint, peak_frequency_hz, spectral_centroid FROM samples"
+        ).fetchone()
+    assert fingerprint == FEATURE_SET_FINGERPRINT
+    assert peak is not None and centroid is not None
+
+    # Current samples are skipped on the next run
+    result = _backfill(run_command, baseline_db, tmp_path)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "0 samples to backfill" in result.stdout
+
+
+def test_all_recomputes_current_samples(baseline_db, run_command, tmp_path):
+    assert run_command("migrate_guids", baseline_db).returncode == 0
+    assert _backfill(run_command, baseline_db, tmp_path).returncode == 0
+
+    result = _backfill(run_command, baseline_db, tmp_path, "--all")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Done: 1 updated" in result.stdout
@@ -0,0 +1,27 @@
+"""Tests for `POST /api/v1/samples/bulk` per-item results."""
+
+import numpy as np
+
+
+def _item(frequency: float, **overrides) -> dict:
+    t = np.arange(4000) / 8000
+    return {
+        "material": "steel",
+        "vibration": (np.sin(2 * np.pi * frequency * t) * np.exp(-6 * t)).tolist(),
+        "sample_rate_hz": 8000,
+        "excitation": "tap",
+        "source": "real",
+        **overrides,
+    }
+
+
+def test_invalid_item_errors_omit_the_input(client, auth_headers):
+    bad = _item(611, source="phone")
+    response = client.post("/api/v1/samples/bulk", headers=auth_headers, json={"samples": [_item(587), bad]})
+    assert response.status_code == 200, response.text
+    good_result, bad_result = response.json()["results"]
+    assert good_result["id"] is not None
+    assert bad_result["id"] is None
+    assert [error["loc"] for error in bad_result["errors"]] == [["source"]]
+    assert all("input" not in error for error in bad_result["errors"])
+    assert str(bad["vibration"][1]) not in response.text
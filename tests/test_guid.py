@@ -0,0 +1,107 @@
+"""Tests for the GUID column type and legacy GUID detection (api.core.database)."""
+
+import sqlite3
+import uuid
+
+import pytest
+from sqlalchemy import Column, MetaData, String, Table, create_engine, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from api.core.database import GUID, SQLITE_GUIDS_MIGRATED_VERSION, Base, legacy_guid_columns
+from api.models.contributor import Contributor  # noqa: F401
+from api.models.fingerprint import SampleFingerprint  # noqa: F401
+from api.models.sample import Sample  # noqa: F401
+
+VALUE = uuid.UUID("b00142b6-4135-4fe8-a67b-fa46ce751646")
+
+
+def test_binds_16_bytes_on_sqlite():
+    bind = GUID().process_bind_param(VALUE, sqlite.dialect())
+    assert bind == VALUE.bytes
+
+
+def test_binds_uuid_on_postgresql():
+    assert GUID().process_bind_param(VALUE, postgresql.dialect()) == VALUE
+
+
+@pytest.mark.parametrize("value", [VALUE.hex, str(VALUE)])
+def test_binds_strings_as_uuids(value):
+    assert GUID().process_bind_param(value, sqlite.dialect()) == VALUE.bytes
+
+
+def test_binds_none():
+    assert GUID().process_bind_param(None, sqlite.dialect()) is None
+
+
+@pytest.mark.parametrize("stored", [VALUE.bytes, VALUE.hex, str(VALUE), VALUE])
+def test_loads_binary_and_legacy_values(stored):
+    process = GUID().result_processor(sqlite.dialect(), None)
+    loaded = process(stored)
+    assert isinstance(loaded, uuid.UUID)
+    assert loaded == VALUE
+    assert hash(loaded) == hash(VALUE)
+
+
+def test_loads_none():
+    assert GUID().result_processor(sqlite.dialect(), None)(None) is None
+
+
+@pytest.mark.asyncio
+async def test_round_trip_through_sqlite():
+    table = Table("items", MetaData(), Column("id", GUID(), primary_key=True), Column("name", String(10)))
+    engine = create_async_engine("sqlite+aiosqlite://")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(table.metadata.create_all)
+            await conn.execute(table.insert(), [{"id": VALUE, "name": "a"}, {"id": uuid.uuid4(), "name": "b"}])
+            row = (await conn.execute(select(table).where(table.c.id == VALUE))).one()
+            stored = (await conn.exec_driver_sql("SELECT typeof(id), length(id) FROM items LIMIT 1")).one()
+    finally:
+        await engine.dispose()
+    assert row.id == VALUE and row.name == "a"
+    assert tuple(stored) == ("blob", 16)
+
+
+def _legacy_columns(database) -> list[str]:
+    engine = create_engine(f"sqlite:///{database}")
+    try:
+        with engine.connect() as conn:
+            return legacy_guid_columns(conn)
+    finally:
+        engine.dispose()
+
+
+def test_detects_legacy_columns(baseline_db):
+    assert _legacy_columns(baseline_db) == ["contributors.id", "samples.id", "samples.contributor_id"]
+
+
+def test_fresh_database_has_no_legacy_columns(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    try:
+        with engine.begin() as conn:
+            Base.metadata.create_all(conn)
+    finally:
+        engine.dispose()
+    assert _legacy_columns(tmp_path / "fresh.db") == []
+
+
+def test_migration_marks_database_converted(baseline_db, run_command):
+    assert run_command("migrate_guids", baseline_db).returncode == 0
+    assert _legacy_columns(baseline_db) == []
+    with sqlite3.connect(baseline_db) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone() == (SQLITE_GUIDS_MIGRATED_VERSION,)
+
+
+def test_app_refuses_to_start_on_legacy_ids(baseline_db, start_app):
+    result = start_app(baseline_db)
+    assert result.returncode == 1, result.stdout + result.stderr
+    assert "migrate_guids" in result.stdout
+    assert "started" not in result.stdout
+
+
+def test_app_starts_after_migration(baseline_db, run_command, start_app):
+    assert run_command("migrate_guids", baseline_db).returncode == 0
+    result = start_app(baseline_db)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "started" in result.stdout
@@ -0,0 +1,52 @@
+"""Tests for cached identities (api.services.identity) and TTLCache.replace."""
+
+import time
+
+import numpy as np
+
+from api.core.cache import TTLCache
+from api.core.security import hash_api_key
+from api.services import identity
+
+
+def test_replace_keeps_expiry():
+    cache = TTLCache(ttl_seconds=0.2)
+    cache.set("key", 1)
+    time.sleep(0.1)
+    assert cache.replace("key", 2)
+    assert cache.get("key") == 2
+    time.sleep(0.15)
+    assert cache.get("key") is None
+
+
+def test_replace_skips_missing_entries():
+    cache = TTLCache(ttl_seconds=60)
+    assert not cache.replace("key", 1)
+    assert cache.get("key") is None
+
+
+def test_submission_updates_cached_identity(client, auth_headers):
+    assert client.get("/api/v1/auth/me", headers=auth_headers).json()["total_submissions"] == 0
+    key_hash = hash_api_key(auth_headers["Authorization"].removeprefix("Bearer "))
+    cached = identity._local.get(key_hash)
+    assert cached is not None
+
+    t = np.arange(4000) / 8000
+    response = client.post(
+        "/api/v1/samples/",
+        headers=auth_headers,
+        json={
+            "material": "aluminum",
+            "vibration": (np.sin(2 * np.pi * 523 * t) * np.exp(-6 * t)).tolist(),
+            "sample_rate_hz": 8000,
+            "excitation": "tap",
+            "source": "real",
+        },
+    )
+    assert response.status_code in (201, 202), response.text
+
+    # Still cached, with the new counts
+    updated = identity._local.get(key_hash)
+    assert updated is not None and updated.id == cached.id
+    assert updated.total_submissions == 1
+    assert client.get("/api/v1/auth/me", headers=auth_headers).json()["total_submissions"] == 1
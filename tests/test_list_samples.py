@@ -0,0 +1,57 @@
+"""Tests for `GET /api/v1/samples/` keyset pagination."""
+
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from api.core.config import settings
+from api.models.sample import Sample
+
+
+@pytest.fixture
+def tied_samples(client, auth_headers) -> tuple[str, list[uuid.UUID]]:
+    """12 samples of a unique material, all created in the same instant."""
+    contributor_id = uuid.UUID(client.get("/api/v1/auth/me", headers=auth_headers).json()["id"])
+    material = f"tie-{uuid.uuid4().hex[:8]}"
+    created_at = datetime(2024, 1, 1, 12, 0, 0)
+    samples = [
+        Sample(
+            id=uuid.uuid4(),
+            contributor_id=contributor_id,
+            material=material,
+            vibration=[0.0, 1.0, 0.0],
+            sample_rate_hz=1000.0,
+            excitation="tap",
+            source="test",
+            created_at=created_at,
+        )
+        for _ in range(12)
+    ]
+    ids = sorted((sample.id for sample in samples), key=lambda value: value.bytes, reverse=True)
+    engine = create_engine(settings.DATABASE_URL.replace("+aiosqlite", ""))
+    try:
+        with Session(engine) as session, session.begin():
+            session.add_all(samples)
+    finally:
+        engine.dispose()
+    return material, ids
+
+
+def test_cursor_pages_through_tied_created_at(client, tied_samples):
+    material, expected = tied_samples
+    seen, cursor = [], None
+    while True:
+        params = {"material": material, "page_size": 5}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/v1/samples/", params=params)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        seen += [uuid.UUID(item["id"]) for item in body["items"]]
+        if not body["has_next"]:
+            break
+        cursor = body["next_cursor"]
+    assert seen == expected
@@ -0,0 +1,78 @@
+"""Tests for `python -m api.commands.migrate_guids` on a baseline-schema database."""
+
+import sqlite3
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from api.models.contributor import Contributor
+from api.models.sample import Sample
+
+
+def _ids(database) -> dict[str, list]:
+    with sqlite3.connect(database) as conn:
+        return {
+            "contributors.id": [r[0] for r in conn.execute("SELECT id FROM contributors ORDER BY rowid")],
+            "samples.id": [r[0] for r in conn.execute("SELECT id FROM samples ORDER BY rowid")],
+            "samples.contributor_id": [r[0] for r in conn.execute("SELECT contributor_id FROM samples ORDER BY rowid")],
+        }
+
+
+def test_converts_hex_ids_to_binary(baseline_db, run_command):
+    before = _ids(baseline_db)
+    assert all(isinstance(value, str) for values in before.values() for value in values)
+
+    result = run_command("migrate_guids", baseline_db)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Done: 3 rows converted to binary GUIDs" in result.stdout
+
+    after = _ids(baseline_db)
+    for column, values in before.items():
+        assert after[column] == [bytes.fromhex(value) for value in values], column
+    # The foreign key still points at the contributor
+    assert after["samples.contributor_id"][0] in after["contributors.id"]
+
+
+def test_rerun_converts_nothing(baseline_db, run_command):
+    assert run_command("migrate_guids", baseline_db).returncode == 0
+    converted = _ids(baseline_db)
+
+    result = run_command("migrate_guids", baseline_db, "--batch-size", "1", "--vacuum")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Done: 0 rows converted to binary GUIDs" in result.stdout
+    assert "Vacuumed database" in result.stdout
+    assert _ids(baseline_db) == converted
+
+
+def test_small_batches_convert_every_row(baseline_db, run_command):
+    result = run_command("migrate_guids", baseline_db, "--batch-size", "1")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Done: 3 rows converted to binary GUIDs" in result.stdout
+    assert all(len(value) == 16 for values in _ids(baseline_db).values() for value in values)
+
+
+def test_migrate_vibrations_runs_after_conversion(baseline_db, run_command):
+    assert run_command("migrate_guids", baseline_db).returncode == 0
+
+    result = run_command("migrate_vibrations", baseline_db)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Done: 1 of 1 samples migrated" in result.stdout
+
+
+@pytest.mark.asyncio
+async def test_converted_rows_load_through_the_orm(baseline_db, run_command):
+    legacy = _ids(baseline_db)
+    assert run_command("migrate_guids", baseline_db).returncode == 0
+    # Adds the columns later releases introduced
+    assert run_command("migrate_vibrations", baseline_db).returncode == 0
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{baseline_db}")
+    try:
+        async with AsyncSession(engine) as session:
+            sample = await session.get(Sample, uuid.UUID(legacy["samples.id"][0]))
+            contributor = await session.get(Contributor, uuid.UUID(legacy["samples.contributor_id"][0]))
+    finally:
+        await engine.dispose()
+    assert sample is not None and sample.material == "aluminum"
+    assert contributor is not None and sample.contributor_id == contributor.id
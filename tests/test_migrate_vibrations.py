@@ -0,0 +1,40 @@
+"""Tests for `python -m api.commands.migrate_vibrations` on a baseline-schema database."""
+
+import json
+import sqlite3
+
+import numpy as np
+
+from api.core.vibration_codec import decode_vibration, is_encoded
+
+
+def test_converts_legacy_json_vibrations(baseline_db, run_command):
+    with sqlite3.connect(baseline_db) as conn:
+        legacy = json.loads(conn.execute("SELECT vibration FROM samples").fetchone()[0])
+
+    result = run_command("migrate_vibrations", baseline_db)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Done: 1 of 1 samples migrated" in result.stdout
+
+    with sqlite3.connect(baseline_db) as conn:
+        vibration, length, duration, rate, id_type = conn.execute(
+            "SELECT vibration, vibration_length, duration_seconds, sample_rate_hz, typeof(id) FROM samples"
+        ).fetchone()
+    assert is_encoded(vibration)
+    np.testing.assert_allclose(decode_vibration(vibration), legacy, rtol=1e-6)
+    assert length == len(legacy)
+    assert duration == len(legacy) / rate
+    # Runs before the GUID conversion without touching the ids
+    assert id_type == "text"
+
+
+def test_rerun_skips_migrated_rows(baseline_db, run_command):
+    assert run_command("migrate_vibrations", baseline_db).returncode == 0
+    with sqlite3.connect(baseline_db) as conn:
+        first = conn.execute("SELECT vibration FROM samples").fetchone()[0]
+
+    result = run_command("migrate_vibrations", baseline_db, "--batch-size", "1")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Done: 0 of 1 samples migrated" in result.stdout
+    with sqlite3.connect(baseline_db) as conn:
+        assert conn.execute("SELECT vibration FROM samples").fetchone()[0] == first
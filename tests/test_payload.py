@@ -0,0 +1,117 @@
+"""Tests for binary vibration uploads (api.core.payload and the upload dependency)."""
+
+import json
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.core.payload import MAX_VIBRATION_SAMPLES, decode_samples, parse_binary_body
+from api.deps import PredictBody
+
+
+def _binary_body(header: dict, samples: bytes) -> bytes:
+    encoded = json.dumps(header).encode()
+    return len(encoded).to_bytes(4, "little") + encoded + samples
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float64", "int16"])
+def test_decode_samples_round_trips_each_dtype(dtype):
+    values = np.array([0, 1, -2, 3, 100], dtype=dtype)
+    decoded = decode_samples(values.astype(np.dtype(dtype).newbyteorder("<")).tobytes(), dtype)
+    assert decoded.dtype == np.float64
+    np.testing.assert_array_equal(decoded, values.astype(np.float64))
+
+
+def test_decode_samples_applies_scale():
+    raw = np.array([1, -2, 4], dtype="<i2").tobytes()
+    np.testing.assert_allclose(decode_samples(raw, "int16", scale=0.5), [0.5, -1.0, 2.0])
+
+
+@pytest.mark.parametrize("dtype", ["float16", "", None, 32, ["float32"], {"name": "float32"}])
+def test_decode_samples_rejects_unknown_dtypes(dtype):
+    with pytest.raises(ValueError, match="dtype must be one of"):
+        decode_samples(b"\0" * 8, dtype)
+
+
+def test_decode_samples_rejects_partial_samples():
+    with pytest.raises(ValueError, match="not a multiple of 4 bytes"):
+        decode_samples(b"\0" * 10, "float32")
+
+
+def test_parse_binary_body_splits_header_and_samples():
+    samples = np.linspace(-1, 1, 20)
+    header, vibration = parse_binary_body(
+        _binary_body({"sample_rate_hz": 1000, "dtype": "float64", "scale": 2}, samples.astype("<f8").tobytes())
+    )
+    assert header == {"sample_rate_hz": 1000}
+    np.testing.assert_allclose(vibration, samples * 2)
+
+
+def test_parse_binary_body_defaults_to_float32():
+    header, vibration = parse_binary_body(_binary_body({}, np.ones(10, dtype="<f4").tobytes()))
+    assert header == {}
+    np.testing.assert_array_equal(vibration, np.ones(10))
+
+
+@pytest.mark.parametrize(
+    "body, message",
+    [
+        (b"\1\0", "too short"),
+        ((1000).to_bytes(4, "little") + b"{}", "invalid header length"),
+        ((3).to_bytes(4, "little") + b"{x}", "not valid JSON"),
+        (_binary_body([1, 2], b""), "must be a JSON object"),
+        (_binary_body({"scale": "2"}, np.ones(10, dtype="<f4").tobytes()), "scale must be a number"),
+        (_binary_body({"scale": True}, np.ones(10, dtype="<f4").tobytes()), "scale must be a number"),
+        (_binary_body({"dtype": ["float32"]}, np.ones(10, dtype="<f4").tobytes()), "dtype must be one of"),
+        (_binary_body({}, np.ones(5, dtype="<f4").tobytes()), "at least 10 samples"),
+        (_binary_body({}, np.ones(MAX_VIBRATION_SAMPLES + 1, dtype="<f4").tobytes()), "too large"),
+        (_binary_body({}, np.array([np.nan] * 10, dtype="<f4").tobytes()), "finite"),
+    ],
+)
+def test_parse_binary_body_rejects_malformed_bodies(body, message):
+    with pytest.raises(ValueError, match=message):
+        parse_binary_body(body)
+
+
+@pytest.fixture
+def upload_client() -> TestClient:
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(payload: PredictBody) -> dict:
+        return {"sample_rate_hz": payload.meta.sample_rate_hz, "samples": len(payload.vibration)}
+
+    return TestClient(app)
+
+
+def test_binary_upload_is_decoded(upload_client):
+    response = upload_client.post(
+        "/upload",
+        content=_binary_body({"sample_rate_hz": 500}, np.ones(16, dtype="<f4").tobytes()),
+        headers={"Content-Type": "application/octet-stream"},
+    )
+    assert response.status_code == 200
+    assert response.json() == {"sample_rate_hz": 500, "samples": 16}
+
+
+@pytest.mark.parametrize("dtype", ["complex64", ["float32"], {"a": 1}])
+def test_binary_upload_with_bad_dtype_is_422(upload_client, dtype):
+    response = upload_client.post(
+        "/upload",
+        content=_binary_body({"sample_rate_hz": 500, "dtype": dtype}, np.ones(16, dtype="<f4").tobytes()),
+        headers={"Content-Type": "application/octet-stream"},
+    )
+    assert response.status_code == 422
+    assert "dtype must be one of" in response.json()["detail"]
+
+
+def test_binary_upload_header_is_validated(upload_client):
+    response = upload_client.post(
+        "/upload",
+        content=_binary_body({"sample_rate_hz": -1}, np.ones(16, dtype="<f4").tobytes()),
+        headers={"Content-Type": "application/octet-stream"},
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "sample_rate_hz"]
@@ -0,0 +1,64 @@
+"""Tests for similarity index snapshots (api.services.similarity)."""
+
+import sqlite3
+import uuid
+
+import numpy as np
+
+from api.core.config import settings
+from api.services import similarity
+
+
+def _submit(client, auth_headers) -> uuid.UUID:
+    t = np.arange(8000) / 8000
+    response = client.post(
+        "/api/v1/samples/",
+        headers=auth_headers,
+        json={
+            "material": "glass",
+            "vibration": (np.sin(2 * np.pi * 733 * t) * np.exp(-4 * t)).tolist(),
+            "sample_rate_hz": 8000,
+            "excitation": "tap",
+            "source": "real",
+        },
+    )
+    assert response.status_code == 201, response.text
+    assert response.json()["validated"]
+    return uuid.UUID(response.json()["id"])
+
+
+def _snapshot(client, tmp_path) -> similarity.SimilarityIndex:
+    """A snapshot of a freshly built index, as loaded on startup."""
+    client.portal.call(similarity.rebuild)
+    path = tmp_path / "similarity-index.npz"
+    similarity.get_index().save(path)
+    return similarity.SimilarityIndex.load(path)
+
+
+def test_snapshot_matches_its_database(client, auth_headers, tmp_path):
+    sample_id = _submit(client, auth_headers)
+    snapshot = _snapshot(client, tmp_path)
+    assert snapshot is not None
+    assert snapshot.newest[1] == sample_id
+    assert snapshot.newest == similarity.get_index().newest
+    assert client.portal.call(similarity.matches_database, snapshot)
+
+
+def test_snapshot_rejected_once_its_newest_sample_is_gone(client, auth_headers, tmp_path):
+    sample_id = _submit(client, auth_headers)
+    snapshot = _snapshot(client, tmp_path)
+
+    # As if the database had been restored from an earlier backup
+    database = settings.DATABASE_URL.removeprefix("sqlite+aiosqlite:///")
+    with sqlite3.connect(database) as conn:
+        conn.execute("DELETE FROM sample_fingerprints WHERE sample_id = ?", (sample_id.bytes,))
+        conn.execute("DELETE FROM samples WHERE id = ?", (sample_id.bytes,))
+
+    assert not client.portal.call(similarity.matches_database, snapshot)
+
+
+def test_empty_snapshot_is_not_trusted(client, tmp_path):
+    similarity.SimilarityIndex().save(tmp_path / "similarity-index.npz")
+    snapshot = similarity.SimilarityIndex.load(tmp_path / "similarity-index.npz")
+    assert snapshot is not None
+    assert not client.portal.call(similarity.matches_database, snapshot)
@@ -0,0 +1,74 @@
+"""Tests for the vibration storage codec (api.core.vibration_codec)."""
+
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from api.core.vibration_codec import CODECS, decode_vibration, encode_vibration, is_encoded
+
+
+@pytest.fixture
+def signal() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    t = np.arange(4000) / 1000
+    return np.exp(-3 * t) * np.sin(2 * np.pi * 180 * t) + 0.01 * rng.standard_normal(len(t))
+
+
+def test_float64_is_lossless(signal):
+    np.testing.assert_array_equal(decode_vibration(encode_vibration(signal, codec="float64")), signal)
+
+
+def test_float32_keeps_float32_precision(signal):
+    decoded = decode_vibration(encode_vibration(signal, codec="float32"))
+    assert decoded.dtype == np.float64
+    np.testing.assert_array_equal(decoded, signal.astype(np.float32).astype(np.float64))
+
+
+def test_int16_delta_error_is_within_half_a_step(signal):
+    decoded = decode_vibration(encode_vibration(signal, codec="int16-delta"))
+    step = np.max(np.abs(signal)) / 32767
+    assert np.max(np.abs(decoded - signal)) <= step / 2 + 1e-12
+
+
+@pytest.mark.parametrize("codec", list(CODECS))
+@pytest.mark.parametrize("level", [0, 1, 9])
+def test_round_trip_keeps_length(codec, level, signal):
+    blob = encode_vibration(signal, codec=codec, level=level)
+    assert is_encoded(blob)
+    assert len(decode_vibration(blob)) == len(signal)
+
+
+@pytest.mark.parametrize("codec", list(CODECS))
+@pytest.mark.parametrize("values", [[], [0.0], [1.5, -1.5], [0.0] * 100])
+def test_edge_cases(codec, values):
+    decoded = decode_vibration(encode_vibration(values, codec=codec))
+    np.testing.assert_allclose(decoded, values, atol=1e-6)
+
+
+def test_compression_beats_json(signal):
+    blob = encode_vibration(signal, codec="float32")
+    assert len(blob) < len(json.dumps(signal.tolist())) / 3
+
+
+def test_unknown_codec_is_rejected(signal):
+    with pytest.raises(ValueError, match="codec must be one of"):
+        encode_vibration(signal, codec="float16")
+
+
+def test_header_records_codec_and_length(signal):
+    blob = encode_vibration(signal, codec="int16-delta")
+    magic, codec_id, _, length, scale = struct.unpack_from("<4sBBxxId", blob)
+    assert (magic, codec_id, length) == (b"RVB1", CODECS["int16-delta"][0], len(signal))
+    assert scale == pytest.approx(np.max(np.abs(signal)) / 32767)
+
+
+@pytest.mark.parametrize("stored", ["[0.5, 1.5, -2.0]", b"[0.5, 1.5, -2.0]", memoryview(b"[0.5, 1.5, -2.0]")])
+def test_legacy_json_is_decoded(stored):
+    assert not is_encoded(stored)
+    np.testing.assert_array_equal(decode_vibration(stored), [0.5, 1.5, -2.0])
+
+
+def test_lists_are_decoded():
+    np.testing.assert_array_equal(decode_vibration([1, 2, 3]), [1.0, 2.0, 3.0])
@@ -71,6 +71,8 @@ export interface SampleCreate {
     notes?: string
 }
 
+export type SampleStatus = 'pending' | 'processed' | 'failed'
+
 export interface SampleResponse {
     id: string
     material: string
@@ -78,6 +80,8 @@ export interface SampleResponse {
     vibration_length: number
     duration_seconds: number
     validated: boolean
+    status?: SampleStatus
+    duplicate?: boolean
     created_at: string
 }
 
@@ -90,15 +94,22 @@ export interface SampleListItem {
     source: string
     device?: string
     validated: boolean
+    status?: SampleStatus
+    peak_frequency_hz?: number | null
+    decay_rate?: number | null
+    energy?: number | null
+    spectral_centroid?: number | null
     created_at: string
 }
 
 export interface SampleListResponse {
     items: SampleListItem[]
     total: number
+    total_exact?: boolean
     page: number
     page_size: number
     has_next: boolean
+    next_cursor?: string | null
 }
 
 export interface SampleDetail {
@@ -116,8 +127,19 @@ export interface SampleDetail {
     device?: string
     notes?: string
     validated: boolean
+    status?: SampleStatus
+    validation_errors?: string[] | null
     peak_frequency_hz?: number
     energy?: number
+    decay_rate?: number | null
+    spectral_centroid?: number | null
+    spectral_bandwidth?: number | null
+    zcr?: number | null
+    peak_freq_1?: number | null
+    peak_freq_2?: number | null
+    peak_freq_3?: number | null
+    ac_lag_s?: number | null
+    feature_set_fingerprint?: string | null
     created_at: string
 }
 